@@ -91,6 +91,23 @@ export class DatabaseHandler {
         );
     }
 
+    /**
+     * Revokes a record only if it is still active, in a single conditional update,
+     * so two concurrent updates of the same credential cannot both succeed.
+     * @param credential_id The credentialId of the record to revoke.
+     * @returns True if this call revoked it, false if it was not active anymore.
+     */
+    public async revokeRecordIfActive(credential_id: string): Promise<boolean> {
+        if (!this.recordsCollection) throw new Error("A coleção não foi inicializada. Chame connect() primeiro.");
+        const result = await this.recordsCollection.updateOne(
+            { credentialId: credential_id, status: 'active' },
+            {
+                $set: { status: 'revoked' },
+            }
+        );
+        return result.modifiedCount === 1;
+    }
+
         /**
      * Finds the active credential ID for a given evidence hash.
      * Assumes that only one credential for a given evidence hash can be active at any time.
@@ -43,80 +43,103 @@ export async function transfer_evidence_ownership(
 export async function update_evidence(old_credential_did: string,
                 subject_data: CredentialSubjectData, issuer: Issuer,
                 dbHandler: DatabaseHandler, newRecordData: CustodyCredentialRecord,
-                contract: Contract): Promise<void> 
+                contract: Contract): Promise<boolean> 
 { 
-    const credential_record = await dbHandler.findRecordByCredentialId(old_credential_did);
-    if (credential_record?.sequence) {
-        // Calculates sequence number
-        newRecordData.sequence = credential_record.sequence + 1;
+    // Claims the old credential first: if another update replaced it meanwhile, nothing is written.
+    if (!await dbHandler.revokeRecordIfActive(old_credential_did)) {
+        return false;
     }
 
-    // Creates new credential.
-    const vcJwt = await createCredential(subject_data, issuer);
-    newRecordData.vcJwt = vcJwt;
-    newRecordData.evidencehash = subject_data.evidence_hash;
-    newRecordData.last_modifier_did = newRecordData.ownerDid;
-    newRecordData.previousCredentialId = old_credential_did;
-
+    let recordCreated = false;
+    try {
+        const credential_record = await dbHandler.findRecordByCredentialId(old_credential_did);
+        if (credential_record?.sequence) {
+            // Calculates sequence number
+            newRecordData.sequence = credential_record.sequence + 1;
+        }
 
-    await dbHandler.createRecord(newRecordData);
+        // Creates new credential.
+        const vcJwt = await createCredential(subject_data, issuer);
+        newRecordData.vcJwt = vcJwt;
+        newRecordData.evidencehash = subject_data.evidence_hash;
+        newRecordData.last_modifier_did = newRecordData.ownerDid;
+        newRecordData.previousCredentialId = old_credential_did;
 
-    const credentialHash = createHash('sha256').update(vcJwt).digest('hex');
-    // Stores data of the new credential in blockchain.
-    await createAsset(contract, newRecordData.credentialId, newRecordData.ownerDid,
-                        newRecordData.issuerDid, credentialHash, old_credential_did
-                    );
+        await dbHandler.createRecord(newRecordData);
+        recordCreated = true;
 
-    // Change status of old credential in database
-    await dbHandler.updateRecordStatus(old_credential_did, "revoked");
+        const credentialHash = createHash('sha256').update(vcJwt).digest('hex');
+        // Stores data of the new credential in blockchain.
+        await createAsset(contract, newRecordData.credentialId, newRecordData.ownerDid,
+                            newRecordData.issuerDid, credentialHash, old_credential_did
+                        );
+    } catch (error) {
+        // The old credential stays the head of the chain.
+        if (recordCreated) {
+            await dbHandler.updateRecordStatus(newRecordData.credentialId, "revoked");
+        }
+        await dbHandler.updateRecordStatus(old_credential_did, "active");
+        throw error;
+    }
     
     // Change status of old credential in blockchain.
     await revokeAsset(contract, old_credential_did);
+    return true;
 }
 
 /**
- * Retrieves the entire chain of custody for a given credential ID.
- * It traverses the credential history by recursively looking up the previous credential ID.
+ * Walks the chain of custody for a given credential ID, yielding one link at a time,
+ * from the latest credential back to the first one.
+ * It traverses the credential history by looking up the previous credential ID, so
+ * callers can forward each link before the rest of the chain has been read.
  * @param {string} credential_id The starting credential ID.
  * @param {DatabaseHandler} dbHandler An instance of the database handler to fetch credential records.
  * @param {Contract} contract The contract instance to interact with the ledger.
- * @returns {Promise<Array<{databaseRecord: CustodyCredentialRecord, ledgerData: Asset}>>} A promise that resolves with a list of tuples, 
- * where each tuple contains the typed database record and the corresponding typed ledger data.
+ * @returns {AsyncGenerator<{databaseRecord: CustodyCredentialRecord, ledgerData: Asset}>} The typed database
+ * record and the corresponding typed ledger data of each link.
  */
-export async function get_chain_of_custody(credential_id: string, dbHandler: DatabaseHandler, contract: Contract):
-    Promise<Array<{databaseRecord: CustodyCredentialRecord, ledgerData: Asset}>> {
-    // This list will store the combined data from the database and the ledger.
-    const chainOfCustody: Array<{databaseRecord: CustodyCredentialRecord, ledgerData: Asset}> = [];
-    
+export async function* iterate_chain_of_custody(credential_id: string, dbHandler: DatabaseHandler, contract: Contract):
+    AsyncGenerator<{databaseRecord: CustodyCredentialRecord, ledgerData: Asset}> {
     // Start with the initial credential ID provided.
     let current_cred_id: string | null = credential_id;
     
     do {
         // Fetch the record from your local database.
-        const cred_record = await dbHandler.findRecordByCredentialId(current_cred_id) as CustodyCredentialRecord;
+        const cred_record = await dbHandler.findRecordByCredentialId(current_cred_id);
+        if (!cred_record) {
+            // If no record is found at all, the chain is broken.
+            throw new Error(`The chain of custody is broken. Could not find a record for credential ID: ${current_cred_id}`);
+        }
         
         // Fetch the corresponding asset data from the ledger
         const ledger_data = await readAssetByID(contract, current_cred_id);
         
-        // Store the combined results as an object in our list.
-        chainOfCustody.push({ 
+        yield { 
             databaseRecord: cred_record, 
             ledgerData: ledger_data 
-        });
+        };
         
-        // Check if a previous credential exists to continue the chain.
-        if (cred_record && cred_record.previousCredentialId) {
-            current_cred_id = cred_record.previousCredentialId;
-        } else if (cred_record) {
-            // If there's a record but no previous ID, the chain ends here.
-            current_cred_id = null;
-        } 
-        else {
-            // If no record is found at all, the chain is broken.
-            throw new Error(`The chain of custody is broken. Could not find a record for credential ID: ${current_cred_id}`);
-        }
+        // Continue with the previous credential, if any; the chain ends at the first one.
+        current_cred_id = cred_record.previousCredentialId;
     
     } while (current_cred_id);
+}
+
+/**
+ * Retrieves the entire chain of custody for a given credential ID.
+ * @param {string} credential_id The starting credential ID.
+ * @param {DatabaseHandler} dbHandler An instance of the database handler to fetch credential records.
+ * @param {Contract} contract The contract instance to interact with the ledger.
+ * @returns {Promise<Array<{databaseRecord: CustodyCredentialRecord, ledgerData: Asset}>>} A promise that resolves with a list of tuples, 
+ * where each tuple contains the typed database record and the corresponding typed ledger data.
+ */
+export async function get_chain_of_custody(credential_id: string, dbHandler: DatabaseHandler, contract: Contract):
+    Promise<Array<{databaseRecord: CustodyCredentialRecord, ledgerData: Asset}>> {
+    // This list will store the combined data from the database and the ledger.
+    const chainOfCustody: Array<{databaseRecord: CustodyCredentialRecord, ledgerData: Asset}> = [];
+    for await (const link of iterate_chain_of_custody(credential_id, dbHandler, contract)) {
+        chainOfCustody.push(link);
+    }
 
     // Return the complete list of records.
     return chainOfCustody;
@@ -170,6 +193,21 @@ export async function get_chain_of_custody(credential_id: string, dbHandler: Dat
  }
 
 
+/**
+ * Computes the ETag of a chain of custody from its head record only.
+ * Links behind the head never change: an update creates a new head and a transfer
+ * changes the head owner, so the head identifies the whole chain without
+ * walking it or querying the ledger.
+ * @param {CustodyCredentialRecord} head_record The active (latest) record of the chain.
+ * @param {string} representation Distinguishes the bodies served for the same chain.
+ * @returns {string} A strong ETag, quoted as required by HTTP.
+ */
+export function compute_chain_etag(head_record: CustodyCredentialRecord, representation: string): string {
+    const version = [representation, head_record.credentialId, head_record.sequence,
+                     head_record.ownerDid, head_record.status].join('|');
+    return `"${createHash('sha256').update(version).digest('hex')}"`;
+}
+
 export async function get_credential_id_by_evidence_hash(
     evidence_hash: string, dbHandler: DatabaseHandler) : Promise<string | null> {
     const credential_id = await dbHandler.findActiveCredentialByEvidenceHash(evidence_hash);
@@ -0,0 +1,41 @@
+import axios from 'axios';
+
+// --- Configuration ---
+const MOCK_DB_BASE_URL = 'http://localhost:49152';
+
+interface CachedResource {
+  etag: string;
+  data: any;
+}
+
+// url -> last response carrying an ETag.
+const cache = new Map<string, CachedResource>();
+
+/**
+ * GETs a mockdb resource. A cached copy is revalidated with If-None-Match, so
+ * an unchanged resource costs an empty 304 instead of the full body.
+ * Errors (e.g. 404) are thrown as usual by axios.
+ */
+export async function getMockDbResource(path: string): Promise<any> {
+  const url = `${MOCK_DB_BASE_URL}${path}`;
+  const cached = cache.get(url);
+  const response = await axios.get(url, {
+    headers: cached ? { 'If-None-Match': cached.etag } : {},
+    validateStatus: status => (status >= 200 && status < 300) || status === 304,
+  });
+
+  if (response.status === 304 && cached) {
+    return cached.data;
+  }
+  const etag = response.headers['etag'];
+  if (etag) {
+    cache.set(url, { etag, data: response.data });
+  } else {
+    cache.delete(url);
+  }
+  return response.data;
+}
+
+export async function getCredentialDefinition(): Promise<{ credential_guid: string; connectionId: string }> {
+  return getMockDbResource('/credential-definition');
+}
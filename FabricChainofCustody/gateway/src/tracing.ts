@@ -0,0 +1,28 @@
+import { AsyncLocalStorage } from 'node:async_hooks';
+import { NextFunction, Request, Response } from 'express';
+import axios from 'axios';
+
+// traceparent (W3C Trace Context) of the request being handled.
+const traceContext = new AsyncLocalStorage<string>();
+
+/**
+ * Express middleware keeping the caller's traceparent for the duration of the request,
+ * so the calls it makes to the verifier and mockdb stay in the caller's trace.
+ */
+export function propagateTraceContext(req: Request, res: Response, next: NextFunction): void {
+  const traceparent = req.get('traceparent');
+  if (!traceparent) {
+    next();
+    return;
+  }
+  traceContext.run(traceparent, next);
+}
+
+// Every axios call of the gateway forwards the traceparent of the request it serves.
+axios.interceptors.request.use(config => {
+  const traceparent = traceContext.getStore();
+  if (traceparent && !config.headers.has('traceparent')) {
+    config.headers.set('traceparent', traceparent);
+  }
+  return config;
+});
@@ -1,4 +1,4 @@
-import { randomBytes } from 'crypto';
+import { randomBytes, randomUUID } from 'crypto';
 import type { Issuer } from 'did-jwt-vc' with { 'resolution-mode': 'import' };
 import type { DIDDocument } from 'did-resolver' with { 'resolution-mode': 'import' };
 
@@ -42,3 +42,11 @@ export async function createCredentialId(): Promise<string> {
 
     return didDocument.id;
 }
+
+/**
+ * Generates the identifier under which the verifier stores the verified data
+ * of a single request, so concurrent requests never read each other's proofs.
+ */
+export function createRequestIdentifier(): string {
+    return randomUUID();
+}
@@ -15,11 +15,16 @@ export interface EvidenceRecordData {
     how: string;
 }
 
+export const EVIDENCE_RECORD_KEYS: Array<keyof EvidenceRecordData> = ['what', 'who', 'where', 'when', 'why', 'how'];
+
 export interface CredentialSubjectData {
     id: string;
     evidence_hash: string;
     previous_credential_id: string | null;
-    evidence_record: EvidenceRecordData;
+    // Either the full record, or only the fields changed since previous_credential_id
+    // (the current record is rebuilt by applying the deltas from the first credential on).
+    evidence_record?: EvidenceRecordData;
+    evidence_record_delta?: Partial<EvidenceRecordData>;
 }
 
 
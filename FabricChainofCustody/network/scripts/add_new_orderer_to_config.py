@@ -1,27 +1,83 @@
-# This is a sample Python script.
-
-# Press ⌃R to execute it or replace it with your code.
-# Press Double ⇧ to search everywhere for classes, files, tool windows, actions, and settings.
+# Adds one or more orderers to a BFT channel config (as decoded by configtxlator),
+# so the whole batch goes into a single config update transaction.
+#
+# Single orderer:
+#   python3 add_new_orderer_to_config.py config.json modified_config.json -a host:port -i id.pem -s server.crt -c client.crt
+# Batch (repeat --orderer, or give a manifest with a list of
+# {"address", "identity", "server_cert", "client_cert"}):
+#   python3 add_new_orderer_to_config.py config.json modified_config.json \
+#       --orderer orderer5.example.com:7057 id5.pem server5.crt client5.crt \
+#       --orderer orderer6.example.com:7058 id6.pem server6.crt client6.crt
+#   python3 add_new_orderer_to_config.py config.json modified_config.json --manifest new_orderers.json
+# With -C and --envelope-output the config update envelope is written as well,
+# ready for `configtxlator proto_encode --type common.Envelope`.
 import argparse
 import base64
 import copy
 import json
 import math
-from typing import Any
+import os
+
+from config_update import write_config_update
+
+ORDERER_SPEC_KEYS = ('address', 'identity', 'server_cert', 'client_cert')
 
 
 def parse_args():
     parser = argparse.ArgumentParser(
         prog='Config Update',
-        description='What the program does',
-        epilog='Text at the bottom of help')
+        description='Adds orderers to a BFT channel config in a single pass.')
     parser.add_argument('config_path', type=str)
     parser.add_argument('updated_config_path', type=str)
-    parser.add_argument('-a', '--address', type=str, required=True)
-    parser.add_argument('-i', '--identity', type=str, required=True)
-    parser.add_argument('-s', '--server-cert', type=str, required=True)
-    parser.add_argument('-c', '--client-cert', type=str, required=True)
-    return parser.parse_args()
+    parser.add_argument('-a', '--address', type=str)
+    parser.add_argument('-i', '--identity', type=str)
+    parser.add_argument('-s', '--server-cert', type=str)
+    parser.add_argument('-c', '--client-cert', type=str)
+    parser.add_argument('--orderer', nargs=4, action='append', default=[],
+                        metavar=('ADDRESS', 'IDENTITY', 'SERVER_CERT', 'CLIENT_CERT'),
+                        help='May be repeated to add several orderers.')
+    parser.add_argument('--manifest', type=str,
+                        help='JSON file with a list of {"address", "identity", "server_cert", "client_cert"}. '
+                             'Relative paths are resolved against the manifest folder.')
+    parser.add_argument('-C', '--channel-id', type=str)
+    parser.add_argument('--envelope-output', type=str,
+                        help='Also write the config update envelope (JSON) computed from both configs.')
+    args = parser.parse_args()
+
+    single = [args.address, args.identity, args.server_cert, args.client_cert]
+    if any(single) and not all(single):
+        parser.error('-a, -i, -s and -c must be given together')
+    if not any(single) and not args.orderer and not args.manifest:
+        parser.error('no orderer given: use -a/-i/-s/-c, --orderer or --manifest')
+    if args.envelope_output and not args.channel_id:
+        parser.error('--envelope-output requires --channel-id')
+    return args
+
+
+def orderers_from_args(args) -> list[dict]:
+    orderers = []
+    if args.address:
+        orderers.append(dict(zip(ORDERER_SPEC_KEYS, (args.address, args.identity, args.server_cert, args.client_cert))))
+    orderers.extend(dict(zip(ORDERER_SPEC_KEYS, values)) for values in args.orderer)
+    if args.manifest:
+        orderers.extend(load_manifest(args.manifest))
+    return orderers
+
+
+def load_manifest(path: str) -> list[dict]:
+    with open(path, 'r') as f:
+        entries = json.load(f)
+    base_dir = os.path.dirname(os.path.abspath(path))
+    orderers = []
+    for entry in entries:
+        missing = [key for key in ORDERER_SPEC_KEYS if key not in entry]
+        if missing:
+            raise ValueError(f'Manifest entry {entry} is missing {", ".join(missing)}')
+        orderer = {'address': entry['address']}
+        for key in ORDERER_SPEC_KEYS[1:]:
+            orderer[key] = os.path.join(base_dir, entry[key])
+        orderers.append(orderer)
+    return orderers
 
 
 def _pem_file_to_base64(path: str) -> str:
@@ -31,13 +87,10 @@ def _pem_file_to_base64(path: str) -> str:
         return base64_encoded_data.decode('utf-8')
 
 
-def _log_update(name: str, old: Any, new: Any) -> None:
-    print('=' * 50)
-    print(f'Updating {name}:')
-    print(f'{old}')
-    print(">" * 25)
-    print(f'{new}')
-    print('=' * 50)
+def _log_update(name: str, before: int, after: int, added: list) -> None:
+    print(f'{name}: {before} -> {after}')
+    for item in added:
+        print(f'  + {item}')
 
 
 def _calculate_bft_quorum(n: int) -> int:
@@ -45,54 +98,76 @@ def _calculate_bft_quorum(n: int) -> int:
     return int(math.ceil((n + f + 1) / 2))
 
 
-def update_config(config_path: str, updated_config_path: str, address: str, identity_pem_path: str, server_pem_path: str, client_pem_path: str):
+def add_orderers(config: dict, orderers: list[dict]) -> None:
+    """
+    Adds every orderer of `orderers` ({"address", "identity", "server_cert",
+    "client_cert"}, the last three being PEM file paths) to `config` in place:
+    endpoint addresses, BlockValidation identities and rules, and consenter
+    mapping. The BFT quorum is recomputed once, for the final number of orderers.
+    """
+    orderer_group = config['channel_group']['groups']['Orderer']
+    addresses = orderer_group['groups']['OrdererOrg']['values']['Endpoints']['value']['addresses']
+    block_validation = orderer_group['policies']['BlockValidation']['policy']['value']
+    identities = block_validation['identities']
+    rule = block_validation['rule']
+    consenter_mapping = orderer_group['values']['Orderers']['value']['consenter_mapping']
+
+    known_endpoints = {f'{consenter["host"]}:{consenter["port"]}' for consenter in consenter_mapping}
+    known_identities = {consenter['identity'] for consenter in consenter_mapping}
+    addresses_before, identities_before = len(addresses), len(identities)
+    consenters_before, quorum_before = len(consenter_mapping), rule['n_out_of']['n']
+    next_id = max((int(consenter['id']) for consenter in consenter_mapping), default=0) + 1
+
+    for orderer in orderers:
+        identity = _pem_file_to_base64(orderer['identity'])
+        host, port = orderer['address'].split(':')
+        if orderer['address'] in known_endpoints or identity in known_identities:
+            raise ValueError(f'Orderer {orderer["address"]} is already part of the channel config')
+        known_endpoints.add(orderer['address'])
+        known_identities.add(identity)
+
+        addresses.append(f'{addresses[0].split(":")[0]}:{port}')
+
+        new_identity = copy.deepcopy(identities[0])
+        new_identity['principal']['id_bytes'] = identity
+        identities.append(new_identity)
+        rule['n_out_of']['rules'].append({'signed_by': len(identities) - 1})
+
+        consenter_mapping.append({
+            'client_tls_cert': _pem_file_to_base64(orderer['client_cert']),
+            'host': host,
+            'id': next_id,
+            'identity': identity,
+            'msp_id': consenter_mapping[0]['msp_id'],
+            'port': port,
+            'server_tls_cert': _pem_file_to_base64(orderer['server_cert'])
+        })
+        next_id += 1
+
+    rule['n_out_of']['n'] = _calculate_bft_quorum(len(consenter_mapping))
+
+    _log_update('addresses', addresses_before, len(addresses), addresses[addresses_before:])
+    _log_update('block validation identities', identities_before, len(identities),
+                [orderer['address'] for orderer in orderers])
+    _log_update('consenter_mapping', consenters_before, len(consenter_mapping),
+                [f'id {c["id"]} {c["host"]}:{c["port"]}' for c in consenter_mapping[consenters_before:]])
+    print(f'block validation quorum: {quorum_before} -> {rule["n_out_of"]["n"]} of {len(identities)}')
+
+
+def update_config(config_path: str, updated_config_path: str, orderers: list[dict],
+                  channel_id: str | None = None, envelope_output: str | None = None) -> dict:
     with open(config_path, 'r') as f:
         config = json.load(f)
-    identity = _pem_file_to_base64(identity_pem_path)
-    client_cert = _pem_file_to_base64(client_pem_path)
-    server_cert = _pem_file_to_base64(server_pem_path)
-    host, port = address.split(':')
-
-    addresses = config['channel_group']['groups']['Orderer']['groups']['OrdererOrg']['values']['Endpoints']['value']['addresses']
-    addresses_before_update = copy.deepcopy(addresses)
-    original_orderers_count = len(addresses_before_update)
-    addresses.append(f'{addresses[0].split(":")[0]}:{port}')
-    new_orderers_count = len(addresses)
-    _log_update('addresses', addresses_before_update, addresses)
-
-    identities = config['channel_group']['groups']['Orderer']['policies']['BlockValidation']['policy']['value']['identities']
-    identities_before_update = copy.deepcopy(identities)
-    new_identity = copy.deepcopy(identities[0])
-    new_identity['principal']['id_bytes'] = identity
-    identities.append(new_identity)
-    _log_update('block validation identities', identities_before_update, identities)
-
-    rule = config['channel_group']['groups']['Orderer']['policies']['BlockValidation']['policy']['value'][
-        'rule']
-    rule_before_update = copy.deepcopy(rule)
-    rule['n_out_of']['n'] = _calculate_bft_quorum(new_orderers_count)
-    rule['n_out_of']['rules'].append({'signed_by': new_orderers_count - 1})
-    _log_update('block validation rules', rule_before_update, rule)
-
-    consenter_mapping = config['channel_group']['groups']['Orderer']['values']['Orderers']['value']['consenter_mapping']
-    consenter_mapping_before_update = copy.deepcopy(consenter_mapping)
-    consenter_mapping.append({
-        'client_tls_cert': client_cert,
-        'host': host,
-        'id': new_orderers_count,
-        'identity': identity,
-        'msp_id': consenter_mapping[0]['msp_id'],
-        'port': port,
-        'server_tls_cert': server_cert
-    })
-    _log_update('consenter_mapping', consenter_mapping_before_update, consenter_mapping)
-
+    original = copy.deepcopy(config) if envelope_output else None
+    add_orderers(config, orderers)
     with open(updated_config_path, 'w') as f:
         json.dump(config, f)
+    if envelope_output:
+        write_config_update(channel_id, original, config, envelope_output=envelope_output)
+    return config
+
 
-# Press the green button in the gutter to run the script.
 if __name__ == '__main__':
     args = parse_args()
-    update_config(args.config_path, args.updated_config_path, args.address, args.identity, args.server_cert, args.client_cert)
-
-# See PyCharm help at https://www.jetbrains.com/help/pycharm/
+    update_config(args.config_path, args.updated_config_path, orderers_from_args(args),
+                  args.channel_id, args.envelope_output)
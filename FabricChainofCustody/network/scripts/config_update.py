@@ -0,0 +1,190 @@
+# Computes the config update between two channel configs in their JSON form
+# (as decoded by configtxlator), the same way `configtxlator compute_update` does
+# (fabric/internal/configtxlator/update), without encoding them to protobuf.
+#
+#   python3 config_update.py original_config.json modified_config.json -C mychannel \
+#       --envelope-output config_update_in_envelope.json
+#
+# The envelope JSON only has to be encoded once with
+#   configtxlator proto_encode --type common.Envelope
+# before being signed and submitted.
+import argparse
+import json
+
+# HeaderType_CONFIG_UPDATE
+CONFIG_UPDATE_HEADER_TYPE = 2
+
+
+def _version(item: dict) -> int:
+    # uint64 fields are strings in protobuf JSON.
+    return int(item.get('version') or 0)
+
+
+def _group(version: int, mod_policy: str = '', policies: dict | None = None,
+           values: dict | None = None, groups: dict | None = None) -> dict:
+    return {
+        'groups': groups or {},
+        'mod_policy': mod_policy,
+        'policies': policies or {},
+        'values': values or {},
+        'version': str(version)
+    }
+
+
+def _compute_items_map_update(original: dict, updated: dict, content_key: str):
+    """
+    Shared by policies (content_key 'policy') and values (content_key 'value').
+    Returns (read_set, write_set, same_set, members_updated).
+    """
+    read_set, write_set, same_set = {}, {}, {}
+    members_updated = False
+    for name, original_item in original.items():
+        updated_item = updated.get(name)
+        if updated_item is None:
+            members_updated = True
+            continue
+        if (original_item.get('mod_policy', '') == updated_item.get('mod_policy', '')
+                and original_item.get(content_key) == updated_item.get(content_key)):
+            same_set[name] = {'version': str(_version(original_item))}
+            continue
+        write_set[name] = {
+            'mod_policy': updated_item.get('mod_policy', ''),
+            content_key: updated_item.get(content_key),
+            'version': str(_version(original_item) + 1)
+        }
+    for name, updated_item in updated.items():
+        if name in original:
+            continue
+        members_updated = True
+        write_set[name] = {
+            'mod_policy': updated_item.get('mod_policy', ''),
+            content_key: updated_item.get(content_key),
+            'version': '0'
+        }
+    return read_set, write_set, same_set, members_updated
+
+
+def _compute_groups_map_update(original: dict, updated: dict):
+    read_set, write_set, same_set = {}, {}, {}
+    members_updated = False
+    for name, original_group in original.items():
+        updated_group = updated.get(name)
+        if updated_group is None:
+            members_updated = True
+            continue
+        group_read_set, group_write_set, group_updated = compute_group_update(original_group, updated_group)
+        if not group_updated:
+            same_set[name] = group_read_set
+            continue
+        read_set[name] = group_read_set
+        write_set[name] = group_write_set
+    for name, updated_group in updated.items():
+        if name in original:
+            continue
+        members_updated = True
+        _, group_write_set, _ = compute_group_update(_group(0), updated_group)
+        write_set[name] = _group(0, updated_group.get('mod_policy', ''), group_write_set['policies'],
+                                 group_write_set['values'], group_write_set['groups'])
+    return read_set, write_set, same_set, members_updated
+
+
+def compute_group_update(original: dict, updated: dict) -> tuple[dict, dict, bool]:
+    """
+    Returns (read_set, write_set, updated) for a config group. A group whose
+    members or mod_policy changed gets its version bumped in the write set, and
+    every unchanged member is listed in both sets at its current version.
+    """
+    read_policies, write_policies, same_policies, policies_updated = _compute_items_map_update(
+        original.get('policies') or {}, updated.get('policies') or {}, 'policy')
+    read_values, write_values, same_values, values_updated = _compute_items_map_update(
+        original.get('values') or {}, updated.get('values') or {}, 'value')
+    read_groups, write_groups, same_groups, groups_updated = _compute_groups_map_update(
+        original.get('groups') or {}, updated.get('groups') or {})
+    version = _version(original)
+
+    if not (policies_updated or values_updated or groups_updated
+            or original.get('mod_policy', '') != updated.get('mod_policy', '')):
+        if not (read_policies or write_policies or read_values or write_values or read_groups or write_groups):
+            return _group(version), _group(version), False
+        return (_group(version, policies=read_policies, values=read_values, groups=read_groups),
+                _group(version, policies=write_policies, values=write_values, groups=write_groups),
+                True)
+
+    read_policies.update(same_policies)
+    write_policies.update(same_policies)
+    read_values.update(same_values)
+    write_values.update(same_values)
+    read_groups.update(same_groups)
+    write_groups.update(same_groups)
+    return (_group(version, policies=read_policies, values=read_values, groups=read_groups),
+            _group(version + 1, updated.get('mod_policy', ''), write_policies, write_values, write_groups),
+            True)
+
+
+def compute_update(channel_id: str, original_config: dict, updated_config: dict) -> dict:
+    """
+    Returns the common.ConfigUpdate (JSON) transitioning `original_config` into `updated_config`.
+    Raises ValueError if there is nothing to update.
+    """
+    if not original_config.get('channel_group'):
+        raise ValueError('no channel group included for original config')
+    if not updated_config.get('channel_group'):
+        raise ValueError('no channel group included for updated config')
+    read_set, write_set, updated = compute_group_update(original_config['channel_group'],
+                                                        updated_config['channel_group'])
+    if not updated:
+        raise ValueError('no differences detected between original and updated config')
+    return {
+        'channel_id': channel_id,
+        'isolated_data': {},
+        'read_set': read_set,
+        'write_set': write_set
+    }
+
+
+def config_update_envelope(channel_id: str, config_update: dict) -> dict:
+    """
+    Wraps a config update in the common.Envelope expected by `peer channel signconfigtx/update`.
+    """
+    return {
+        'payload': {
+            'header': {'channel_header': {'channel_id': channel_id, 'type': CONFIG_UPDATE_HEADER_TYPE}},
+            'data': {'config_update': config_update}
+        }
+    }
+
+
+def write_config_update(channel_id: str, original_config: dict, updated_config: dict,
+                        update_output: str | None = None, envelope_output: str | None = None) -> dict:
+    config_update = compute_update(channel_id, original_config, updated_config)
+    if update_output:
+        with open(update_output, 'w') as f:
+            json.dump(config_update, f)
+    if envelope_output:
+        with open(envelope_output, 'w') as f:
+            json.dump(config_update_envelope(channel_id, config_update), f)
+    return config_update
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        prog='Config Update Delta',
+        description='Computes the config update (read/write sets) between two channel configs in JSON.')
+    parser.add_argument('original_config_path', type=str)
+    parser.add_argument('updated_config_path', type=str)
+    parser.add_argument('-C', '--channel-id', type=str, required=True)
+    parser.add_argument('--update-output', type=str, help='Where to write the common.ConfigUpdate JSON.')
+    parser.add_argument('--envelope-output', type=str, help='Where to write the common.Envelope JSON.')
+    args = parser.parse_args()
+    if not args.update_output and not args.envelope_output:
+        parser.error('at least one of --update-output and --envelope-output is required')
+    return args
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    with open(args.original_config_path, 'r') as f:
+        original = json.load(f)
+    with open(args.updated_config_path, 'r') as f:
+        updated = json.load(f)
+    write_config_update(args.channel_id, original, updated, args.update_output, args.envelope_output)
@@ -0,0 +1,371 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+import aiohttp
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+from fast_json import client_session, loads
+
+URL_COC = "http://localhost:3000"
+headers = {
+    "Content-Type": "application/json",
+    "Accept": "application/json"
+}
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_MAX_ATTEMPTS = 3
+# Every gateway operation waits for an AnonCreds proof round trip, so
+# requests routinely take several seconds.
+DEFAULT_TIMEOUT_SECONDS = 120
+EVIDENCE_RECORD_KEYS = ("what", "who", "where", "when", "why", "how")
+
+# Statuses that should be retried: the gateway or the verifier may be
+# temporarily overloaded while a batch is running.
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class ProgressTracker:
+    """
+    Counts processed items and prints a one-line progress report per item.
+    """
+    def __init__(self, label: str):
+        self.label = label
+        self.succeeded = 0
+        self.skipped = 0
+        self.failed = 0
+        self._started_at = time.monotonic()
+
+    @property
+    def processed(self) -> int:
+        return self.succeeded + self.skipped + self.failed
+
+    def record(self, outcome: str, item: str, detail: str = "") -> None:
+        if outcome == "ok":
+            self.succeeded += 1
+        elif outcome == "skipped":
+            self.skipped += 1
+        else:
+            self.failed += 1
+        elapsed = time.monotonic() - self._started_at
+        rate = self.processed / elapsed if elapsed > 0 else 0.0
+        print(f"[{self.label}] {self.processed} processados "
+              f"({self.succeeded} ok, {self.skipped} ignorados, {self.failed} falhas, "
+              f"{rate:.2f}/s) - {outcome}: {item} {detail}".rstrip())
+
+    def summary(self) -> dict:
+        return {
+            "processed": self.processed,
+            "succeeded": self.succeeded,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "elapsed_seconds": round(time.monotonic() - self._started_at, 3)
+        }
+
+
+def iter_jsonl(path: str):
+    """
+    Lazily yields (line_number, record) for every non-blank line of a JSONL file.
+    Lines that are not valid JSON objects are yielded as (line_number, None).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                yield line_number, None
+                continue
+            yield line_number, record if isinstance(record, dict) else None
+
+
+def load_checkpoint(checkpoint_path: str) -> set[str]:
+    """
+    Returns the keys already completed according to a checkpoint file.
+    Only finished items are listed, failures are retried on the next run.
+    """
+    completed = set()
+    if not os.path.exists(checkpoint_path):
+        return completed
+    for _, entry in iter_jsonl(checkpoint_path):
+        if entry and entry.get("status") in ("ok", "skipped"):
+            completed.add(entry["key"])
+    return completed
+
+
+def create_session(concurrency: int,
+                   timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS) -> aiohttp.ClientSession:
+    """
+    One pooled session for a whole batch, with as many keep-alive
+    connections as there are concurrent workers.
+    """
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=timeout_seconds)
+    return client_session(connector=connector, timeout=timeout, headers=headers)
+
+
+async def post_with_retries(session: aiohttp.ClientSession, url: str, data: dict,
+                            max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                            base_delay: float = 1.0) -> tuple[int, str]:
+    """
+    POSTs `data` retrying on network errors and on RETRYABLE_STATUSES with
+    exponential backoff and jitter.
+    Returns (status, response_text) of the last attempt.
+    Raises the last network error if every attempt failed to get a response.
+    """
+    for attempt in range(1, max_attempts + 1):
+        try:
+            async with session.post(url, json=data) as response:
+                text = await response.text()
+                if response.status not in RETRYABLE_STATUSES or attempt == max_attempts:
+                    return response.status, text
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if attempt == max_attempts:
+                raise
+        await asyncio.sleep(base_delay * 2 ** (attempt - 1) * (1 + random.random()))
+
+
+async def run_bulk(items, handler, concurrency: int, checkpoint_path: str | None,
+                   tracker: ProgressTracker) -> dict:
+    """
+    Runs `handler(session, key, payload)` over an iterable of (key, payload)
+    with at most `concurrency` requests in flight.
+
+    Items are pulled lazily from `items`, so arbitrarily large inputs are
+    processed in constant memory. `handler` returns (outcome, detail) where
+    outcome is "ok", "skipped" or "failed". Each finished item is appended to
+    the checkpoint file, and items already completed there are not resubmitted.
+    An exception raised by `handler` fails its item only.
+    """
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be at least 1, got {concurrency}.")
+    completed = load_checkpoint(checkpoint_path) if checkpoint_path else set()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    checkpoint = open(checkpoint_path, "a", encoding="utf-8") if checkpoint_path else None
+
+    async def worker(session: aiohttp.ClientSession):
+        while True:
+            item = await queue.get()
+            try:
+                if item is None:
+                    return
+                key, payload = item
+                try:
+                    outcome, detail = await handler(session, key, payload)
+                except Exception as e:
+                    # A worker that died would leave the producer blocked on a full queue.
+                    outcome, detail = "failed", f"{type(e).__name__}: {e}"
+                tracker.record(outcome, key, detail)
+                if checkpoint:
+                    checkpoint.write(json.dumps({"key": key, "status": outcome, "detail": detail}) + "\n")
+                    checkpoint.flush()
+            finally:
+                queue.task_done()
+
+    try:
+        async with create_session(concurrency) as session:
+            workers = [asyncio.create_task(worker(session)) for _ in range(concurrency)]
+            for key, payload in items:
+                if key in completed:
+                    continue
+                await queue.put((key, payload))
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+    finally:
+        if checkpoint:
+            checkpoint.close()
+
+    summary = tracker.summary()
+    summary["already_completed"] = len(completed)
+    return summary
+
+
+# --- Evidence ingestion
+def build_create_evidence_payload(record: dict, owner_did: str) -> dict:
+    """
+    Converts one JSONL record into the body expected by /create-evidence.
+
+    Each record must look like:
+        {"evidence_hash": "...", "evidence_record": {"what": ..., ..., "how": ...}, "tags": [...]}
+    Raises ValueError if a required field is missing.
+    """
+    evidence_hash = record.get("evidence_hash")
+    evidence_record = record.get("evidence_record")
+    if not evidence_hash or not isinstance(evidence_record, dict):
+        raise ValueError("'evidence_hash' and 'evidence_record' are required.")
+    missing = [key for key in EVIDENCE_RECORD_KEYS
+               if not isinstance(evidence_record.get(key), str) or not evidence_record[key].strip()]
+    if missing:
+        raise ValueError(f"evidence_record is missing: {', '.join(missing)}")
+
+    return {
+        "owner_did": owner_did,
+        "evidence_hash": evidence_hash,
+        "evidence_record": {key: evidence_record[key] for key in EVIDENCE_RECORD_KEYS},
+        "tags": record.get("tags", [])
+    }
+
+
+async def ingest_evidence_file(jsonl_path: str, owner_did: str,
+                               checkpoint_path: str | None = None,
+                               concurrency: int = DEFAULT_CONCURRENCY,
+                               max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                               url_coc: str = URL_COC) -> dict:
+    """
+    Creates one evidence record per line of `jsonl_path` through /create-evidence.
+
+    Progress is appended to `checkpoint_path` (defaults to '<jsonl_path>.progress'),
+    so an interrupted ingestion can be resumed by running it again.
+    Evidence that already exists in the gateway (409) is counted as skipped.
+    Returns a summary dict.
+    """
+    if checkpoint_path is None:
+        checkpoint_path = f"{jsonl_path}.progress"
+    url = f"{url_coc}/create-evidence"
+    tracker = ProgressTracker("ingestão")
+
+    def items():
+        for line_number, record in iter_jsonl(jsonl_path):
+            if record is None:
+                tracker.record("failed", f"linha {line_number}", "JSON inválido")
+                continue
+            try:
+                payload = build_create_evidence_payload(record, owner_did)
+            except ValueError as e:
+                tracker.record("failed", f"linha {line_number}", str(e))
+                continue
+            yield payload["evidence_hash"], payload
+
+    async def create(session, evidence_hash, payload):
+        status, text = await post_with_retries(session, url, payload, max_attempts)
+        if status == 201:
+            return "ok", json.loads(text).get("credentialId", "")
+        if status == 409:
+            return "skipped", "evidência já existe"
+        return "failed", f"status {status}: {text}"
+
+    return await run_bulk(items(), create, concurrency, checkpoint_path, tracker)
+
+
+# --- Chain-of-custody audit
+def iter_evidence_hashes(path: str):
+    """
+    Lazily yields (line_number, evidence_hash) from a file with one hash per
+    line; blank lines and '#' comments are ignored. JSONL lines with an
+    "evidence_hash" field (e.g. an ingestion file) are accepted as well.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                try:
+                    line = json.loads(line).get("evidence_hash") or ""
+                except (json.JSONDecodeError, AttributeError):
+                    line = ""
+            yield line_number, line
+
+
+def audit_verdict(status: str, text: str) -> tuple[str, str]:
+    """
+    Maps a /verify-chain-of-custody response to (verdict, detail).
+    """
+    if status == 200:
+        return "verified", f"{len(loads(text).get('payloads', []))} elos"
+    if status == 404:
+        # No active credential for the hash, or a link missing from the chain.
+        return "broken" if "broken" in text else "not_found", text
+    if status == 400:
+        return "verification_failed", text
+    return "error", f"status {status}: {text}"
+
+
+async def audit_evidence_hashes(hashes_path: str, owner_did: str,
+                                report_path: str | None = None,
+                                concurrency: int = DEFAULT_CONCURRENCY,
+                                max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                                url_coc: str = URL_COC) -> dict:
+    """
+    Verifies the chain of custody of every evidence hash in `hashes_path`
+    through /verify-chain-of-custody, with at most `concurrency` verifications
+    in flight over one pooled session.
+
+    Each verdict is appended to `report_path` as soon as it is known (defaults
+    to '<hashes_path>.audit-<timestamp>.jsonl'); running again with the same
+    report only verifies the hashes missing from it.
+    Returns a summary dict, with the number of hashes per verdict.
+    """
+    if report_path is None:
+        report_path = f"{hashes_path}.audit-{time.strftime('%Y%m%d-%H%M%S')}.jsonl"
+    url = f"{url_coc}/verify-chain-of-custody"
+    tracker = ProgressTracker("auditoria")
+    verdicts: dict[str, int] = {}
+
+    def items():
+        seen = set()
+        for line_number, evidence_hash in iter_evidence_hashes(hashes_path):
+            if not evidence_hash:
+                tracker.record("failed", f"linha {line_number}", "hash ausente")
+                continue
+            if evidence_hash in seen:
+                continue
+            seen.add(evidence_hash)
+            yield evidence_hash, {"owner_did": owner_did, "evidence_hash": evidence_hash}
+
+    async def verify(session, evidence_hash, payload):
+        status, text = await post_with_retries(session, url, payload, max_attempts)
+        verdict, detail = audit_verdict(status, text)
+        verdicts[verdict] = verdicts.get(verdict, 0) + 1
+        # Only verified chains are final; any other verdict is checked again when resuming.
+        return ("ok" if verdict == "verified" else "failed"), f"{verdict}: {detail}"
+
+    summary = await run_bulk(items(), verify, concurrency, report_path, tracker)
+    summary["verdicts"] = verdicts
+    summary["report"] = report_path
+    return summary
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bulk operations against the Chain of Custody gateway.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ingest = subparsers.add_parser("ingest", help="Create evidence records from a JSONL file.")
+    ingest.add_argument("jsonl_path")
+    ingest.add_argument("--owner-did", required=True)
+    ingest.add_argument("--checkpoint", default=None)
+    ingest.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    ingest.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS)
+    ingest.add_argument("--url", default=URL_COC)
+
+    audit = subparsers.add_parser("audit", help="Verify the chain of custody of many evidence hashes.")
+    audit.add_argument("hashes_path", help="One evidence hash per line (or JSONL with evidence_hash).")
+    audit.add_argument("--owner-did", required=True)
+    audit.add_argument("--report", default=None, help="JSONL report; an existing one is resumed.")
+    audit.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    audit.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS)
+    audit.add_argument("--url", default=URL_COC)
+    return parser.parse_args()
+
+
+async def main():
+    args = parse_args()
+    if args.command == "ingest":
+        summary = await ingest_evidence_file(args.jsonl_path, args.owner_did, args.checkpoint,
+                                             args.concurrency, args.max_attempts, args.url)
+        print(json.dumps(summary, indent=2))
+    elif args.command == "audit":
+        summary = await audit_evidence_hashes(args.hashes_path, args.owner_did, args.report,
+                                              args.concurrency, args.max_attempts, args.url)
+        print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
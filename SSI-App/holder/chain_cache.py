@@ -0,0 +1,218 @@
+from collections import OrderedDict
+import os
+import sys
+import aiohttp
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+from fast_json import client_session, loads
+
+URL_COC = "http://localhost:3000"
+headers = {
+    "Content-Type": "application/json",
+    "Accept": "application/json"
+}
+
+# Gateway endpoint whose responses are cached, keyed by evidence_hash. Verifications never are.
+CHAIN_OF_CUSTODY = "chain-of-custody"
+VERIFY_CHAIN_OF_CUSTODY = "verify-chain-of-custody"
+EVIDENCE_RECORD_KEYS = ("what", "who", "where", "when", "why", "how")
+
+
+class ChainOfCustodyCache:
+    """
+    Holder-side cache of chain-of-custody metadata responses, keyed by evidence_hash.
+
+    Each entry keeps the gateway's ETag, so a cached chain is revalidated with
+    If-None-Match: the gateway still checks the holder's credential, but answers
+    304 from the head record alone instead of re-reading the ledger.
+    Least recently used evidences are evicted beyond `max_entries`.
+    """
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, dict[str, tuple[str, object]]] = OrderedDict()
+
+    def get(self, evidence_hash: str, endpoint: str) -> tuple[str, object] | None:
+        """
+        Returns (etag, body) cached for the endpoint, or None.
+        """
+        entry = self._entries.get(evidence_hash)
+        if entry is None or endpoint not in entry:
+            return None
+        self._entries.move_to_end(evidence_hash)
+        return entry[endpoint]
+
+    def put(self, evidence_hash: str, endpoint: str, etag: str, body: object) -> None:
+        self._entries.setdefault(evidence_hash, {})[endpoint] = (etag, body)
+        self._entries.move_to_end(evidence_hash)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, evidence_hash: str) -> None:
+        self._entries.pop(evidence_hash, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+# Shared by every call made from this holder process.
+chain_cache = ChainOfCustodyCache()
+
+
+async def post_cached(endpoint: str, owner_did: str, evidence_hash: str,
+                      cache: ChainOfCustodyCache = chain_cache,
+                      url_coc: str = URL_COC,
+                      session: aiohttp.ClientSession | None = None) -> tuple[int, object, bool]:
+    """
+    POSTs to a chain-of-custody endpoint revalidating any cached response.
+    Returns (status, body, from_cache). `body` is the parsed JSON on success
+    and the error text otherwise.
+    """
+    data = {
+        "owner_did": owner_did,
+        "evidence_hash": evidence_hash,
+    }
+    request_headers = dict(headers)
+    cached = cache.get(evidence_hash, endpoint)
+    if cached:
+        request_headers["If-None-Match"] = cached[0]
+
+    own_session = session is None
+    if own_session:
+        session = client_session()
+    try:
+        async with session.post(f"{url_coc}/{endpoint}", headers=request_headers, json=data) as response:
+            if response.status == 304 and cached:
+                return 200, cached[1], True
+            if response.status == 200:
+                body = await response.json(loads=loads)
+                etag = response.headers.get("ETag")
+                if etag:
+                    cache.put(evidence_hash, endpoint, etag, body)
+                return 200, body, False
+            if response.status == 404:
+                cache.invalidate(evidence_hash)
+            return response.status, await response.text(), False
+    finally:
+        if own_session:
+            await session.close()
+
+
+async def get_chain_of_custody(owner_did: str, evidence_hash: str,
+                               cache: ChainOfCustodyCache = chain_cache,
+                               url_coc: str = URL_COC) -> tuple[int, object, bool]:
+    return await post_cached(CHAIN_OF_CUSTODY, owner_did, evidence_hash, cache, url_coc)
+
+
+async def verify_chain_of_custody(owner_did: str, evidence_hash: str,
+                                  url_coc: str = URL_COC) -> tuple[int, object]:
+    """
+    Verifies the whole chain through the gateway, without any cache: a cached
+    "verified" would hide a link tampered with since. Returns (status, body).
+    """
+    data = {
+        "owner_did": owner_did,
+        "evidence_hash": evidence_hash,
+    }
+    async with client_session() as session:
+        async with session.post(f"{url_coc}/{VERIFY_CHAIN_OF_CUSTODY}", headers=headers, json=data) as response:
+            if response.status == 200:
+                return response.status, await response.json(loads=loads)
+            return response.status, await response.text()
+
+
+async def _post_and_invalidate(endpoint: str, data: dict, cache: ChainOfCustodyCache,
+                               url_coc: str) -> tuple[int, object]:
+    # Invalidate even when the call fails: a timeout may still have changed the chain.
+    try:
+        async with client_session() as session:
+            async with session.post(f"{url_coc}/{endpoint}", headers=headers, json=data) as response:
+                if response.status == 200:
+                    return response.status, await response.json()
+                return response.status, await response.text()
+    finally:
+        cache.invalidate(data["evidence_hash"])
+
+
+async def update_evidence(data: dict, cache: ChainOfCustodyCache = chain_cache,
+                          url_coc: str = URL_COC) -> tuple[int, object]:
+    """
+    Calls /update-evidence and drops the cached chain of that evidence.
+    Returns (status, body).
+    """
+    return await _post_and_invalidate("update-evidence", data, cache, url_coc)
+
+
+def credential_subject(payload: dict) -> dict:
+    """
+    Returns the credentialSubject of a verified credential from /verify-chain-of-custody.
+    """
+    credential = payload.get("verifiableCredential") or payload.get("payload", {}).get("vc", {})
+    return credential.get("credentialSubject", {})
+
+
+def current_evidence_record(payloads: list[dict]) -> tuple[dict, str]:
+    """
+    Rebuilds the current 5W1H record from the verified payloads of a chain
+    (newest first): the first credential carries the full record, each update
+    either a full record or only the fields it changed (evidence_record_delta).
+    Returns (evidence_record, credential id of the current version).
+    """
+    record = {}
+    for payload in reversed(payloads):
+        subject = credential_subject(payload)
+        if "evidence_record" in subject:
+            record = dict(subject["evidence_record"])
+        else:
+            delta = subject.get("evidence_record_delta")
+            # Only the 5W1H fields of an object: anything else is not part of the record.
+            if isinstance(delta, dict):
+                record.update({key: delta[key] for key in EVIDENCE_RECORD_KEYS if key in delta})
+    return record, credential_subject(payloads[0]).get("id")
+
+
+def evidence_record_delta(current: dict, new: dict) -> dict:
+    """
+    Returns the fields of `new` that differ from `current`; empty fields are left unchanged.
+    """
+    return {key: new[key] for key in EVIDENCE_RECORD_KEYS if new.get(key) and new[key] != current.get(key)}
+
+
+async def get_current_evidence_record(owner_did: str, evidence_hash: str,
+                                      url_coc: str = URL_COC) -> tuple[int, object]:
+    """
+    Returns (200, (evidence_record, base_credential_id)) from the verified chain,
+    or (status, error text).
+    """
+    status, body = await verify_chain_of_custody(owner_did, evidence_hash, url_coc)
+    if status != 200:
+        return status, body
+    return status, current_evidence_record(body["payloads"])
+
+
+async def update_evidence_delta(owner_did: str, evidence_hash: str, base_credential_id: str,
+                                evidence_record_delta: dict, tags: list[str] | None = None,
+                                cache: ChainOfCustodyCache = chain_cache,
+                                url_coc: str = URL_COC) -> tuple[int, object]:
+    """
+    Calls /update-evidence with only the changed fields of the record, on top of
+    `base_credential_id` (the gateway answers 409 if the evidence was updated
+    since). Tags are kept unless given. Returns (status, body).
+    """
+    data = {
+        "owner_did": owner_did,
+        "evidence_hash": evidence_hash,
+        "base_credential_id": base_credential_id,
+        "evidence_record_delta": evidence_record_delta,
+    }
+    if tags:
+        data["tags"] = tags
+    return await _post_and_invalidate("update-evidence", data, cache, url_coc)
+
+
+async def transfer_ownership(data: dict, cache: ChainOfCustodyCache = chain_cache,
+                             url_coc: str = URL_COC) -> tuple[int, object]:
+    """
+    Calls /transfer-ownership and drops the cached chain of that evidence.
+    Returns (status, body).
+    """
+    return await _post_and_invalidate("transfer-ownership", data, cache, url_coc)
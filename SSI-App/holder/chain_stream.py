@@ -0,0 +1,230 @@
+import codecs
+import json
+import re
+import aiohttp
+
+from chain_cache import ChainOfCustodyCache, chain_cache, headers, URL_COC, CHAIN_OF_CUSTODY
+from fast_json import client_session
+
+CHUNK_SIZE = 64 * 1024
+JSON_WHITESPACE = " \t\r\n"
+# Characters that matter while looking for the end of an element, outside and inside strings.
+STRUCTURE = re.compile(r'["{}\[\]]')
+STRING_SPECIALS = re.compile(r'["\\]')
+# Longer chains are rendered but not kept in the cache, so memory stays bounded.
+MAX_CACHED_LINKS = 500
+
+
+class ChainOfCustodyError(Exception):
+    """
+    Raised when the gateway refuses a chain-of-custody request, or answers with a malformed chain.
+    """
+    def __init__(self, status: int, detail: str):
+        super().__init__(f"status {status}: {detail}")
+        self.status = status
+        self.detail = detail
+
+
+def _malformed(detail: str) -> ChainOfCustodyError:
+    # The gateway answered 200, but the body is not the JSON array it should be.
+    return ChainOfCustodyError(200, f"Malformed chain of custody: {detail}")
+
+
+def _scan_container(buffer: str, position: int, state: list) -> int | None:
+    """
+    Advances the scan of an object/array element over `buffer` from `position`,
+    updating `state` ([depth, in_string, escaped]). Returns the index just past
+    its closing bracket, or None if that has not arrived yet.
+    """
+    depth, in_string, escaped = state
+    if escaped:
+        # Skips the character escaped by a backslash that ended the previous chunk.
+        position += 1
+    while True:
+        match = (STRING_SPECIALS if in_string else STRUCTURE).search(buffer, position)
+        if match is None:
+            state[:] = depth, in_string, False
+            return None
+        char = match.group()
+        position = match.end()
+        if char == "\\":
+            if position >= len(buffer):
+                state[:] = depth, in_string, True
+                return None
+            position += 1
+        elif char == '"':
+            in_string = not in_string
+        elif char in "{[":
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                state[:] = 0, False, False
+                return position
+
+
+async def iter_json_array(stream: aiohttp.StreamReader, chunk_size: int = CHUNK_SIZE):
+    """
+    Incrementally parses a JSON array from a byte stream, yielding each element
+    as soon as it has fully arrived. Only the unparsed tail is kept in memory,
+    and an element split across chunks is scanned once, then decoded once.
+    Raises ChainOfCustodyError if the stream is not a well-formed, complete JSON array.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    position = 0
+    # "[" before the array, "first" after it opens, "value" after a comma, "separator" after an element.
+    expecting = "["
+    # Where the scan of an element still arriving resumes, and its [depth, in_string, escaped].
+    scan = None
+    scan_state = [0, False, False]
+
+    while True:
+        chunk = await stream.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[position:] + utf8.decode(chunk, final=eof)
+        if scan is not None:
+            scan -= position
+        position = 0
+
+        while True:
+            if scan is None:
+                while position < len(buffer) and buffer[position] in JSON_WHITESPACE:
+                    position += 1
+                if position == len(buffer):
+                    break
+                char = buffer[position]
+                if expecting == "[":
+                    if char != "[":
+                        raise _malformed("expected a JSON array.")
+                    expecting = "first"
+                    position += 1
+                    continue
+                if char == "]" and expecting in ("first", "separator"):
+                    return
+                if expecting == "separator":
+                    if char != ",":
+                        raise _malformed(f"expected ',' or ']' between elements, got {char!r}.")
+                    expecting = "value"
+                    position += 1
+                    continue
+                if char not in "{[":
+                    # Scalars are short: decode them directly, once followed by a delimiter
+                    # (a number like "-1." could otherwise be cut short at the end of a chunk).
+                    try:
+                        element, end = decoder.raw_decode(buffer, position)
+                    except json.JSONDecodeError as e:
+                        if eof:
+                            raise _malformed(str(e))
+                        break
+                    if not eof and (end == len(buffer) or buffer[end] not in JSON_WHITESPACE + ",]"):
+                        break
+                    yield element
+                    position = end
+                    expecting = "separator"
+                    continue
+                scan = position
+                scan_state[:] = 0, False, False
+            end = _scan_container(buffer, scan, scan_state)
+            if end is None:
+                scan = len(buffer)
+                break
+            scan = None
+            try:
+                element, decoded_end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as e:
+                raise _malformed(str(e))
+            if decoded_end != end:
+                raise _malformed(f"unexpected data at character {decoded_end}.")
+            yield element
+            position = end
+            expecting = "separator"
+
+        if eof:
+            raise _malformed("the stream ended before the array was complete.")
+
+
+async def stream_chain_of_custody(owner_did: str, evidence_hash: str,
+                                  cache: ChainOfCustodyCache = chain_cache,
+                                  url_coc: str = URL_COC,
+                                  max_cached_links: int = MAX_CACHED_LINKS):
+    """
+    Yields the links of a chain of custody as they arrive from the gateway.
+
+    A cached chain is revalidated with its ETag and replayed on 304. A streamed
+    chain is cached only if it was read completely and has at most
+    `max_cached_links` links.
+    Raises ChainOfCustodyError if the gateway does not answer 200/304.
+    """
+    data = {
+        "owner_did": owner_did,
+        "evidence_hash": evidence_hash,
+    }
+    request_headers = dict(headers)
+    cached = cache.get(evidence_hash, CHAIN_OF_CUSTODY)
+    if cached:
+        request_headers["If-None-Match"] = cached[0]
+
+    async with client_session() as session:
+        async with session.post(f"{url_coc}/{CHAIN_OF_CUSTODY}", headers=request_headers, json=data) as response:
+            if response.status == 304 and cached:
+                for link in cached[1]:
+                    yield link
+                return
+            if response.status != 200:
+                if response.status == 404:
+                    cache.invalidate(evidence_hash)
+                raise ChainOfCustodyError(response.status, await response.text())
+
+            etag = response.headers.get("ETag")
+            links = []
+            async for link in iter_json_array(response.content):
+                if links is not None:
+                    links.append(link)
+                    if len(links) > max_cached_links:
+                        links = None
+                yield link
+            if etag and links is not None:
+                cache.put(evidence_hash, CHAIN_OF_CUSTODY, etag, links)
+
+
+def render_link(index: int, link: dict, summary_only: bool = False) -> None:
+    """
+    Prints one link of the chain of custody, either in full or as a single line.
+    """
+    record = link.get('databaseRecord') or {}
+    ledger = link.get('ledgerData') or {}
+    if summary_only:
+        print(f"Elo {index + 1:>5} | seq {record.get('sequence')} | {record.get('status')} | "
+              f"{record.get('credentialId')} | owner {record.get('ownerDid')} | {ledger.get('timestamp')}")
+        return
+    print(f"\n------------------ Elo {index + 1} ------------------")
+    print("\n[+] Registro do Banco de Dados:")
+    print(json.dumps(record, indent=2))
+    print("\n[+] Dados do Ledger (Blockchain):")
+    print(json.dumps(ledger, indent=2))
+
+
+async def render_chain_of_custody(owner_did: str, evidence_hash: str,
+                                  summary_only: bool = False, page_size: int | None = None,
+                                  url_coc: str = URL_COC) -> int:
+    """
+    Streams and prints a chain of custody link by link. With `page_size`, asks
+    the user to continue after each page. Returns the number of links shown.
+    """
+    shown = 0
+    print("\n--- INÍCIO DA CADEIA DE CUSTÓDIA ---")
+    chain = stream_chain_of_custody(owner_did, evidence_hash, url_coc=url_coc)
+    try:
+        async for link in chain:
+            render_link(shown, link, summary_only)
+            shown += 1
+            if page_size and shown % page_size == 0:
+                if input("Enter para continuar, 'q' para parar: ").strip().lower() == 'q':
+                    print(f"\n------------------ INTERROMPIDO APÓS {shown} ELOS ------------------\n")
+                    return shown
+    finally:
+        await chain.aclose()
+    print(f"\n------------------ FIM DA CADEIA ({shown} elos) ------------------\n")
+    return shown
@@ -0,0 +1,204 @@
+import asyncio
+import base64
+import binascii
+import json
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+CREDENTIAL_RECEIVED = "CredentialReceived"
+EVIDENCE_HASH_RESTRICTION = "attr::evidence_hash::value"
+
+
+@dataclass(frozen=True)
+class CredentialRequirement:
+    """
+    What an AnonCreds presentation request asks of the holder's credential.
+    None means the request does not restrict that field.
+    """
+    cred_def_id: str | None
+    evidence_hash: str | None
+    min_level: int
+    requested_attributes: tuple[str, ...]
+    requested_predicates: tuple[str, ...]
+
+
+def _decode_credential(encoded: str) -> dict | None:
+    """
+    Returns the AnonCreds credential carried (base64 JSON) in a credential record, or None.
+    """
+    padded = encoded + "=" * (-len(encoded) % 4)
+    for decode in (base64.b64decode, base64.urlsafe_b64decode):
+        try:
+            return json.loads(decode(padded))
+        except (binascii.Error, ValueError):
+            continue
+    return None
+
+
+def parse_presentation_request(request: dict) -> CredentialRequirement:
+    """
+    Reads the credential definition, evidence_hash and minimum authorization_level
+    out of the restrictions and predicates of an AnonCreds presentation request.
+    """
+    attributes = request.get("requested_attributes") or {}
+    predicates = request.get("requested_predicates") or {}
+    cred_def_id = evidence_hash = None
+    min_level = 0
+    for referent in (*attributes.values(), *predicates.values()):
+        for restriction in referent.get("restrictions") or []:
+            cred_def_id = cred_def_id or restriction.get("cred_def_id")
+            evidence_hash = evidence_hash or restriction.get(EVIDENCE_HASH_RESTRICTION)
+    for predicate in predicates.values():
+        if predicate.get("name") == "authorization_level" and predicate.get("p_type") == ">=":
+            min_level = max(min_level, int(predicate["p_value"]))
+    return CredentialRequirement(cred_def_id, evidence_hash, min_level,
+                                 tuple(attributes), tuple(predicates))
+
+
+class CredentialIndex:
+    """
+    Holder-side index of received AnonCreds credentials, so each presentation
+    request is answered with a credential that satisfies it without walking
+    every record of the wallet.
+
+    Credentials are kept per credential definition and per (credential
+    definition, evidence_hash), each list sorted by authorization_level, so a
+    lookup is a dictionary access plus a bisect. The lowest level meeting the
+    predicate is chosen. The index fills lazily from the agent: a miss fetches
+    only records it has not indexed yet, and concurrent misses share one fetch.
+    Revoked credentials (by issuance thread) are dropped and never indexed
+    again; a credential the agent refuses is only skipped by the request that tried it.
+    """
+    def __init__(self, fetch_records: Callable[[], Awaitable[list[dict]]]):
+        self._fetch_records = fetch_records
+        # key -> [(authorization_level, record_id)], sorted. Keys: cred_def_id,
+        # (cred_def_id, evidence_hash), and the same with None for "any definition".
+        self._entries: dict[object, list[tuple[int, str]]] = {}
+        # record_id -> (cred_def_id, evidence_hash, authorization_level, thid)
+        self._records: dict[str, tuple[str, str, int, str | None]] = {}
+        # Revoked credentials, by issuance thread, and records never to be indexed again.
+        self._revoked_thids: set[str] = set()
+        self._excluded: set[str] = set()
+        # Fetch in flight, shared by every miss that arrives while it runs.
+        self._refreshing: asyncio.Future | None = None
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @staticmethod
+    def _keys(cred_def_id: str, evidence_hash: str) -> tuple:
+        return cred_def_id, (cred_def_id, evidence_hash), None, (None, evidence_hash)
+
+    def add(self, record_id: str, cred_def_id: str, evidence_hash: str, level: int,
+            thid: str | None = None) -> None:
+        if record_id in self._records or record_id in self._excluded:
+            return
+        if thid is not None and thid in self._revoked_thids:
+            self._excluded.add(record_id)
+            return
+        self._records[record_id] = (cred_def_id, evidence_hash, level, thid)
+        for key in self._keys(cred_def_id, evidence_hash):
+            insort(self._entries.setdefault(key, []), (level, record_id))
+
+    def remove(self, record_id: str) -> bool:
+        """
+        Drops a credential (e.g. revoked); later refreshes do not index it again.
+        Returns False if it was not indexed.
+        """
+        self._excluded.add(record_id)
+        entry = self._records.pop(record_id, None)
+        if entry is None:
+            return False
+        cred_def_id, evidence_hash, level, _ = entry
+        for key in self._keys(cred_def_id, evidence_hash):
+            candidates = self._entries[key]
+            position = bisect_left(candidates, (level, record_id))
+            if position < len(candidates) and candidates[position] == (level, record_id):
+                del candidates[position]
+        return True
+
+    def revoke(self, thids) -> int:
+        """
+        Drops the credentials issued in the given threads (thid), indexed or not yet.
+        Returns the number of indexed credentials removed.
+        """
+        new_thids = set(thids) - self._revoked_thids
+        if not new_thids:
+            return 0
+        self._revoked_thids |= new_thids
+        revoked = [record_id for record_id, (*_, thid) in self._records.items() if thid in new_thids]
+        for record_id in revoked:
+            self.remove(record_id)
+        return len(revoked)
+
+    def add_record(self, record: dict) -> bool:
+        """
+        Indexes a credential record of the agent. Returns False if it holds no usable AnonCreds credential yet.
+        """
+        if record.get("protocolState") != CREDENTIAL_RECEIVED or not record.get("credential"):
+            return False
+        credential = _decode_credential(record["credential"])
+        if not credential:
+            return False
+        values = credential.get("values") or {}
+        try:
+            level = int(values["authorization_level"]["raw"])
+            evidence_hash = values["evidence_hash"]["raw"]
+        except (KeyError, TypeError, ValueError):
+            return False
+        self.add(record["recordId"], credential.get("cred_def_id"), evidence_hash, level, record.get("thid"))
+        return True
+
+    def lookup(self, requirement: CredentialRequirement, skip=frozenset()) -> str | None:
+        """
+        Returns the record id of an indexed credential satisfying `requirement`
+        and not in `skip`, or None.
+        """
+        if requirement.evidence_hash is None:
+            key = requirement.cred_def_id
+        else:
+            key = (requirement.cred_def_id, requirement.evidence_hash)
+        candidates = self._entries.get(key)
+        if not candidates:
+            return None
+        position = bisect_left(candidates, (requirement.min_level, ""))
+        return next((record_id for _, record_id in candidates[position:] if record_id not in skip), None)
+
+    async def _refresh(self) -> None:
+        for record in await self._fetch_records():
+            if record.get("recordId") not in self._records:
+                self.add_record(record)
+
+    async def refresh(self) -> None:
+        """
+        Indexes the agent's credential records not seen yet. Joins the fetch
+        already in flight, if any, instead of starting another one.
+        """
+        if self._refreshing is None:
+            self._refreshing = asyncio.ensure_future(self._refresh())
+
+            def done(future):
+                self._refreshing = None
+                if not future.cancelled():
+                    future.exception()  # Retrieved here, raised to the awaiting callers.
+            self._refreshing.add_done_callback(done)
+        # Shielded: a cancelled caller must not cancel the fetch of the others.
+        await asyncio.shield(self._refreshing)
+
+    async def select(self, requirement: CredentialRequirement, skip=frozenset()) -> str | None:
+        """
+        Returns the record id of a credential satisfying `requirement` and not
+        in `skip`, refreshing from the agent if none is indexed yet.
+        """
+        record_id = self.lookup(requirement, skip)
+        if record_id is None:
+            # A fetch already in flight started before this miss and may predate the
+            # credential: after it, fetch once more.
+            joined_in_flight = self._refreshing is not None
+            await self.refresh()
+            record_id = self.lookup(requirement, skip)
+            if record_id is None and joined_in_flight:
+                await self.refresh()
+                record_id = self.lookup(requirement, skip)
+        return record_id
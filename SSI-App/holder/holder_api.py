@@ -1,11 +1,22 @@
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse
 from holder_controller import *
 import asyncio
+from fast_json import FastJSONResponse
+from http_compression import CompressionMiddleware
+from profiling import ProfilingMiddleware
+from tracing import TracingMiddleware
 
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
+app.add_middleware(CompressionMiddleware)
+# Outermost, so profiles include compression. Opt-in: SSI_PROFILE=header|sample.
+app.add_middleware(ProfilingMiddleware, service="holder_api")
+# Opt-in: SSI_TRACING=1.
+app.add_middleware(TracingMiddleware, service="holder_api")
 
-credential_offer_thid = ""
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
 
 @app.post("/receive_oob_invitation")
 async def receive_invitation(request: Request):
@@ -23,7 +34,7 @@ async def receive_invitation(request: Request):
         
         print(response_data)
         
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=200,
             content={"status": "success", "connection_details": response_data}
         )
@@ -39,25 +50,22 @@ async def receive_credential_offer(request: Request):
     """
     Receives an credential_offer and tries to accept it.
     """
-
-    global credential_offer_thid
-
     try:
         payload = await request.json()
-        credential_offer_thid = payload.get("thid")
+        thid = payload.get("thid")
 
-        if not credential_offer_thid:
+        if not thid:
             raise HTTPException(status_code=400, detail="'thid' key is required in the payload.")
 
         # Would be better to just user an webhook handler for holder 
         # instead of the sleep. But for the purposes of a proof of concept thats okay.
         await asyncio.sleep(5)
         # Call holder_controller 'accept_offer()'
-        print(f'CREDENTIAL THID: {credential_offer_thid}')
-        response_data = await accept_credential_offer(credential_offer_thid)
+        print(f'CREDENTIAL THID: {thid}')
+        response_data = await accept_credential_offer(thid)
         print(response_data)
         
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=200,
             content={"status": "success", "connection_details": response_data}
         )
@@ -71,7 +79,10 @@ async def receive_credential_offer(request: Request):
 @app.post("/receive_presentation_request")
 async def receive_presentation_request(request: Request):
     """
-    ...
+    Answers a presentation request with a credential that satisfies it, picked from the
+    holder's credential index. The verifier may add cred_def_id, evidence_hash and
+    level_required as hints, used if the agent does not expose the request itself.
+    Answers 409 if the holder has no such credential.
     """
     try:
         payload = await request.json()
@@ -82,16 +93,19 @@ async def receive_presentation_request(request: Request):
 
         # Would be better to just user an webhook handler for holder 
         await asyncio.sleep(5)
-        response_data = await accept_presentation_request(presentation_thid, credential_offer_thid)
+        hints = {key: payload.get(key) for key in ("cred_def_id", "evidence_hash", "level_required")}
+        response_data = await accept_presentation_request(presentation_thid, hints)
         print(response_data)
         
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=200,
             content={"status": "success", "connection_details": response_data}
         )
 
     except HTTPException as http_exc:
         raise http_exc
+    except NoMatchingCredentialError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An internal server error occurred: {e}")
 
@@ -1,7 +1,14 @@
 import aiohttp
 import json
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+from fast_json import client_session, loads
+from http_cache import get_json
+from credential_index import CredentialIndex, CredentialRequirement, parse_presentation_request
 
 HOLDER_AGENT_URL = "http://localhost:8083/cloud-agent"
+URL_DB = "http://localhost:49152"
 headers = {
     "Content-Type": "application/json",
     "Accept": "application/json"
@@ -25,7 +32,7 @@ async def create_did(id: str = "auth-1", purpose: str = "authentication", curve:
         }
     }
     
-    async with aiohttp.ClientSession() as session:
+    async with client_session() as session:
         async with session.post(url, headers=headers, json=data) as response:
             response.raise_for_status()
             result = await response.json()
@@ -38,7 +45,7 @@ async def publish_did(long_form_did: str) -> str:
     """
     url = f"{HOLDER_AGENT_URL}/did-registrar/dids/{long_form_did}/publications"
     
-    async with aiohttp.ClientSession() as session:
+    async with client_session() as session:
         async with session.post(url, headers=headers) as response:
             response.raise_for_status()
             result = await response.json()
@@ -54,20 +61,46 @@ async def accept_connection(raw_invitation: str):
         "invitation": raw_invitation
     }
 
-    async with aiohttp.ClientSession() as session:
+    async with client_session() as session:
         async with session.post(url, headers=headers, json=data) as response:
             return await response.json() # Or another appropriate return value
 
 
 # Credential
+CREDENTIAL_RECORDS_PAGE_SIZE = 100
+
 async def get_credential_records() -> list[dict["str", any]]:
     url = f"{HOLDER_AGENT_URL}/issue-credentials/records"
+    records = []
+
+    async with client_session() as session:
+        while True:
+            params = {"offset": len(records), "limit": CREDENTIAL_RECORDS_PAGE_SIZE}
+            async with session.get(url, headers=headers, params=params) as response:
+                response.raise_for_status()
+                page = (await response.json(loads=loads))["contents"]
+            records.extend(page)
+            if len(page) < CREDENTIAL_RECORDS_PAGE_SIZE:
+                return records
+
+# Received credentials by definition, evidence_hash and authorization_level; fills lazily.
+credential_index = CredentialIndex(get_credential_records)
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=headers) as response:
-            response.raise_for_status()
-            response_data = await response.json()
-            return response_data["contents"]
+
+async def sync_revoked_credentials() -> None:
+    """
+    Drops from the index the credentials the issuer revoked. The list is
+    revalidated with its ETag, so it is only downloaded again when it changed.
+    """
+    try:
+        status, body = await get_json(f"{URL_DB}/revoked-credentials")
+    except aiohttp.ClientError as e:
+        print(f"Could not read the revoked credentials: {e}")
+        return
+    if status == 200:
+        credential_index.revoke(body["revoked_credentials"])
+    else:
+        print(f"Could not read the revoked credentials: status {status}")
 
 async def accept_credential_offer(thid: str):
     record_id=""
@@ -78,71 +111,103 @@ async def accept_credential_offer(thid: str):
             break
     
     url = f"{HOLDER_AGENT_URL}/issue-credentials/records/{record_id}/accept-offer"
-    async with aiohttp.ClientSession() as session:
+    async with client_session() as session:
         async with session.post(url, headers=headers, json={}) as response:
             result = await response.json()
             return result
 
 
 # --- PRESENTATION
-async def retrieve_presentation_requests() -> list:
+# Referents of the verifier's request, used when only its hints are known.
+DEFAULT_REQUESTED_ATTRIBUTES = ("expert_name_proof", "evidence_hash_proof", "subject_did_proof")
+DEFAULT_REQUESTED_PREDICATES = ("auth_level_proof",)
+# Credentials tried for one request when the agent refuses the previous ones.
+MAX_CREDENTIAL_ATTEMPTS = 3
+# How the agent refuses the chosen credential. The same statuses also report problems of the
+# presentation itself, so a refused credential is only skipped for the current request.
+CREDENTIAL_REFUSED_STATUSES = {400, 404, 422}
+
+
+class NoMatchingCredentialError(LookupError):
+    pass
+
+
+async def retrieve_presentation_requests(thid: str | None = None) -> list:
     url = f"{HOLDER_AGENT_URL}/present-proof/presentations/"
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=headers) as response:
+    params = {"thid": thid} if thid else None
+    async with client_session() as session:
+        async with session.get(url, headers=headers, params=params) as response:
             response.raise_for_status()
-            result = await response.json()
+            result = await response.json(loads=loads)
             return result["contents"]
-        
-async def accept_presentation_request(presentationthid: str, credential_offer_thid: str):
+
+
+def _presentation_requirement(presentation_request: dict, hints: dict | None) -> CredentialRequirement | None:
+    """
+    Reads what the request asks for from the AnonCreds request stored with it,
+    or from the hints (cred_def_id, evidence_hash, level_required) sent by the verifier.
+    """
+    for data in presentation_request.get("requestData") or []:
+        try:
+            request = json.loads(data) if isinstance(data, str) else data
+        except ValueError:
+            continue
+        if isinstance(request, dict) and "requested_predicates" in request:
+            return parse_presentation_request(request)
+    if hints and hints.get("level_required") is not None:
+        return CredentialRequirement(hints.get("cred_def_id"), hints.get("evidence_hash"),
+                                     int(hints["level_required"]), DEFAULT_REQUESTED_ATTRIBUTES,
+                                     DEFAULT_REQUESTED_PREDICATES)
+    return None
+
+
+async def accept_presentation_request(presentationthid: str, hints: dict | None = None):
+    """
+    Answers the presentation request of thread `presentationthid` with a
+    credential that satisfies its restrictions and predicate.
+    Raises NoMatchingCredentialError if the holder has none.
+    """
     # This searches wouldnt be necessary if I use a webhook for the holder as well
-    presentation_requests = await retrieve_presentation_requests()
-    presentation_id = ""
-    for presentation_request in presentation_requests:
-        if presentation_request["thid"] == presentationthid:
-            presentation_id = presentation_request["presentationId"]
-            break 
-    
-    credential_records = await get_credential_records()
-    credential_record_id = ""
-    for credential_record in credential_records:
-        if credential_record["thid"] == credential_offer_thid:
-            credential_record_id = credential_record["recordId"]
-            break
+    presentation_requests = await retrieve_presentation_requests(presentationthid)
+    presentation_request = next((p for p in presentation_requests if p["thid"] == presentationthid), None)
+    if presentation_request is None:
+        raise LookupError(f"No presentation request with thid {presentationthid}.")
+    presentation_id = presentation_request["presentationId"]
 
-    #ToDo: change that error
-    if (presentation_id == ""):
-        print('PRESENTATION ID IS BLANK')
-        print(f"presentationid: {presentation_id} ; credentialrecordid: {credential_record_id}")
-        raise Exception
-    if (credential_record_id == ""):
-        print('CREDENTIAL RECORD ID IS BLANK')
-        print(f"presentationid: {presentation_id} ; credentialrecordid: {credential_record_id}")
-        raise Exception
-              
+    requirement = _presentation_requirement(presentation_request, hints)
+    if requirement is None:
+        raise ValueError(f"Could not read what presentation request {presentation_id} asks for.")
+    await sync_revoked_credentials()
     url = f"{HOLDER_AGENT_URL}/present-proof/presentations/{presentation_id}"
-    data = {
-        "action": "request-accept",
-        "anoncredPresentationRequest": {
-            "credentialProofs": [
-                {
-                    "credential": f"{credential_record_id}",
-                    "requestedAttribute": [
-                        "expert_name_proof",
-                        "evidence_hash_proof",
-                        "subject_did_proof"
-                    ],
-                    "requestedPredicate": [
-                        "auth_level_proof"
+    tried = set()
+    async with client_session() as session:
+        for _ in range(MAX_CREDENTIAL_ATTEMPTS):
+            credential_record_id = await credential_index.select(requirement, tried)
+            if credential_record_id is None:
+                break
+            data = {
+                "action": "request-accept",
+                "anoncredPresentationRequest": {
+                    "credentialProofs": [
+                        {
+                            "credential": f"{credential_record_id}",
+                            "requestedAttribute": list(requirement.requested_attributes),
+                            "requestedPredicate": list(requirement.requested_predicates)
+                        }
                     ]
                 }
-            ]
-        }
-    }
-
-    async with aiohttp.ClientSession() as session:
-        async with session.patch(url, headers=headers, json=data) as response:
-            response.raise_for_status()
-            result = await response.json()
-            print(json.dumps(result, indent=2))
-            return
-    
\ No newline at end of file
+            }
+            async with session.patch(url, headers=headers, json=data) as response:
+                if response.status in CREDENTIAL_REFUSED_STATUSES:
+                    # Try the next one. The credential stays indexed: only a revocation drops it for good.
+                    print(f"Credential {credential_record_id} refused by the agent: {await response.text()}")
+                    tried.add(credential_record_id)
+                    await sync_revoked_credentials()
+                    continue
+                response.raise_for_status()
+                result = await response.json()
+                print(json.dumps(result, indent=2))
+                return
+    raise NoMatchingCredentialError(
+        f"No credential of definition {requirement.cred_def_id} for evidence "
+        f"{requirement.evidence_hash or '(any)'} with authorization_level >= {requirement.min_level}.")
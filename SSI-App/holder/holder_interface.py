@@ -1,6 +1,32 @@
 from holder_controller import *
+from bulk_operations import ingest_evidence_file, audit_evidence_hashes, DEFAULT_CONCURRENCY
+from chain_cache import (verify_chain_of_custody, update_evidence, transfer_ownership,
+                         get_current_evidence_record, evidence_record_delta, update_evidence_delta,
+                         EVIDENCE_RECORD_KEYS)
+from chain_stream import render_chain_of_custody, ChainOfCustodyError
 import asyncio
 import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+from evidence_hashing import ask_evidence_hash
+from http_cache import get_json
+from fast_json import client_session
+from evidence_manifest import verify_evidence, print_report, FAST, PARANOID
+
+def ask_concurrency(question: str) -> int:
+    """
+    Asks how many requests to run at once until the answer is a positive integer;
+    enter keeps DEFAULT_CONCURRENCY.
+    """
+    while True:
+        answer = input(f'{question} (enter para {DEFAULT_CONCURRENCY})? ').strip()
+        if not answer:
+            return DEFAULT_CONCURRENCY
+        if answer.isdigit() and int(answer) > 0:
+            return int(answer)
+        print("Digite um número inteiro maior que zero.")
 
 async def main():
     URL_DB = 'http://localhost:49152'
@@ -13,17 +39,15 @@ async def main():
     while True:
         name = input("(LogIn) Digite seu nome completo:\n")  
         url = f"{URL_DB}/identities/{name}"
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    identity_data = await response.json()
-                    didRef = identity_data["current_did"]
-                    print("Seu DID atual:", didRef)
-                elif response.status == 404:
-                    print(f"Atenção! Nome não registrado no banco de dados.")
-                    print("Crie um DID!")
-                else:
-                    print(f"An error occurred. Status: {response.status}")
+        status, identity_data = await get_json(url)
+        if status == 200:
+            didRef = identity_data["current_did"]
+            print("Seu DID atual:", didRef)
+        elif status == 404:
+            print(f"Atenção! Nome não registrado no banco de dados.")
+            print("Crie um DID!")
+        else:
+            print(f"An error occurred. Status: {status}")
 
 
         
@@ -39,7 +63,7 @@ async def main():
 
             print(f'DID criado: {didRef}')
             url = f"{URL_DB}/identities"
-            async with aiohttp.ClientSession() as session:
+            async with client_session() as session:
                 async with session.post(url, headers=headers, json={"name":name, "did":didRef}) as response:
                     if response.status == 201:
                         await response.json()
@@ -58,11 +82,14 @@ async def main():
                     \t3. Consulta metadados Cadeia de Custódia
                     \t4. Verificar Cadeia de Custódia e obter payloads
                     \t5. Mudar owner Cadeia de Custódia
+                    \t6. Criar Evidências em lote (arquivo JSONL)
+                    \t7. Verificar integridade da evidência em disco
+                    \t8. Auditar Cadeias de Custódia em lote (arquivo de hashes)
                     \t0. Sair\n""") 
             if user_input == '1': 
                 tags_input = input('Digite tags (separadas por vírgula) se desejar, ou aperte enter: ')
                 tags = [tag.strip() for tag in tags_input.split(',')] if tags_input else []
-                evidence_hash = input('Digite o hash da evidência: ')
+                evidence_hash = ask_evidence_hash('Digite o hash da evidência ou o caminho do arquivo: ', create=True)
                 print("Responda...")
                 what = input("What? ")
                 who = input("Who? ")
@@ -88,7 +115,7 @@ async def main():
                 }
 
                 url = f"{URL_COC}/create-evidence"
-                async with aiohttp.ClientSession() as session:
+                async with client_session() as session:
                     async with session.post(url, headers=headers, json=data) as response:
                         if response.status == 201:
                             response_data = await response.json()
@@ -100,7 +127,31 @@ async def main():
             elif user_input == '2':
                 tags_input = input('Digite tags (separadas por vírgula) se desejar, ou aperte enter: ')
                 tags = [tag.strip() for tag in tags_input.split(',')] if tags_input else []
-                evidence_hash = input('Digite o hash da evidência: ')
+                evidence_hash = ask_evidence_hash('Digite o hash da evidência ou o caminho do arquivo: ')
+                partial = input('Enviar apenas os campos alterados? (S/n) ').strip().lower() != 'n'
+                if partial:
+                    status, response_data = await get_current_evidence_record(didRef, evidence_hash, url_coc=URL_COC)
+                    if status != 200:
+                        print(f"Error happened: {response_data}")
+                        continue
+                    current_record, base_credential_id = response_data
+                    print("Responda (enter mantém o valor atual)...")
+                    new_evidence_record = {key: input(f"{key.capitalize()}? [{current_record.get(key, '')}] ").strip()
+                                           for key in EVIDENCE_RECORD_KEYS}
+                    delta = evidence_record_delta(current_record, new_evidence_record)
+                    if not delta and not tags:
+                        print("Nada foi alterado.")
+                        continue
+                    status, response_data = await update_evidence_delta(didRef, evidence_hash, base_credential_id,
+                                                                        delta, tags, url_coc=URL_COC)
+                    if status == 200:
+                        print(f"UpdateEvidence response: {response_data}")
+                    elif status == 409:
+                        print("A evidência foi atualizada desde a consulta. Repita a operação.")
+                    else:
+                        print(f"Error happened: {response_data}")
+                    continue
+
                 print("Responda...")
                 what = input("What? ")
                 who = input("Who? ")
@@ -125,69 +176,47 @@ async def main():
                     "tags": tags
                 }
 
-                url = f"{URL_COC}/update-evidence"
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(url, headers=headers, json=data) as response:
-                        if response.status == 200:
-                            response_data = await response.json()
-                            print(f"UpdateEvidence response: {response_data}")
-                        else:
-                            error_text = await response.text()
-                            print(f"Error happened: {error_text}")
+                status, response_data = await update_evidence(data, url_coc=URL_COC)
+                if status == 200:
+                    print(f"UpdateEvidence response: {response_data}")
+                else:
+                    print(f"Error happened: {response_data}")
 
 
 
             elif user_input == '3': 
-                evidence_hash = input('Digite o hash da evidência: ')
-                data = {
-                    "owner_did" : didRef,
-                    "evidence_hash" : evidence_hash,
-                }
-                url = f"{URL_COC}/chain-of-custody"
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(url, headers=headers, json=data) as response:
-                        if response.status == 200:
-                            response_data = await response.json()
-                            
-                            print(f"Chain of Custody Metadata: ")
-                            print("\n--- INÍCIO DA CADEIA DE CUSTÓDIA ---")
-                            for index, link in enumerate(response_data):
-                                print(f"\n------------------ Elo {index + 1} ------------------")
-                                print("\n[+] Registro do Banco de Dados:")
-                                print(json.dumps(link.get('databaseRecord', {}), indent=2))
-                                print("\n[+] Dados do Ledger (Blockchain):")
-                                print(json.dumps(link.get('ledgerData', {}), indent=2))
-                            print("\n------------------ FIM DA CADEIA ------------------\n")
-                        else:
-                            error_text = await response.text()
-                            print(f"Error happened: {error_text}")
+                evidence_hash = ask_evidence_hash('Digite o hash da evidência ou o caminho do arquivo: ')
+                summary_only = input('Exibir apenas o resumo de cada elo? (s/N) ').strip().lower() == 's'
+                page_size = input('Quantos elos por página (enter para exibir todos)? ').strip()
+                print(f"Chain of Custody Metadata: ")
+                try:
+                    await render_chain_of_custody(
+                        didRef, evidence_hash, summary_only=summary_only,
+                        page_size=int(page_size) if page_size.isdigit() else None,
+                        url_coc=URL_COC
+                    )
+                except ChainOfCustodyError as e:
+                    print(f"Error happened: {e.detail}")
+                except ValueError as e:
+                    print(f"Error happened: {e}")
 
 
 
 
             elif user_input == '4':
-                evidence_hash = input('Digite o hash da evidência: ')
-                data = {
-                    "owner_did" : didRef,
-                    "evidence_hash" : evidence_hash,
-                }
-                url = f"{URL_COC}/verify-chain-of-custody"
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(url, headers=headers, json=data) as response:
-                        if response.status == 200:
-                            response_data = await response.json()
-                            
-                            print(f"Chain of Custody Payloads: ")
-                            print(f"----- INÍCIO PAYLOADS -----")
-                            print(json.dumps(response_data, indent=2))
-                            print(f"----- FIM PAYLOADS -----")
-                        else:
-                            error_text = await response.text()
-                            print(f"Error happened: {error_text}")
+                evidence_hash = ask_evidence_hash('Digite o hash da evidência ou o caminho do arquivo: ')
+                status, response_data = await verify_chain_of_custody(didRef, evidence_hash, url_coc=URL_COC)
+                if status == 200:
+                    print(f"Chain of Custody Payloads: ")
+                    print(f"----- INÍCIO PAYLOADS -----")
+                    print(json.dumps(response_data, indent=2))
+                    print(f"----- FIM PAYLOADS -----")
+                else:
+                    print(f"Error happened: {response_data}")
 
 
             elif user_input == '5':
-                evidence_hash = input('Digite o hash da evidência: ')
+                evidence_hash = ask_evidence_hash('Digite o hash da evidência ou o caminho do arquivo: ')
                 new_owner_did = input("Digite o did do novo 'dono' da evidência: ")
                 data = {
                     "evidence_hash" : evidence_hash,
@@ -195,16 +224,48 @@ async def main():
                     "new_owner_did": new_owner_did
                 }
 
-                url = f"{URL_COC}/transfer-ownership"
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(url, headers=headers, json=data) as response:
-                        if response.status == 200:
-                            response_data = await response.json()
-                            
-                            print(f"Transfer Ownership response: {response_data}")
-                        else:
-                            error_text = await response.text()
-                            print(f"Error happened: {error_text}")
+                status, response_data = await transfer_ownership(data, url_coc=URL_COC)
+                if status == 200:
+                    print(f"Transfer Ownership response: {response_data}")
+                else:
+                    print(f"Error happened: {response_data}")
+
+            elif user_input == '6':
+                print('Cada linha do arquivo deve conter: '
+                      '{"evidence_hash": ..., "evidence_record": {"what": ..., ..., "how": ...}, "tags": [...]}')
+                jsonl_path = input('Digite o caminho do arquivo JSONL: ').strip()
+                if not os.path.isfile(jsonl_path):
+                    print(f"Arquivo não encontrado: {jsonl_path}")
+                    continue
+                concurrency = ask_concurrency('Quantas requisições simultâneas')
+                summary = await ingest_evidence_file(jsonl_path, didRef, concurrency=concurrency)
+                print(f"Ingestão concluída: {summary}")
+                print(f"Para retomar uma ingestão interrompida, basta repetir a operação com o mesmo arquivo.")
+
+            elif user_input == '7':
+                evidence_path = input('Digite o caminho do arquivo ou diretório da evidência: ').strip()
+                if not os.path.exists(evidence_path):
+                    print(f"Caminho não encontrado: {evidence_path}")
+                    continue
+                expected_hash = input('Digite o hash registrado na cadeia de custódia (enter para usar o do manifesto): ').strip()
+                paranoid = input('Recalcular o hash de todos os arquivos (modo paranoico)? (s/N) ').strip().lower() == 's'
+                try:
+                    report = verify_evidence(evidence_path, expected_hash or None, PARANOID if paranoid else FAST)
+                except (ValueError, FileNotFoundError) as e:
+                    print(f"Error happened: {e}")
+                    continue
+                print_report(report)
+
+            elif user_input == '8':
+                hashes_path = input('Digite o caminho do arquivo com um hash de evidência por linha: ').strip()
+                if not os.path.isfile(hashes_path):
+                    print(f"Arquivo não encontrado: {hashes_path}")
+                    continue
+                report_path = input('Relatório a retomar (enter para um novo): ').strip() or None
+                concurrency = ask_concurrency('Quantas verificações simultâneas')
+                summary = await audit_evidence_hashes(hashes_path, didRef, report_path, concurrency=concurrency)
+                print(f"Auditoria concluída: {summary}")
+                print(f"Veredito de cada evidência em {summary['report']}.")
             else:
                 break
 
@@ -0,0 +1,136 @@
+import asyncio
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+import aiohttp
+
+from local_database import get_agent_affinity, set_agent_affinity
+
+# Consecutive failures (connection errors, timeouts, 5xx) before an agent is ejected.
+MAX_FAILURES = 3
+EJECTION_SECONDS = 30
+MAX_EJECTION_SECONDS = 300
+
+
+@dataclass
+class AgentState:
+    outstanding: int = 0
+    failures: int = 0
+    ejections: int = 0
+    ejected_until: float = 0.0
+
+
+class AgentPool:
+    """
+    Spreads requests over several Cloud Agent instances.
+
+    New work goes to the healthy agent with the fewest outstanding requests
+    (in this process). Agents failing MAX_FAILURES times in a row are ejected
+    for a while, longer each time; after that one request is let through to
+    probe them. Anything with DIDComm or wallet state (a DID, a connection, a
+    presentation, a credential record) is pinned to the agent that created
+    it, in the local database, so every process routes later requests about
+    it to the same agent, ejected or not.
+    """
+    def __init__(self, name: str, urls: list[str], max_failures: int = MAX_FAILURES,
+                 ejection_seconds: float = EJECTION_SECONDS):
+        if not urls:
+            raise ValueError(f"Agent pool '{name}' needs at least one URL.")
+        self.name = name
+        self._agents = {url.rstrip("/"): AgentState() for url in urls}
+        self._max_failures = max_failures
+        self._ejection_seconds = ejection_seconds
+        self._rotation = itertools.count()
+
+    @classmethod
+    def from_env(cls, variable: str, default_urls: list[str]) -> "AgentPool":
+        """
+        Reads a comma-separated list of agent URLs from `variable`.
+        """
+        configured = [url.strip() for url in os.environ.get(variable, "").split(",") if url.strip()]
+        return cls(variable.lower(), configured or default_urls)
+
+    @property
+    def urls(self) -> list[str]:
+        return list(self._agents)
+
+    def _least_outstanding(self) -> str:
+        now = time.monotonic()
+        healthy = [url for url, state in self._agents.items() if state.ejected_until <= now]
+        if not healthy:
+            # Every agent is ejected: try the one whose ejection ends first rather than failing outright.
+            return min(self._agents, key=lambda url: self._agents[url].ejected_until)
+        fewest = min(self._agents[url].outstanding for url in healthy)
+        candidates = [url for url in healthy if self._agents[url].outstanding == fewest]
+        # Rotate among ties so an idle pool still spreads the load.
+        return candidates[next(self._rotation) % len(candidates)]
+
+    async def choose(self, *affinity_keys: str | None) -> str:
+        """
+        Returns the agent pinned to the first known key, or the least loaded healthy one.
+        """
+        if len(self._agents) == 1:
+            return next(iter(self._agents))
+        for key in affinity_keys:
+            if not key:
+                continue
+            url = await get_agent_affinity(key)
+            if url in self._agents:
+                return url
+        return self._least_outstanding()
+
+    async def bind(self, key: str, url: str) -> None:
+        """
+        Pins `key` to `url`, so later requests about it reach the agent holding its state.
+        """
+        await set_agent_affinity(key, url)
+
+    def _record_success(self, url: str) -> None:
+        state = self._agents[url]
+        state.failures = 0
+        state.ejections = 0
+        state.ejected_until = 0.0
+
+    def _record_failure(self, url: str) -> None:
+        state = self._agents[url]
+        state.failures += 1
+        if state.failures >= self._max_failures:
+            duration = min(MAX_EJECTION_SECONDS, self._ejection_seconds * 2 ** state.ejections)
+            state.ejections += 1
+            state.failures = 0
+            state.ejected_until = time.monotonic() + duration
+            print(f"[{self.name}] agente {url} removido do pool por {duration:.0f}s")
+
+    @asynccontextmanager
+    async def lease(self, *affinity_keys: str | None):
+        """
+        Yields the base URL of the agent to use and accounts for the request:
+        outstanding count while it runs, success or failure when it ends.
+        """
+        url = await self.choose(*affinity_keys)
+        state = self._agents[url]
+        state.outstanding += 1
+        try:
+            yield url
+        except aiohttp.ClientResponseError as e:
+            if e.status >= 500:
+                self._record_failure(url)
+            else:
+                self._record_success(url)
+            raise
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            self._record_failure(url)
+            raise
+        else:
+            self._record_success(url)
+        finally:
+            state.outstanding -= 1
+
+    def status(self) -> list[dict]:
+        now = time.monotonic()
+        return [{"url": url, "outstanding": state.outstanding, "failures": state.failures,
+                 "ejected_for_seconds": round(max(0.0, state.ejected_until - now), 1)}
+                for url, state in self._agents.items()]
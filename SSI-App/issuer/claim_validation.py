@@ -0,0 +1,122 @@
+import os
+import re
+import sys
+from dataclasses import asdict, fields
+from typing import Callable
+
+from anoncreds_schema import anoncreds_schema
+from credential_data import CredentialData
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+from evidence_hashing import EVIDENCE_HASH_PATTERN
+
+# 0: Restricted read only, 1: Read-Only, 2: Read and Write, 99: ADMIN
+ALLOWED_AUTHORIZATION_LEVELS = frozenset({0, 1, 2, 99})
+DID_PATTERN = re.compile(r"did:[a-z0-9]+:\S+")
+MAX_CLAIM_LENGTH = 1024
+
+
+class ClaimValidationError(ValueError):
+    """
+    Raised when credential claims are not acceptable; `errors` maps each bad claim to the reason.
+    """
+    def __init__(self, errors: dict[str, str]):
+        super().__init__("; ".join(f"{name}: {reason}" for name, reason in errors.items()))
+        self.errors = errors
+
+
+def parse_authorization_level(value) -> int:
+    """
+    Returns the level as an int. Raises ValueError if it is not one of ALLOWED_AUTHORIZATION_LEVELS.
+    """
+    try:
+        level = int(str(value).strip())
+    except ValueError:
+        raise ValueError(f"must be a number, got {value!r}")
+    if level not in ALLOWED_AUTHORIZATION_LEVELS:
+        raise ValueError(f"must be one of {sorted(ALLOWED_AUTHORIZATION_LEVELS)}, got {level}")
+    return level
+
+
+def _text(value) -> str:
+    text = str(value).strip()
+    if not text:
+        raise ValueError("must not be empty")
+    if len(text) > MAX_CLAIM_LENGTH:
+        raise ValueError(f"must have at most {MAX_CLAIM_LENGTH} characters")
+    return text
+
+
+def _matching(pattern: re.Pattern, description: str) -> Callable[[str], str]:
+    def check(value) -> str:
+        text = _text(value)
+        if not pattern.fullmatch(text):
+            raise ValueError(f"must be {description}")
+        return text
+    return check
+
+
+# Domain rules; any other schema attribute only has to be non-empty text.
+CLAIM_RULES: dict[str, Callable] = {
+    "authorization_level": lambda value: str(parse_authorization_level(value)),
+    "evidence_hash": _matching(EVIDENCE_HASH_PATTERN, "a SHA-256 or SHA-512 hex digest"),
+    "subject_did": _matching(DID_PATTERN, "a DID (did:<method>:<id>)"),
+}
+
+
+def compile_claim_validator(attr_names: list[str]) -> Callable[[dict], dict]:
+    """
+    Builds, once, a validator for claims of a schema with `attr_names`.
+    The returned function takes a claims dict and returns it normalized
+    (trimmed text, canonical authorization level), or raises ClaimValidationError.
+    """
+    checks = tuple((name, CLAIM_RULES.get(name, _text)) for name in attr_names)
+    expected = frozenset(attr_names)
+
+    def validate(claims: dict) -> dict:
+        errors = {}
+        normalized = {}
+        for name, check in checks:
+            value = claims.get(name)
+            if value is None:
+                errors[name] = "is required"
+                continue
+            try:
+                normalized[name] = check(value)
+            except ValueError as e:
+                errors[name] = str(e)
+        for name in claims.keys() - expected:
+            errors[name] = "is not an attribute of the schema"
+        if errors:
+            raise ClaimValidationError(errors)
+        return normalized
+
+    return validate
+
+
+validate_claims = compile_claim_validator(anoncreds_schema["schema"]["attrNames"])
+
+
+def validate_credential_data(credential_data: CredentialData) -> CredentialData:
+    """
+    Returns a normalized copy of `credential_data`, or raises ClaimValidationError.
+    """
+    return CredentialData(**validate_claims(asdict(credential_data)))
+
+
+def validate_batch(records: list[dict | CredentialData]) -> tuple[list[CredentialData], list[tuple[int, dict[str, str]]]]:
+    """
+    Validates many records at once. Returns the valid ones, normalized, and
+    (index, errors) for each invalid one.
+    """
+    field_names = [field.name for field in fields(CredentialData)]
+    valid, invalid = [], []
+    for index, record in enumerate(records):
+        claims = asdict(record) if isinstance(record, CredentialData) else record
+        try:
+            normalized = validate_claims(claims)
+        except ClaimValidationError as e:
+            invalid.append((index, e.errors))
+            continue
+        valid.append(CredentialData(**{name: normalized[name] for name in field_names}))
+    return valid, invalid
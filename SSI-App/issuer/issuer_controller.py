@@ -1,21 +1,61 @@
 from issuer_util import extract_raw_invitation
 from anoncreds_schema import anoncreds_schema
 from credential_data import CredentialData
+from claim_validation import validate_credential_data
+from agent_pool import AgentPool
 import aiohttp
+import asyncio
 import json
+import os
+import random
+import sys
+import uuid
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+from fast_json import client_session, dumps_str, loads
+from local_database import get_idempotent_result, save_idempotent_result
 
 ISSUER_AGENT_URL = "http://localhost:8080/cloud-agent"
+# Several agents: ISSUER_AGENT_URLS="http://host-a:8080/cloud-agent,http://host-b:8080/cloud-agent"
+issuer_agents = AgentPool.from_env("ISSUER_AGENT_URLS", [ISSUER_AGENT_URL])
+WEBHOOK_HANDLER_URL = "http://localhost:5000"
+# Issuer-side state of a connection the holder has accepted.
+CONNECTION_READY_STATE = "ConnectionResponseSent"
 headers = {
     "Content-Type": "application/json",
     "Accept": "application/json"
 }
+DEFAULT_MAX_ATTEMPTS = 3
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+async def call_idempotent(operation, *args, idempotency_key: str | None = None,
+                          max_attempts: int = DEFAULT_MAX_ATTEMPTS, base_delay: float = 1.0, **kwargs):
+    """
+    Calls `operation` (create_connection, create_credential_offer_anoncreds) with
+    `idempotency_key` (a new one per call by default), retrying timeouts, network
+    errors and RETRYABLE_STATUSES with exponential backoff under the same key, so a
+    retry never creates a duplicate.
+    Raises the last error if every attempt failed.
+    """
+    idempotency_key = idempotency_key or str(uuid.uuid4())
+    for attempt in range(1, max_attempts + 1):
+        try:
+            return await operation(*args, idempotency_key=idempotency_key, **kwargs)
+        except aiohttp.ClientResponseError as e:
+            if e.status not in RETRYABLE_STATUSES or attempt == max_attempts:
+                raise
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if attempt == max_attempts:
+                raise
+        await asyncio.sleep(base_delay * 2 ** (attempt - 1) + random.uniform(0, base_delay))
+
 
 # --- DID ---
 async def create_did(id: str = "auth-1", purpose: str = "authentication", curve: str = "secp256k1") -> str:
     """
     Returns a longFormDid which is used to publish a DID in the blockchain.
     """
-    url = f"{ISSUER_AGENT_URL}/did-registrar/dids"
     data = {
         "documentTemplate": {
             "publicKeys": [
@@ -24,45 +64,80 @@ async def create_did(id: str = "auth-1", purpose: str = "authentication", curve:
             "services": []
         }
     }
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, headers=headers, json=data) as response:
-            response.raise_for_status()
-            result = await response.json()
-            return result['longFormDid']
+    async with issuer_agents.lease() as agent_url:
+        async with client_session() as session:
+            async with session.post(f"{agent_url}/did-registrar/dids", headers=headers, json=data) as response:
+                response.raise_for_status()
+                result = await response.json()
+    # The DID keys live in that agent's wallet.
+    await issuer_agents.bind(result['longFormDid'], agent_url)
+    return result['longFormDid']
 
 async def publish_did(long_form_did: str) -> str:
     """
     Schedules an operation to publish the DID into the blockchain.
     Returns its shortened form.
     """
-    url = f"{ISSUER_AGENT_URL}/did-registrar/dids/{long_form_did}/publications"
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, headers=headers) as response:
-            response.raise_for_status()
-            result = await response.json()
-            return result['scheduledOperation']['didRef']
+    async with issuer_agents.lease(long_form_did) as agent_url:
+        url = f"{agent_url}/did-registrar/dids/{long_form_did}/publications"
+        async with client_session() as session:
+            async with session.post(url, headers=headers) as response:
+                response.raise_for_status()
+                result = await response.json()
+    did_ref = result['scheduledOperation']['didRef']
+    await issuer_agents.bind(did_ref, agent_url)
+    return did_ref
 
 
 # --- DIDCOMM CONNECTION
-async def create_connection(new_connection_label: str) -> tuple[str, str]:
+async def create_connection(new_connection_label: str, issuer_did: str | None = None,
+                            idempotency_key: str | None = None) -> tuple[str, str]:
     """
     Returns the raw invitation and the connection id in the form
     (raw_invitation, connection_id).
+    The connection is created on the agent holding `issuer_did`, if given.
+    Calls with the same `idempotency_key` (e.g. retries after a timeout) create
+    a single connection and all return it; the key never leaves this machine.
     """
-    url = f'{ISSUER_AGENT_URL}/connections'
-    data = {"label": new_connection_label}
+    if idempotency_key:
+        stored = await get_idempotent_result(idempotency_key, "create_connection")
+        if stored:
+            return tuple(loads(stored))
 
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, headers=headers, json=data) as response:
+    data = {"label": new_connection_label}
+    async with issuer_agents.lease(issuer_did) as agent_url:
+        async with client_session() as session:
+            async with session.post(f'{agent_url}/connections', headers=headers, json=data) as response:
+                response.raise_for_status()
+                result = await response.json()
+    invitation_url = result['invitation']['invitationUrl']
+    raw_invitation = extract_raw_invitation(invitation_url)
+    connection_id = result['connectionId']
+    if idempotency_key:
+        # Stored before anything else can fail; the first attempt to get here wins.
+        result = dumps_str([raw_invitation, connection_id])
+        stored = await save_idempotent_result(idempotency_key, "create_connection", agent_url, result)
+        if stored != result:
+            return tuple(loads(stored))
+    # DIDComm messages of this connection are handled by that agent only.
+    await issuer_agents.bind(connection_id, agent_url)
+
+    return (raw_invitation, connection_id)
+
+
+async def wait_connection_ready(connection_id: str, timeout: float = 120.0) -> bool:
+    """
+    Waits, through the webhook handler, until the holder has accepted the connection.
+    Returns False if it was not accepted within `timeout` seconds.
+    """
+    url = f"{WEBHOOK_HANDLER_URL}/connections/{connection_id}/wait"
+    client_timeout = aiohttp.ClientTimeout(total=timeout + 10)
+    async with client_session(timeout=client_timeout) as session:
+        async with session.get(url, params={"timeout": timeout}) as response:
+            if response.status == 408:
+                return False
             response.raise_for_status()
-            result = await response.json()
-            
-            invitation_url = result['invitation']['invitationUrl']
-            raw_invitation = extract_raw_invitation(invitation_url)
-            connection_id = result['connectionId']
-
-            return (raw_invitation, connection_id)
-
+            return True
 
 
 # --- SCHEMA
@@ -71,16 +146,15 @@ async def create_anoncreds_schema(author_did: str) -> str:
     AnoncredSchemaV1\n
     Returns the GUID of the newly created schema.
     """
-    url = f"{ISSUER_AGENT_URL}/schema-registry/schemas"
-
     anoncreds_schema["author"] = author_did
     anoncreds_schema["schema"]["issuerId"] = author_did
 
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, headers=headers, json=anoncreds_schema) as response:
-            response.raise_for_status()
-            result = await response.json()
-            return result["guid"]
+    async with issuer_agents.lease(author_did) as agent_url:
+        async with client_session() as session:
+            async with session.post(f"{agent_url}/schema-registry/schemas", headers=headers, json=anoncreds_schema) as response:
+                response.raise_for_status()
+                result = await response.json()
+                return result["guid"]
 
 
 # --- CREDENTIAL DEFINITION
@@ -91,7 +165,6 @@ async def create_credential_definition(
     Returns the GUID from the newly created Credential Definition.
     """
 
-    url = f"{ISSUER_AGENT_URL}/credential-definition-registry/definitions"
     data = {
         "name": "Forensic Evidence Credential Definition",
         "description": "Credential Definition for a forensic evidence certificate, linking an expert to a piece of evidence.",
@@ -103,26 +176,32 @@ async def create_credential_definition(
         "supportRevocation": True
     }
 
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, headers=headers, json=data) as response:
-            response.raise_for_status()
-            result = await response.json()
-            return result["guid"]
+    async with issuer_agents.lease(author_did) as agent_url:
+        url = f"{agent_url}/credential-definition-registry/definitions"
+        async with client_session() as session:
+            async with session.post(url, headers=headers, json=data) as response:
+                response.raise_for_status()
+                result = await response.json()
+                return result["guid"]
         
 
 # --- CREDENTIAL
 async def create_credential_offer_anoncreds(
         issuer_did: str, connection_id: str, credential_definition_id: str,
-        credential_data: CredentialData, validity_period_in_seconds: float = 3600.0
+        credential_data: CredentialData, validity_period_in_seconds: float = 3600.0,
+        idempotency_key: str | None = None
         ) -> tuple[str, str]:
     """
         Returns the THID of the credential offer and the Issuer Record Id, in the format
         (thid, issuer_record_id).
+        Calls with the same `idempotency_key` (e.g. retries after a timeout) send
+        a single offer and all return it.
     """
 
-    # Change data from tutorial to suit my anoncreds schema data.
-    url = f"{ISSUER_AGENT_URL}/issue-credentials/credential-offers"
+    # Rejected here, before the agent sees it.
+    credential_data = validate_credential_data(credential_data)
 
+    # Change data from tutorial to suit my anoncreds schema data.
     data = {
         "connectionId": connection_id,
         "credentialFormat": "AnonCreds",
@@ -141,8 +220,22 @@ async def create_credential_offer_anoncreds(
         }
     }
 
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, headers=headers, json=data) as response:
-            response.raise_for_status()
-            result = await response.json()
-            return result["thid"]
+    if idempotency_key:
+        stored = await get_idempotent_result(idempotency_key, "create_credential_offer")
+        if stored:
+            return tuple(loads(stored))
+
+    async with issuer_agents.lease(connection_id, issuer_did) as agent_url:
+        url = f"{agent_url}/issue-credentials/credential-offers"
+        async with client_session() as session:
+            async with session.post(url, headers=headers, json=data) as response:
+                response.raise_for_status()
+                result = await response.json()
+    if idempotency_key:
+        offer = dumps_str([result["thid"], result["recordId"]])
+        stored = await save_idempotent_result(idempotency_key, "create_credential_offer", agent_url, offer)
+        if stored != offer:
+            return tuple(loads(stored))
+    # Revocation must reach the agent that issued it.
+    await issuer_agents.bind(result["recordId"], agent_url)
+    return result["thid"], result["recordId"]
@@ -1,7 +1,17 @@
 from issuer_controller import *
 import asyncio
 import aiohttp
-from local_database import init_db, add_connection, get_connection
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+from evidence_hashing import ask_evidence_hash
+from http_cache import get_json
+from fast_json import client_session
+from local_database import (init_db, add_connection, get_connection, add_issued_credential,
+                            get_latest_connection_by_name)
+from revocation import revoke_credentials
+from claim_validation import validate_credential_data, ClaimValidationError
 
 async def main():
     # Initializes local database
@@ -25,6 +35,7 @@ async def main():
                             \t1. Criar DID, Schema e Credential Definition.
                             \t2. Criar conexão e enviar para Holder.  
                             \t3. Assinar Credencial
+                            \t4. Revogar credenciais de um perito
                             \t0. Sair\n""")
         
         if user_input == '1':
@@ -32,7 +43,7 @@ async def main():
             didRef = await publish_did(longFormDid)
             print(f'DID criado: {didRef}')
             url = f"{URL_DB}/trusted-issuers/{didRef}"
-            async with aiohttp.ClientSession() as session:
+            async with client_session() as session:
                 async with session.post(url) as response:
                     if response.status == 200:
                         response_data = await response.json()
@@ -53,42 +64,48 @@ async def main():
             name = input("Qual o nome completo do perito que receberá a credencial? \n")
             url = f"{URL_DB}/identities/{name}"
             identity_data = None
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        identity_data = await response.json()
-                        print(f"Sucesso! A identidade de '{name}' foi encontrada.")
-                        print("   Dados:", identity_data)
-                    elif response.status == 404:
-                        print(f"A identidade '{name}' não foi encontrada no banco de dados. \
-                                O perito precisa cadastrar um DID!")
-                    else:
-                        print(f"Error happened. Status: {response.status}") 
+            status, body = await get_json(url)
+            if status == 200:
+                identity_data = body
+                print(f"Sucesso! A identidade de '{name}' foi encontrada.")
+                print("   Dados:", identity_data)
+            elif status == 404:
+                print(f"A identidade '{name}' não foi encontrada no banco de dados. \
+                        O perito precisa cadastrar um DID!")
+            else:
+                print(f"Error happened. Status: {status}") 
             if not identity_data:
                 continue
 
             connection_label = input("Dê um rótulo para esta nova conexão: ")
-            raw_invitation, connection_id = await create_connection(connection_label)
+            # One key per operation: its retries share it, a new connection gets a new one.
+            raw_invitation, connection_id = await call_idempotent(create_connection, connection_label, didRef)
             # Save this information in a local database, so the webhookhandler has access to it as well.
             await add_connection(connection_id, name, identity_data["current_did"])
 
             url = f"{URL_DB}/credential-definition"
             data = {"credential_def_guid": credential_definition_guid,
                     "connectionId": connection_id}
-            async with aiohttp.ClientSession() as session:
+            async with client_session() as session:
                 async with session.post(url, headers=headers, json=data) as response:
                     print(f"MockDB responded with status: {response.status}")
 
             url = f"{HOLDER_API_URL}/receive_oob_invitation"
-            async with aiohttp.ClientSession() as session:
+            async with client_session() as session:
                 async with session.post(url, headers=headers, json={"raw_invitation": raw_invitation}) as response:
                     print(f"Invitation sent. Holder agent responded with status: {response.status}")
  
         elif user_input == '3':
-            print('Esteja certo de que o perito aceitou sua solicitação.')
+            if not connection_id:
+                name = input("Qual o nome completo do perito que receberá a credencial? \n")
+                latest_connection = await get_latest_connection_by_name(name, CONNECTION_READY_STATE)
+                if not latest_connection:
+                    print("Nenhuma conexão aceita com este perito. Crie uma conexão antes (opção 2).")
+                    continue
+                connection_id = latest_connection["connection_id"]
             #Should trim inputs
             validity_in_seconds = input('Qual será o tempo de validade da credencial gerada (em segundos)? ')
-            evidence_hash = input('Qual o hash da evidência digital? ')
+            evidence_hash = ask_evidence_hash('Qual o hash da evidência digital (ou o caminho do arquivo)? ')
             court_jurisdiction = input('Digite a jurisdição do tribunal (ex: Comarca de Florianópolis, 4ª Vara Federal): ')
             issuing_judge_id = input('Qual seu identificador (id)? ')
             print(""" Níveis de Acesso 
@@ -109,20 +126,53 @@ async def main():
                 evidence_hash=evidence_hash, authorization_level=authorization_level,
                 court_jurisdiction=court_jurisdiction, subject_did=did
             )
+            try:
+                credential_data = validate_credential_data(credential_data)
+            except ClaimValidationError as e:
+                print("Dados inválidos para a credencial:")
+                for claim, reason in e.errors.items():
+                    print(f"   {claim}: {reason}")
+                continue
 
-            offer_thid = await create_credential_offer_anoncreds(
+            # Returns immediately if the holder accepted the connection while the data above was typed.
+            print("Aguardando o perito aceitar a conexão...")
+            try:
+                accepted = await wait_connection_ready(connection_id)
+            except aiohttp.ClientError as e:
+                print(f"Não foi possível consultar o estado da conexão: {e}")
+                continue
+            if not accepted:
+                print("O perito não aceitou a conexão a tempo. Tente novamente mais tarde.")
+                continue
+
+            offer_thid, record_id = await call_idempotent(
+                            create_credential_offer_anoncreds,
                             issuer_did=didRef, connection_id=connection_id,
                             credential_definition_id= credential_definition_guid,
                             credential_data=credential_data,
                             validity_period_in_seconds=validity_in_seconds
                         )
+            # Indexed so every credential of an expert or an evidence can be revoked later.
+            await add_issued_credential(record_id, offer_thid, connection_id, did, credential_data.evidence_hash,
+                                        credential_definition_guid, credential_data.authorization_level)
             # Notify holder. 
             url = f"{HOLDER_API_URL}/receive_credential_offer"
-            async with aiohttp.ClientSession() as session:
+            async with client_session() as session:
                 async with session.post(url, headers=headers, json={"thid": offer_thid}) as response:
                     response_data = await response.json()
                     print(f"Invitation sent. Holder agent responded with: {response_data}")
 
+        elif user_input == '4':
+            subject_did = input('Qual o DID do perito (vazio para todos)? ').strip() or None
+            evidence_hash = input('Qual o hash da evidência (vazio para todas)? ').strip() or None
+            if not subject_did and not evidence_hash:
+                print("Informe o DID do perito e/ou o hash da evidência.")
+                continue
+            summary = await revoke_credentials(subject_did, evidence_hash)
+            print(f"{summary['revoked']} de {summary['found']} credenciais revogadas, {summary['failed']} falhas.")
+            for failure in summary["failures"]:
+                print(f"   {failure['record_id']}: {failure['status']} {failure['detail']}")
+
         else:
             print("Saindo do programa...")
             break
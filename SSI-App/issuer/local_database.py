@@ -1,33 +1,129 @@
 import sqlite3
 import asyncio
+import time
 
 DB_FILE = "shared_data.db"
+# Several processes (issuer interface, webhook handler and verifier workers) share the file.
+BUSY_TIMEOUT_SECONDS = 10
+
+def _connect() -> sqlite3.Connection:
+    return sqlite3.connect(DB_FILE, timeout=BUSY_TIMEOUT_SECONDS)
+
+def _ensure_columns(cursor: sqlite3.Cursor, table: str, columns: dict[str, str]):
+    """
+    Adds the columns missing from a table created by an older version (CREATE TABLE IF NOT EXISTS keeps it as is).
+    """
+    existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+    for name, definition in columns.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
 
 def _init_db_sync():
     """
-    Internal synchronous function to create the connections table if it doesn't exist.
+    Internal synchronous function to create the tables if they don't exist.
     """
-    conn = sqlite3.connect(DB_FILE)
+    conn = _connect()
     cursor = conn.cursor()
+    # WAL lets readers proceed while another process writes.
+    cursor.execute("PRAGMA journal_mode=WAL")
     cursor.execute("""
     CREATE TABLE IF NOT EXISTS connections (
         connection_id TEXT PRIMARY KEY,
         name TEXT NOT NULL,
-        subject_did TEXT NOT NULL
+        subject_did TEXT NOT NULL,
+        state TEXT,
+        created_at REAL,
+        updated_at REAL
+    )
+    """)
+    # Connections are never deleted: with these indexes they are the history of every expert.
+    _ensure_columns(cursor, "connections", {"state": "TEXT", "created_at": "REAL", "updated_at": "REAL"})
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_connections_subject ON connections (subject_did, created_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_connections_name ON connections (name, created_at)")
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS connection_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        connection_id TEXT NOT NULL,
+        state TEXT NOT NULL,
+        created_at REAL NOT NULL
+    )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_connection_events_connection ON connection_events (connection_id, id)")
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS issued_credentials (
+        record_id TEXT PRIMARY KEY,
+        thid TEXT NOT NULL,
+        connection_id TEXT NOT NULL,
+        subject_did TEXT NOT NULL,
+        evidence_hash TEXT NOT NULL,
+        cred_def_guid TEXT NOT NULL,
+        authorization_level INTEGER NOT NULL,
+        status TEXT NOT NULL,
+        detail TEXT,
+        issued_at REAL NOT NULL,
+        updated_at REAL NOT NULL
+    )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_issued_credentials_subject ON issued_credentials (subject_did, evidence_hash)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_issued_credentials_evidence ON issued_credentials (evidence_hash)")
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS pending_presentations (
+        presentation_id TEXT PRIMARY KEY,
+        id_database TEXT NOT NULL,
+        created_at REAL NOT NULL,
+        cred_def_guid TEXT,
+        level_required INTEGER
+    )
+    """)
+    _ensure_columns(cursor, "pending_presentations", {"cred_def_guid": "TEXT", "level_required": "INTEGER",
+                                                      "traceparent": "TEXT"})
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS verification_cache (
+        subject_did TEXT NOT NULL,
+        cred_def_guid TEXT NOT NULL,
+        evidence_hash TEXT NOT NULL,
+        level INTEGER NOT NULL,
+        verified_data TEXT NOT NULL,
+        expires_at REAL NOT NULL,
+        PRIMARY KEY (subject_did, cred_def_guid, evidence_hash, level)
+    )
+    """)
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS agent_affinity (
+        key TEXT PRIMARY KEY,
+        agent_url TEXT NOT NULL,
+        created_at REAL NOT NULL
+    )
+    """)
+    # Result (JSON) of the first successful attempt of an idempotent operation, and the agent it ran on.
+    cursor.execute("""
+    CREATE TABLE IF NOT EXISTS idempotency_keys (
+        key TEXT PRIMARY KEY,
+        operation TEXT NOT NULL,
+        agent_url TEXT,
+        result TEXT,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL
     )
     """)
     conn.commit()
     conn.close()
 
-def _add_connection_sync(connection_id: str, name: str, subject_did: str):
+def _add_connection_sync(connection_id: str, name: str, subject_did: str, state: str | None = None):
     """
     Internal synchronous function to add or replace a connection in the database.
+    An existing connection keeps its creation time; without `state`, the last
+    state reported by the webhook (which may arrive first) is used.
     """
-    conn = sqlite3.connect(DB_FILE)
+    now = time.time()
+    conn = _connect()
     cursor = conn.cursor()
-    # Use REPLACE INTO to either insert a new row or update an existing one.
-    cursor.execute("REPLACE INTO connections (connection_id, name, subject_did) VALUES (?, ?, ?)",
-                   (connection_id, name, subject_did))
+    cursor.execute("""INSERT INTO connections (connection_id, name, subject_did, state, created_at, updated_at)
+                      VALUES (?, ?, ?, COALESCE(?, (SELECT state FROM connection_events WHERE connection_id = ?
+                                                    ORDER BY id DESC LIMIT 1)), ?, ?)
+                      ON CONFLICT(connection_id) DO UPDATE SET name = excluded.name, subject_did = excluded.subject_did,
+                      state = COALESCE(excluded.state, connections.state), updated_at = excluded.updated_at""",
+                   (connection_id, name, subject_did, state, connection_id, now, now))
     conn.commit()
     conn.close()
 
@@ -36,13 +132,288 @@ def _get_connection_sync(connection_id: str) -> tuple | None:
     Internal synchronous function to fetch a connection's data by its ID.
     Returns a tuple (name, subject_did) or None if not found.
     """
-    conn = sqlite3.connect(DB_FILE)
+    conn = _connect()
     cursor = conn.cursor()
     cursor.execute("SELECT name, subject_did FROM connections WHERE connection_id = ?", (connection_id,))
     result = cursor.fetchone()
     conn.close()
     return result
 
+_CONNECTION_COLUMNS = "connection_id, name, subject_did, state, created_at, updated_at"
+
+def _query_connections(query: str, params: tuple) -> list[dict]:
+    conn = _connect()
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    result = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return result
+
+def _find_connections_by_subject_sync(subject_did: str) -> list[dict]:
+    """
+    Internal synchronous function to fetch every connection made with an expert's DID, newest first.
+    """
+    return _query_connections(f"SELECT {_CONNECTION_COLUMNS} FROM connections WHERE subject_did = ? ORDER BY created_at DESC",
+                              (subject_did,))
+
+def _find_connections_by_name_sync(name: str) -> list[dict]:
+    """
+    Internal synchronous function to fetch every connection made with an expert, by name, newest first.
+    """
+    return _query_connections(f"SELECT {_CONNECTION_COLUMNS} FROM connections WHERE name = ? ORDER BY created_at DESC",
+                              (name,))
+
+def _get_latest_connection_by_name_sync(name: str, state: str | None = None) -> dict | None:
+    """
+    Internal synchronous function to fetch the most recent connection with an expert,
+    optionally only among connections in `state`. Returns None if there is none.
+    """
+    query = f"SELECT {_CONNECTION_COLUMNS} FROM connections WHERE name = ?"
+    params = (name,)
+    if state is not None:
+        query += " AND state = ?"
+        params += (state,)
+    result = _query_connections(query + " ORDER BY created_at DESC LIMIT 1", params)
+    return result[0] if result else None
+
+def _add_connection_event_sync(connection_id: str, state: str):
+    """
+    Internal synchronous function to record a state transition of a connection, as reported by the agent webhook.
+    """
+    conn = _connect()
+    cursor = conn.cursor()
+    now = time.time()
+    cursor.execute("INSERT INTO connection_events (connection_id, state, created_at) VALUES (?, ?, ?)",
+                   (connection_id, state, now))
+    # The connection row keeps the latest state, so lookups by DID or name need not read the events.
+    cursor.execute("UPDATE connections SET state = ?, updated_at = ? WHERE connection_id = ?",
+                   (state, now, connection_id))
+    conn.commit()
+    conn.close()
+
+def _get_connection_state_sync(connection_id: str) -> tuple | None:
+    """
+    Internal synchronous function to fetch the latest state of a connection.
+    Returns a tuple (state, created_at) or None if no transition was recorded.
+    """
+    conn = _connect()
+    cursor = conn.cursor()
+    cursor.execute("SELECT state, created_at FROM connection_events WHERE connection_id = ? ORDER BY id DESC LIMIT 1",
+                   (connection_id,))
+    result = cursor.fetchone()
+    conn.close()
+    return result
+
+def _get_connection_events_sync(connection_id: str) -> list[tuple]:
+    """
+    Internal synchronous function to fetch every recorded transition of a connection, oldest first.
+    Returns a list of tuples (state, created_at).
+    """
+    conn = _connect()
+    cursor = conn.cursor()
+    cursor.execute("SELECT state, created_at FROM connection_events WHERE connection_id = ? ORDER BY id",
+                   (connection_id,))
+    result = cursor.fetchall()
+    conn.close()
+    return result
+
+def _add_issued_credential_sync(record_id: str, thid: str, connection_id: str, subject_did: str,
+                                evidence_hash: str, cred_def_guid: str, authorization_level: int):
+    """
+    Internal synchronous function to index a credential offer, so it can be found and revoked later.
+    An offer already indexed keeps its status (e.g. revoked) and detail.
+    """
+    now = time.time()
+    conn = _connect()
+    cursor = conn.cursor()
+    cursor.execute("""INSERT INTO issued_credentials (record_id, thid, connection_id, subject_did, evidence_hash,
+                      cred_def_guid, authorization_level, status, detail, issued_at, updated_at)
+                      VALUES (?, ?, ?, ?, ?, ?, ?, 'issued', NULL, ?, ?)
+                      ON CONFLICT(record_id) DO NOTHING""",
+                   (record_id, thid, connection_id, subject_did, evidence_hash, cred_def_guid,
+                    authorization_level, now, now))
+    conn.commit()
+    conn.close()
+
+def _find_issued_credentials_sync(subject_did: str | None = None, evidence_hash: str | None = None,
+                                  statuses: tuple[str, ...] | None = None) -> list[dict]:
+    """
+    Internal synchronous function to fetch the indexed credentials of a subject and/or an evidence.
+    Returns a list of dicts, one per credential.
+    """
+    clauses, params = [], []
+    if subject_did is not None:
+        clauses.append("subject_did = ?")
+        params.append(subject_did)
+    if evidence_hash is not None:
+        clauses.append("evidence_hash = ?")
+        params.append(evidence_hash)
+    if statuses:
+        clauses.append(f"status IN ({', '.join('?' * len(statuses))})")
+        params.extend(statuses)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    conn = _connect()
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT * FROM issued_credentials {where} ORDER BY issued_at", params)
+    result = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return result
+
+def _update_issued_credential_status_sync(record_id: str, status: str, detail: str | None = None):
+    """
+    Internal synchronous function to record the outcome of an operation (e.g. a revocation) on a credential.
+    """
+    conn = _connect()
+    cursor = conn.cursor()
+    cursor.execute("UPDATE issued_credentials SET status = ?, detail = ?, updated_at = ? WHERE record_id = ?",
+                   (status, detail, time.time(), record_id))
+    conn.commit()
+    conn.close()
+
+def _add_pending_presentation_sync(presentation_id: str, id_database: str,
+                                   cred_def_guid: str | None = None, level_required: int | None = None,
+                                   traceparent: str | None = None):
+    """
+    Internal synchronous function to remember where the verified data of a presentation must be stored,
+    and what was requested, so a successful verification can be cached.
+    """
+    conn = _connect()
+    cursor = conn.cursor()
+    cursor.execute("""REPLACE INTO pending_presentations (presentation_id, id_database, created_at, cred_def_guid,
+                                                          level_required, traceparent)
+                      VALUES (?, ?, ?, ?, ?, ?)""",
+                   (presentation_id, id_database, time.time(), cred_def_guid, level_required, traceparent))
+    conn.commit()
+    conn.close()
+
+def _pop_pending_presentation_sync(presentation_id: str) -> tuple | None:
+    """
+    Internal synchronous function to fetch and remove a pending presentation.
+    Returns a tuple (id_database, cred_def_guid, level_required, traceparent) or None if not found.
+    """
+    conn = _connect()
+    cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
+    cursor.execute("""SELECT id_database, cred_def_guid, level_required, traceparent
+                      FROM pending_presentations WHERE presentation_id = ?""",
+                   (presentation_id,))
+    result = cursor.fetchone()
+    cursor.execute("DELETE FROM pending_presentations WHERE presentation_id = ?", (presentation_id,))
+    conn.commit()
+    conn.close()
+    return result
+
+def _set_agent_affinity_sync(key: str, agent_url: str):
+    """
+    Internal synchronous function to pin a key (connection, DID, record...) to the agent holding its state.
+    """
+    conn = _connect()
+    cursor = conn.cursor()
+    cursor.execute("REPLACE INTO agent_affinity (key, agent_url, created_at) VALUES (?, ?, ?)",
+                   (key, agent_url, time.time()))
+    conn.commit()
+    conn.close()
+
+def _get_agent_affinity_sync(key: str) -> str | None:
+    """
+    Internal synchronous function to fetch the agent a key is pinned to, or None.
+    """
+    conn = _connect()
+    cursor = conn.cursor()
+    cursor.execute("SELECT agent_url FROM agent_affinity WHERE key = ?", (key,))
+    result = cursor.fetchone()
+    conn.close()
+    return result[0] if result else None
+
+def _get_idempotent_result_sync(key: str, operation: str) -> str | None:
+    """
+    Internal synchronous function to get the (JSON) result stored for an idempotency key, or None.
+    Raises ValueError if the key was used for another operation.
+    """
+    conn = _connect()
+    cursor = conn.cursor()
+    cursor.execute("SELECT operation, result FROM idempotency_keys WHERE key = ?", (key,))
+    row = cursor.fetchone()
+    conn.close()
+    if row is None:
+        return None
+    if row[0] != operation:
+        raise ValueError(f"Idempotency key '{key}' was already used for {row[0]}.")
+    return row[1]
+
+def _save_idempotent_result_sync(key: str, operation: str, agent_url: str, result: str) -> str:
+    """
+    Internal synchronous function to store the (JSON) result of an idempotent operation.
+    The first result stored for a key is kept; returns it.
+    """
+    now = time.time()
+    conn = _connect()
+    cursor = conn.cursor()
+    cursor.execute("""INSERT INTO idempotency_keys (key, operation, agent_url, result, created_at, updated_at)
+                      VALUES (?, ?, ?, ?, ?, ?)
+                      ON CONFLICT(key) DO UPDATE SET agent_url = excluded.agent_url, result = excluded.result,
+                                                     updated_at = excluded.updated_at
+                      WHERE result IS NULL""", (key, operation, agent_url, result, now, now))
+    cursor.execute("SELECT result FROM idempotency_keys WHERE key = ?", (key,))
+    stored = cursor.fetchone()[0]
+    conn.commit()
+    conn.close()
+    return stored
+
+def _put_verification_sync(subject_did: str, cred_def_guid: str, evidence_hash: str, level: int,
+                           verified_data: str, ttl_seconds: float):
+    """
+    Internal synchronous function to cache a successful verification for `ttl_seconds`.
+    """
+    conn = _connect()
+    cursor = conn.cursor()
+    cursor.execute("""REPLACE INTO verification_cache (subject_did, cred_def_guid, evidence_hash, level, verified_data, expires_at)
+                      VALUES (?, ?, ?, ?, ?, ?)""",
+                   (subject_did, cred_def_guid, evidence_hash, level, verified_data, time.time() + ttl_seconds))
+    conn.commit()
+    conn.close()
+
+def _get_verification_sync(subject_did: str, cred_def_guid: str, level_required: int,
+                           evidence_hash: str) -> str | None:
+    """
+    Internal synchronous function to fetch a cached verification of this very
+    evidence that is still valid. A proof of a level also proves every level below it.
+    Returns the verified data or None.
+    """
+    conn = _connect()
+    cursor = conn.cursor()
+    cursor.execute("""SELECT verified_data FROM verification_cache
+                      WHERE subject_did = ? AND cred_def_guid = ? AND evidence_hash = ? AND level >= ? AND expires_at > ?
+                      ORDER BY expires_at DESC LIMIT 1""",
+                   (subject_did, cred_def_guid, evidence_hash, level_required, time.time()))
+    result = cursor.fetchone()
+    conn.close()
+    return result[0] if result else None
+
+def _invalidate_verifications_sync(subject_did: str | None = None, evidence_hash: str | None = None) -> int:
+    """
+    Internal synchronous function to drop cached verifications of a subject and/or an evidence
+    (all of them if both are None), along with the expired ones.
+    Returns the number of entries removed.
+    """
+    clauses, params = [], []
+    if subject_did is not None:
+        clauses.append("subject_did = ?")
+        params.append(subject_did)
+    if evidence_hash is not None:
+        clauses.append("evidence_hash = ?")
+        params.append(evidence_hash)
+    where = " AND ".join(clauses) if clauses else "1"
+    conn = _connect()
+    cursor = conn.cursor()
+    cursor.execute(f"DELETE FROM verification_cache WHERE ({where}) OR expires_at <= ?", params + [time.time()])
+    removed = cursor.rowcount
+    conn.commit()
+    conn.close()
+    return removed
+
 # --- Asynchronous wrappers for use in the application ---
 
 async def init_db():
@@ -51,14 +422,131 @@ async def init_db():
     """
     await asyncio.to_thread(_init_db_sync)
 
-async def add_connection(connection_id: str, name: str, subject_did: str):
+async def add_connection(connection_id: str, name: str, subject_did: str, state: str | None = None):
     """
     Asynchronously adds a connection to the database by running the sync function in a separate thread.
     """
-    await asyncio.to_thread(_add_connection_sync, connection_id, name, subject_did)
+    await asyncio.to_thread(_add_connection_sync, connection_id, name, subject_did, state)
 
 async def get_connection(connection_id: str) -> tuple | None:
     """
     Asynchronously gets a connection from the database by running the sync function in a separate thread.
     """
-    return await asyncio.to_thread(_get_connection_sync, connection_id)
\ No newline at end of file
+    return await asyncio.to_thread(_get_connection_sync, connection_id)
+
+async def find_connections_by_subject(subject_did: str) -> list[dict]:
+    """
+    Asynchronously gets the connections made with an expert's DID by running the sync function in a separate thread.
+    """
+    return await asyncio.to_thread(_find_connections_by_subject_sync, subject_did)
+
+async def find_connections_by_name(name: str) -> list[dict]:
+    """
+    Asynchronously gets the connections made with an expert by running the sync function in a separate thread.
+    """
+    return await asyncio.to_thread(_find_connections_by_name_sync, name)
+
+async def get_latest_connection_by_name(name: str, state: str | None = None) -> dict | None:
+    """
+    Asynchronously gets the latest connection with an expert by running the sync function in a separate thread.
+    """
+    return await asyncio.to_thread(_get_latest_connection_by_name_sync, name, state)
+
+async def add_connection_event(connection_id: str, state: str):
+    """
+    Asynchronously records a connection state transition by running the sync function in a separate thread.
+    """
+    await asyncio.to_thread(_add_connection_event_sync, connection_id, state)
+
+async def get_connection_state(connection_id: str) -> tuple | None:
+    """
+    Asynchronously gets the latest state of a connection by running the sync function in a separate thread.
+    """
+    return await asyncio.to_thread(_get_connection_state_sync, connection_id)
+
+async def get_connection_events(connection_id: str) -> list[tuple]:
+    """
+    Asynchronously gets the state transitions of a connection by running the sync function in a separate thread.
+    """
+    return await asyncio.to_thread(_get_connection_events_sync, connection_id)
+
+async def add_issued_credential(record_id: str, thid: str, connection_id: str, subject_did: str,
+                                evidence_hash: str, cred_def_guid: str, authorization_level: int):
+    """
+    Asynchronously indexes an issued credential by running the sync function in a separate thread.
+    """
+    await asyncio.to_thread(_add_issued_credential_sync, record_id, thid, connection_id, subject_did,
+                            evidence_hash, cred_def_guid, authorization_level)
+
+async def find_issued_credentials(subject_did: str | None = None, evidence_hash: str | None = None,
+                                  statuses: tuple[str, ...] | None = None) -> list[dict]:
+    """
+    Asynchronously finds indexed credentials by running the sync function in a separate thread.
+    """
+    return await asyncio.to_thread(_find_issued_credentials_sync, subject_did, evidence_hash, statuses)
+
+async def update_issued_credential_status(record_id: str, status: str, detail: str | None = None):
+    """
+    Asynchronously updates the status of an indexed credential by running the sync function in a separate thread.
+    """
+    await asyncio.to_thread(_update_issued_credential_status_sync, record_id, status, detail)
+
+async def add_pending_presentation(presentation_id: str, id_database: str,
+                                   cred_def_guid: str | None = None, level_required: int | None = None,
+                                   traceparent: str | None = None):
+    """
+    Asynchronously stores a pending presentation by running the sync function in a separate thread.
+    """
+    await asyncio.to_thread(_add_pending_presentation_sync, presentation_id, id_database, cred_def_guid,
+                            level_required, traceparent)
+
+async def pop_pending_presentation(presentation_id: str) -> tuple | None:
+    """
+    Asynchronously fetches and removes a pending presentation by running the sync function in a separate thread.
+    """
+    return await asyncio.to_thread(_pop_pending_presentation_sync, presentation_id)
+
+async def set_agent_affinity(key: str, agent_url: str):
+    """
+    Asynchronously pins a key to an agent by running the sync function in a separate thread.
+    """
+    await asyncio.to_thread(_set_agent_affinity_sync, key, agent_url)
+
+async def get_agent_affinity(key: str) -> str | None:
+    """
+    Asynchronously gets the agent a key is pinned to by running the sync function in a separate thread.
+    """
+    return await asyncio.to_thread(_get_agent_affinity_sync, key)
+
+async def get_idempotent_result(key: str, operation: str) -> str | None:
+    """
+    Asynchronously gets the result of an idempotency key by running the sync function in a separate thread.
+    """
+    return await asyncio.to_thread(_get_idempotent_result_sync, key, operation)
+
+async def save_idempotent_result(key: str, operation: str, agent_url: str, result: str) -> str:
+    """
+    Asynchronously stores the result of an idempotent operation by running the sync function in a separate thread.
+    """
+    return await asyncio.to_thread(_save_idempotent_result_sync, key, operation, agent_url, result)
+
+async def put_verification(subject_did: str, cred_def_guid: str, evidence_hash: str, level: int,
+                           verified_data: str, ttl_seconds: float):
+    """
+    Asynchronously caches a successful verification by running the sync function in a separate thread.
+    """
+    await asyncio.to_thread(_put_verification_sync, subject_did, cred_def_guid, evidence_hash, level,
+                            verified_data, ttl_seconds)
+
+async def get_verification(subject_did: str, cred_def_guid: str, level_required: int,
+                           evidence_hash: str) -> str | None:
+    """
+    Asynchronously gets a cached verification by running the sync function in a separate thread.
+    """
+    return await asyncio.to_thread(_get_verification_sync, subject_did, cred_def_guid, level_required, evidence_hash)
+
+async def invalidate_verifications(subject_did: str | None = None, evidence_hash: str | None = None) -> int:
+    """
+    Asynchronously drops cached verifications by running the sync function in a separate thread.
+    """
+    return await asyncio.to_thread(_invalidate_verifications_sync, subject_did, evidence_hash)
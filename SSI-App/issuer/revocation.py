@@ -0,0 +1,134 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+import aiohttp
+
+from issuer_controller import issuer_agents, headers
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+from fast_json import client_session
+from local_database import (init_db, find_issued_credentials, update_issued_credential_status,
+                            invalidate_verifications)
+
+URL_DB = 'http://localhost:49152'
+DEFAULT_CONCURRENCY = 8
+DEFAULT_MAX_ATTEMPTS = 3
+# Credentials still to be revoked: never attempted, or a previous attempt failed.
+REVOCABLE_STATUSES = ("issued", "revocation_failed")
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+async def revoke_credential(session: aiohttp.ClientSession, record_id: str,
+                            max_attempts: int = DEFAULT_MAX_ATTEMPTS, base_delay: float = 1.0) -> tuple[int, str]:
+    """
+    Asks the issuer agent to revoke one credential, retrying transient failures
+    with exponential backoff. Returns (status, response text); status is 0 if
+    the agent could not be reached.
+    """
+    status, text = 0, ""
+    for attempt in range(1, max_attempts + 1):
+        try:
+            # The credential record only exists on the agent that issued it.
+            async with issuer_agents.lease(record_id) as agent_url:
+                url = f"{agent_url}/credential-status/revoke-credential/{record_id}"
+                async with session.patch(url, headers=headers) as response:
+                    status, text = response.status, await response.text()
+                    response.raise_for_status()
+        except aiohttp.ClientResponseError:
+            pass
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            status, text = 0, str(e)
+        if status not in RETRYABLE_STATUSES and status != 0:
+            break
+        if attempt < max_attempts:
+            await asyncio.sleep(base_delay * 2 ** (attempt - 1) + random.uniform(0, base_delay))
+    return status, text
+
+
+async def publish_revocation(session: aiohttp.ClientSession, thid: str) -> None:
+    """
+    Lists the credential's thread in the mock DB, so holders stop presenting it
+    (the proof requests' non_revoked interval makes the verifier reject it anyway).
+    """
+    try:
+        async with session.post(f"{URL_DB}/revoked-credentials/{thid}") as response:
+            response.raise_for_status()
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"[revogação] Não foi possível publicar a revogação de {thid}: {e}")
+
+
+async def revoke_credentials(subject_did: str | None = None, evidence_hash: str | None = None,
+                             concurrency: int = DEFAULT_CONCURRENCY,
+                             max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> dict:
+    """
+    Revokes, concurrently, every indexed credential of `subject_did` and/or
+    `evidence_hash` that is not revoked yet. The outcome of each one is saved
+    in the local database, so running it again only retries what failed.
+
+    Returns a summary {"found", "revoked", "failed", "elapsed_seconds", "failures"}.
+    """
+    if subject_did is None and evidence_hash is None:
+        raise ValueError("A subject DID or an evidence hash is required.")
+    await init_db()
+    credentials = await find_issued_credentials(subject_did, evidence_hash, REVOCABLE_STATUSES)
+    started_at = time.monotonic()
+    summary = {"found": len(credentials), "revoked": 0, "failed": 0, "failures": []}
+
+    queue: asyncio.Queue = asyncio.Queue()
+    for credential in credentials:
+        queue.put_nowait(credential)
+
+    async def worker(session: aiohttp.ClientSession):
+        while True:
+            try:
+                credential = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            record_id = credential["record_id"]
+            status, text = await revoke_credential(session, record_id, max_attempts)
+            if status == 200:
+                await update_issued_credential_status(record_id, "revoked")
+                # The verifier must not keep accepting proofs made with it.
+                await invalidate_verifications(credential["subject_did"], credential["evidence_hash"])
+                await publish_revocation(session, credential["thid"])
+                summary["revoked"] += 1
+            else:
+                await update_issued_credential_status(record_id, "revocation_failed", f"{status}: {text[:500]}")
+                summary["failed"] += 1
+                summary["failures"].append({"record_id": record_id, "status": status, "detail": text[:500]})
+            done = summary["revoked"] + summary["failed"]
+            print(f"[revogação] {done}/{summary['found']} ({summary['revoked']} revogadas, "
+                  f"{summary['failed']} falhas) - {record_id}: {status}")
+
+    if credentials:
+        connector = aiohttp.TCPConnector(limit=concurrency)
+        async with client_session(connector=connector) as session:
+            await asyncio.gather(*(worker(session) for _ in range(min(concurrency, len(credentials)))))
+
+    summary["elapsed_seconds"] = round(time.monotonic() - started_at, 3)
+    return summary
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Revoke every credential issued to an expert and/or for an evidence.")
+    parser.add_argument("--subject-did", default=None)
+    parser.add_argument("--evidence-hash", default=None)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS)
+    args = parser.parse_args()
+    if args.subject_did is None and args.evidence_hash is None:
+        parser.error("--subject-did and/or --evidence-hash is required")
+    return args
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    summary = asyncio.run(revoke_credentials(args.subject_did, args.evidence_hash,
+                                             args.concurrency, args.max_attempts))
+    print(json.dumps(summary, indent=2))
+    raise SystemExit(0 if summary["failed"] == 0 else 1)
@@ -1,23 +1,95 @@
 # Por aqui que vai chamar a função para criar o presentation request.
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import JSONResponse
 from verifier_controller import *
 from verifier_controller import accept_presentation as accept_presentation_controller
+from local_database import (init_db, add_pending_presentation, pop_pending_presentation, get_connection,
+                            get_verification, put_verification, invalidate_verifications)
+from claim_validation import parse_authorization_level
+from contextlib import asynccontextmanager
 import asyncio
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+from fast_json import FastJSONResponse, client_session
+from http_compression import CompressionMiddleware
+from profiling import ProfilingMiddleware
+from tracing import TracingMiddleware, current_traceparent, span
 
 URL_DB = 'http://localhost:49152'
 HOLDER_API_URL="http://localhost:5001"
+# How long (seconds) a successful verification is reused instead of requesting a new proof. 0 disables the cache.
+VERIFICATION_CACHE_TTL = float(os.environ.get("VERIFICATION_CACHE_TTL", "300"))
+# Admin rights are always proven live, never served from the cache.
+ADMIN_LEVEL = 99
 headers = {
     "Content-Type": "application/json",
     "Accept": "application/json"
 }
-app = FastAPI()
 
-id_to_store_in_database = None
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pending presentations live in the shared local database, so the worker
+    # accepting a presentation need not be the one that requested it.
+    await init_db()
+    yield
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+app.add_middleware(CompressionMiddleware)
+# Outermost, so profiles include compression. Opt-in: SSI_PROFILE=header|sample.
+app.add_middleware(ProfilingMiddleware, service="verifier_api")
+# Opt-in: SSI_TRACING=1.
+app.add_middleware(TracingMiddleware, service="verifier_api")
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+async def store_verified_data(id_database: str, verified_data: str):
+    url = f"{URL_DB}/verified-data"
+    data = {"identifier": id_database,
+            "data": verified_data}
+    async with client_session() as session:
+        async with session.post(url, headers=headers, json=data) as response:
+            print(f"MockDB responded with status: {response.status}")
+
+
+def mark_cached(verified_data: str) -> str:
+    """
+    Flags verified data served from the cache ("cached": true), so the gateway
+    can refuse it where a live proof is needed.
+    """
+    data = json.loads(verified_data)
+    data["cached"] = True
+    return json.dumps(data)
+
+
+async def cache_verification(verified_data: str, credential_definition_guid: str, level_required: int):
+    """
+    Caches a verified proof under the subject DID and evidence hash it revealed.
+    """
+    if level_required >= ADMIN_LEVEL:
+        return
+    revealed = json.loads(verified_data)["requested_proof"]["revealed_attrs"]
+    await put_verification(revealed["subject_did_proof"]["raw"], credential_definition_guid,
+                           revealed["evidence_hash_proof"]["raw"], level_required,
+                           verified_data, VERIFICATION_CACHE_TTL)
+
+
+@app.delete("/verification-cache")
+async def delete_verification_cache(subject_did: str | None = None, evidence_hash: str | None = None):
+    """
+    Drops cached verifications of a subject and/or an evidence (all of them without filters).
+    """
+    removed = await invalidate_verifications(subject_did, evidence_hash)
+    return {"removed": removed}
+
 
 @app.post("/presentation_request")
 async def create_presentation_request(request: Request):
-    global id_to_store_in_database
     try:
         payload = await request.json()
         connection_id = payload.get("connection_id") # Pegar os argumentos coretos
@@ -29,27 +101,53 @@ async def create_presentation_request(request: Request):
             raise HTTPException(status_code=400, detail="'connection_id' key is required in the payload.")
         elif not credential_definition_guid:
             raise HTTPException(status_code=400, detail="'cred_def_guid' key is required in the payload.")
-        elif not level_required:
+        elif level_required is None or level_required == "":
             raise HTTPException(status_code=400, detail="'level_required' key is required in the payload.")
         elif not id_database:
             raise HTTPException(status_code=400, detail="'id_database' key is required in the payload.")
-
-        id_to_store_in_database = id_database
+        try:
+            level_required = parse_authorization_level(level_required)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"'level_required' {e}.")
+
+        # The same expert proved this level (or a higher one) for this very evidence recently:
+        # reuse that verification. Only for a given evidence, never for admin rights, and
+        # not when the caller needs a live proof (allow_cached: false, e.g. ownership transfers).
+        evidence_hash = payload.get("evidence_hash")
+        use_cache = (VERIFICATION_CACHE_TTL > 0 and evidence_hash and level_required < ADMIN_LEVEL
+                     and payload.get("allow_cached", True) is not False)
+        connection = await get_connection(connection_id) if use_cache else None
+        if connection:
+            cached = await get_verification(connection[1], credential_definition_guid, level_required, evidence_hash)
+            if cached:
+                await store_verified_data(id_database, mark_cached(cached))
+                return FastJSONResponse(
+                    status_code=200,
+                    content={"status": "success", "cached": True}
+                )
 
         presentation_thid, presentation_id = await create_presentation_request_anoncreds(
             connection_id,  
             credential_definition_guid,
-            level_required
+            level_required,
+            evidence_hash
         ) 
+        # The agent's webhook starts a new request; it continues this trace from the stored context.
+        await add_pending_presentation(presentation_id, id_database, credential_definition_guid, level_required,
+                                       current_traceparent())
 
         print(presentation_thid)
         url = f"{HOLDER_API_URL}/receive_presentation_request"
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, headers=headers, json={"presentation_thid": presentation_thid}) as response:
+        async with client_session() as session:
+            async with session.post(url, headers=headers, json={
+                "presentation_thid": presentation_thid,
+                "cred_def_id": credential_definition_id(credential_definition_guid),
+                "evidence_hash": evidence_hash,
+                "level_required": level_required}) as response:
                 response_data = await response.json()
                 print(f"Tried to accept presentation, holder response: {response_data}")
     
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=200,
             content={"status": "success", "details": response_data}
         )
@@ -72,30 +170,31 @@ async def create_presentation_request(request: Request):
 
 @app.post("/accept_presentation")
 async def accept_presentation(request: Request):
-    global id_to_store_in_database
     try:
         payload = await request.json()
         presentation_id = payload.get("presentation_id") 
 
         if not presentation_id:
             raise HTTPException(status_code=400, detail="'presentation_id' key is required in the payload.")
+        pending = await pop_pending_presentation(presentation_id)
+        if pending is None:
+            raise HTTPException(status_code=404, detail=f"No pending presentation request with id '{presentation_id}'.")
+        id_database, credential_definition_guid, level_required, traceparent = pending
 
-        response_data = await accept_presentation_controller(presentation_id)
-        print(response_data)
-        
+        with span("accept_presentation", parent=traceparent, presentation_id=presentation_id,
+                  webhook_traceparent=current_traceparent()):
+            response_data = await accept_presentation_controller(presentation_id)
+            print(response_data)
 
-        # Get Verified Data from agent
-        verified_data = await get_verified_data(presentation_id)
+            # Get Verified Data from agent
+            verified_data = await get_verified_data(presentation_id)
 
-        # Store Verified Data to Mock Db.
-        url = f"{URL_DB}/verified-data"
-        data = {"identifier": id_to_store_in_database,
-                "data": verified_data[0]}
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, headers=headers, json=data) as response:
-                print(f"MockDB responded with status: {response.status}")
+            # Store Verified Data to Mock Db.
+            await store_verified_data(id_database, verified_data[0])
+            if VERIFICATION_CACHE_TTL > 0 and credential_definition_guid is not None:
+                await cache_verification(verified_data[0], credential_definition_guid, level_required)
 
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=200,
             content={"status": "success", "details": response_data}
         )
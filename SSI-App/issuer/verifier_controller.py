@@ -1,8 +1,13 @@
 
-import aiohttp, json
+import aiohttp, json, os, sys, time
+from agent_pool import AgentPool
+from issuer_controller import issuer_agents
 
-# Using the same URL as the ISSUER.
-VERIFIER_AGENT_URL = "http://localhost:8080/cloud-agent"
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+from fast_json import client_session
+
+# The verifier shares the issuer's agents unless VERIFIER_AGENT_URLS is set.
+verifier_agents = AgentPool.from_env("VERIFIER_AGENT_URLS", issuer_agents.urls)
 headers = {
     "Content-Type": "application/json",
     "Accept": "application/json"
@@ -10,21 +15,31 @@ headers = {
 
 
 # --- PRESENTATION
-async def create_presentation_request_anoncreds(connectionId: str, credential_definition_guid: str, level_required: int | str) -> tuple[str,str]:
+def credential_definition_id(credential_definition_guid: str) -> str:
+    # Url should be configurable
+    return f"http://caddy-issuer:8080/cloud-agent/credential-definition-registry/definitions/{credential_definition_guid}/definition"
+
+
+async def create_presentation_request_anoncreds(connectionId: str, credential_definition_guid: str, level_required: int | str,
+                                                evidence_hash: str | None = None) -> tuple[str,str]:
     """
         level_required: is the authorization level required
         \t0: Restricted read only
         \t1: Read-Only
         \t2: Read and Write
         \t99: ADMIN
+        evidence_hash: if given, only a credential for this evidence satisfies the request.
 
 
         Returns (THID, PRESENTATION_ID_ISSUER)
     """
 
+    restriction = {"cred_def_id": credential_definition_id(credential_definition_guid)}
+    if evidence_hash:
+        # On every referent, so the level is also proven by the credential of this evidence.
+        restriction["attr::evidence_hash::value"] = evidence_hash
 
-    url = f"{VERIFIER_AGENT_URL}/present-proof/presentations"
-
+    now = int(time.time())
     data = {
     "connectionId": connectionId,
     "credentialFormat": "AnonCreds",
@@ -32,24 +47,20 @@ async def create_presentation_request_anoncreds(connectionId: str, credential_de
         "name": "proof_of_expertise_and_authorization",
         "version": "1.0",
         "nonce": "1234567890123456789", # Should be random
+        # Proven as of now: a revoked credential no longer satisfies the request.
+        "non_revoked": {"from": now, "to": now},
         "requested_attributes": {
             "expert_name_proof": {
                 "name": "expert_name",
-                "restrictions": [{   # Url should be configurable
-                    "cred_def_id": f"http://caddy-issuer:8080/cloud-agent/credential-definition-registry/definitions/{credential_definition_guid}/definition"
-                }]
+                "restrictions": [restriction]
             },
             "evidence_hash_proof": {
                 "name": "evidence_hash",
-                "restrictions": [{
-                    "cred_def_id": f"http://caddy-issuer:8080/cloud-agent/credential-definition-registry/definitions/{credential_definition_guid}/definition"
-                }]
+                "restrictions": [restriction]
             },
             "subject_did_proof": {
                 "name": "subject_did",
-                "restrictions": [{
-                    "cred_def_id": f"http://caddy-issuer:8080/cloud-agent/credential-definition-registry/definitions/{credential_definition_guid}/definition"
-                }]
+                "restrictions": [restriction]
             }
         },
         "requested_predicates": {
@@ -57,38 +68,41 @@ async def create_presentation_request_anoncreds(connectionId: str, credential_de
                 "name": "authorization_level",
                 "p_type": ">=",
                 "p_value": int(level_required),
-                "restrictions": [{
-                    "cred_def_id": f"http://caddy-issuer:8080/cloud-agent/credential-definition-registry/definitions/{credential_definition_guid}/definition"
-                }]
+                "restrictions": [restriction]
             }
         }
     },
     "proofs": [],
     "options": None
 }
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, headers=headers, json=data) as response:
-            response.raise_for_status()
-            result = await response.json()
-            return result["thid"], result["presentationId"]
+    # The request travels over the connection, so it must leave from the agent that holds it.
+    async with verifier_agents.lease(connectionId) as agent_url:
+        async with client_session() as session:
+            async with session.post(f"{agent_url}/present-proof/presentations", headers=headers, json=data) as response:
+                response.raise_for_status()
+                result = await response.json()
+    await verifier_agents.bind(result["presentationId"], agent_url)
+    return result["thid"], result["presentationId"]
 
 
 async def accept_presentation(presentationId: str):
-    url = f"{VERIFIER_AGENT_URL}/present-proof/presentations/{presentationId}"
     data = {
         "action": "presentation-accept"
       }
-    async with aiohttp.ClientSession() as session:
-        async with session.patch(url, headers=headers, json=data) as response:
-            response.raise_for_status()
-            result = await response.json()
-            print(json.dumps(result, indent=2))
+    async with verifier_agents.lease(presentationId) as agent_url:
+        url = f"{agent_url}/present-proof/presentations/{presentationId}"
+        async with client_session() as session:
+            async with session.patch(url, headers=headers, json=data) as response:
+                response.raise_for_status()
+                result = await response.json()
+                print(json.dumps(result, indent=2))
 
 async def get_verified_data(presentationId: str):
-    url = f"{VERIFIER_AGENT_URL}/present-proof/presentations/{presentationId}"
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=headers) as response:
-            response.raise_for_status()
-            result = await response.json()
-            return result["data"]
+    async with verifier_agents.lease(presentationId) as agent_url:
+        url = f"{agent_url}/present-proof/presentations/{presentationId}"
+        async with client_session() as session:
+            async with session.get(url, headers=headers) as response:
+                response.raise_for_status()
+                result = await response.json()
+                return result["data"]
             #print(json.dumps(result, indent=2))
\ No newline at end of file
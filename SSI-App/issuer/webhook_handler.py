@@ -1,35 +1,120 @@
 import aiohttp
-from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
-from local_database import get_connection
+import asyncio
+import time
+from fastapi import FastAPI, Request, HTTPException
+from local_database import (init_db, get_connection, add_connection_event,
+                            get_connection_state, get_connection_events)
 from verifier_controller import accept_presentation
+from issuer_controller import CONNECTION_READY_STATE
+from contextlib import asynccontextmanager
 import json
+import os
+import sys
 
-app = FastAPI()
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+from fast_json import FastJSONResponse, client_session
+from http_compression import CompressionMiddleware
+from profiling import ProfilingMiddleware
+from tracing import TracingMiddleware
 
 API_VERIFIER_URL="http://localhost:5017"
+# A waiter served by one worker may miss the webhook delivered to another one,
+# so it also rereads the local database at this interval.
+WAIT_POLL_INTERVAL_SECONDS = 0.5
+MAX_WAIT_SECONDS = 300
+
+# connection_id -> events set whenever a transition of that connection is recorded.
+connection_waiters: dict[str, set[asyncio.Event]] = {}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await init_db()
+    yield
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+app.add_middleware(CompressionMiddleware)
+# Outermost, so profiles include compression. Opt-in: SSI_PROFILE=header|sample.
+app.add_middleware(ProfilingMiddleware, service="webhook_handler")
+# Opt-in: SSI_TRACING=1.
+app.add_middleware(TracingMiddleware, service="webhook_handler")
+
+
+def notify_connection_waiters(connection_id: str) -> None:
+    for event in connection_waiters.get(connection_id, ()):
+        event.set()
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+@app.get("/connections/{connection_id}/state")
+async def connection_state(connection_id: str):
+    """
+    Returns the latest state of a connection and every transition recorded for it.
+    """
+    events = await get_connection_events(connection_id)
+    if not events:
+        raise HTTPException(status_code=404, detail="No state recorded for this connection.")
+    state, updated_at = events[-1]
+    return {"connection_id": connection_id, "state": state, "updated_at": updated_at,
+            "history": [{"state": s, "at": at} for s, at in events]}
+
+@app.get("/connections/{connection_id}/wait")
+async def wait_connection_state(connection_id: str, state: str = CONNECTION_READY_STATE, timeout: float = 60):
+    """
+    Blocks until the connection reaches `state` and returns as soon as the
+    webhook records it. Answers 408 if it does not happen within `timeout` seconds.
+    """
+    deadline = time.monotonic() + min(timeout, MAX_WAIT_SECONDS)
+    event = asyncio.Event()
+    connection_waiters.setdefault(connection_id, set()).add(event)
+    try:
+        while True:
+            event.clear()
+            current = await get_connection_state(connection_id)
+            if current and current[0] == state:
+                return {"connection_id": connection_id, "state": current[0], "updated_at": current[1]}
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise HTTPException(status_code=408,
+                                    detail=f"Connection is in state {current[0] if current else None}, not {state}.")
+            try:
+                await asyncio.wait_for(event.wait(), timeout=min(remaining, WAIT_POLL_INTERVAL_SECONDS))
+            except asyncio.TimeoutError:
+                pass
+    finally:
+        waiters = connection_waiters.get(connection_id)
+        if waiters is not None:
+            waiters.discard(event)
+            if not waiters:
+                del connection_waiters[connection_id]
 
 @app.post("/webhook")
 async def receive_webhook(request: Request):
-    payload = await request.json() 
+    payload = await request.json()
 
     print("📩 Webhook recebido:")
     print(json.dumps(payload, indent=2))
-    
+
     connectionId=None
-    if (payload['type'] == 'ConnectionUpdated') and payload["data"]["state"] == 'ConnectionResponseSent':
+    if payload['type'] == 'ConnectionUpdated':
         connectionId=payload["data"]["connectionId"]
-        name, did = await get_connection(connectionId)
-        # Could refactor in a way the user needs only one terminal (issuer_interface app)
-        # But for meanings of this PoC, that's alright
-        print(f"Conexão aceita com {name}, de DID {did}")
+        await add_connection_event(connectionId, payload["data"]["state"])
+        notify_connection_waiters(connectionId)
+
+        if payload["data"]["state"] == CONNECTION_READY_STATE:
+            connection = await get_connection(connectionId)
+            if connection:
+                name, did = connection
+                print(f"Conexão aceita com {name}, de DID {did}")
 
     elif (payload['type'] == "PresentationUpdated") and payload["data"]["status"] == "PresentationVerified":
         #await accept_presentation(payload["data"]["presentationId"])
         presentation_id = payload["data"]["presentationId"]
         url = f"{API_VERIFIER_URL}/accept_presentation"
         data = {"presentation_id": presentation_id}
-        async with aiohttp.ClientSession() as session:
+        async with client_session() as session:
             async with session.post(url, json=data) as response:
                 if response.status == 200:
                     print("Verifier accepted the data successfully.")
@@ -37,7 +122,7 @@ async def receive_webhook(request: Request):
                     print(f"Error calling verifier API: {response.status} {await response.text()}")
 
 
-    return JSONResponse({"status": "success"})
+    return FastJSONResponse({"status": "success"})
 
 
 if __name__ == "__main__":
@@ -0,0 +1,243 @@
+"""
+Production launcher for the SSI-App services.
+
+Starts every service under uvicorn without the reload watcher, with a number
+of worker processes sized to the machine, in dependency order: a service is
+only started once the services it calls answer their /health endpoint.
+Crashed or unhealthy services are restarted with backoff, scheduled in the
+monitor loop so the other services stay supervised meanwhile, and SIGTERM/SIGINT
+drain the services in reverse order.
+
+Usage (from the SSI-App folder):
+    python3 launcher.py
+Worker counts can be overridden per service, e.g. SSI_WORKERS_VERIFIER_API=8.
+"""
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from dataclasses import dataclass, field
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CPU_COUNT = os.cpu_count() or 1
+
+READINESS_TIMEOUT_SECONDS = 60
+HEALTH_INTERVAL_SECONDS = 5
+HEALTH_FAILURES_BEFORE_RESTART = 3
+GRACEFUL_SHUTDOWN_SECONDS = 30
+MAX_RESTART_DELAY_SECONDS = 60
+# A service that stayed up this long has its restart backoff reset.
+STABLE_AFTER_SECONDS = 60
+
+
+@dataclass
+class Service:
+    name: str
+    app_dir: str
+    app: str
+    port: int
+    host: str = "localhost"
+    # Services keeping per-process state must run a single worker.
+    scalable: bool = True
+    depends_on: list[str] = field(default_factory=list)
+    # Defaults for the service environment; variables already set take precedence.
+    env: dict[str, str] = field(default_factory=dict)
+    process: subprocess.Popen | None = None
+    started_at: float = 0.0
+    restarts: int = 0
+    health_failures: int = 0
+    # Set while a restart is pending: when to start again, and to kill the old process if still draining.
+    restart_at: float | None = None
+    kill_at: float = 0.0
+    # Set after a restart until the service answers /health.
+    ready_by: float | None = None
+
+    @property
+    def workers(self) -> int:
+        override = os.environ.get(f"SSI_WORKERS_{self.name.upper()}")
+        if override:
+            return max(1, int(override))
+        # Three scalable services share the machine.
+        return max(1, CPU_COUNT // 3) if self.scalable else 1
+
+
+SERVICES = [
+    # Workers share the mock database through SQLite (see MOCKDB_BACKEND).
+    Service("mockdb_service", "mockDbservice", "mockdb_service:app", 49152,
+            env={"MOCKDB_BACKEND": "sqlite"}),
+    Service("holder_api", "holder", "holder_api:app", 5001),
+    Service("verifier_api", "issuer", "verifier_api:app", 5017,
+            depends_on=["mockdb_service", "holder_api"]),
+    Service("webhook_handler", "issuer", "webhook_handler:app", 5000, host="0.0.0.0",
+            depends_on=["verifier_api"]),
+]
+
+
+def log(message: str) -> None:
+    print(f"[launcher] {message}", flush=True)
+
+
+def is_healthy(service: Service, timeout: float = 2.0) -> bool:
+    host = "localhost" if service.host == "0.0.0.0" else service.host
+    try:
+        with urllib.request.urlopen(f"http://{host}:{service.port}/health", timeout=timeout) as response:
+            return response.status == 200
+    except OSError:
+        return False
+
+
+def start(service: Service) -> None:
+    command = [
+        sys.executable, "-m", "uvicorn", service.app,
+        "--app-dir", os.path.join(BASE_DIR, service.app_dir),
+        "--host", service.host,
+        "--port", str(service.port),
+        "--workers", str(service.workers),
+        "--timeout-graceful-shutdown", str(GRACEFUL_SHUTDOWN_SECONDS),
+    ]
+    # Services resolve shared_data.db relative to the SSI-App folder.
+    service.process = subprocess.Popen(command, cwd=BASE_DIR, env={**service.env, **os.environ})
+    service.started_at = time.monotonic()
+    service.health_failures = 0
+    log(f"{service.name} started (pid {service.process.pid}, {service.workers} worker(s))")
+
+
+def wait_ready(service: Service, timeout: float = READINESS_TIMEOUT_SECONDS,
+               stopped=lambda: False) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and not stopped():
+        if service.process and service.process.poll() is not None:
+            return False
+        if is_healthy(service):
+            log(f"{service.name} is ready on port {service.port}")
+            return True
+        time.sleep(0.5)
+    return False
+
+
+def stop(service: Service) -> None:
+    """
+    Asks uvicorn to drain (SIGTERM: finish in-flight requests, then exit) and
+    kills it if it does not exit in time.
+    """
+    process = service.process
+    if not process or process.poll() is not None:
+        return
+    log(f"draining {service.name}...")
+    process.terminate()
+    try:
+        process.wait(timeout=GRACEFUL_SHUTDOWN_SECONDS + 5)
+    except subprocess.TimeoutExpired:
+        log(f"{service.name} did not stop in time, killing it")
+        process.kill()
+        process.wait()
+
+
+def schedule_restart(service: Service, reason: str, now: float) -> None:
+    """
+    Starts draining the service and schedules its start after the backoff
+    delay; supervise() carries it out without blocking the monitor loop.
+    """
+    if now - service.started_at > STABLE_AFTER_SECONDS:
+        service.restarts = 0
+    delay = min(MAX_RESTART_DELAY_SECONDS, 2 ** service.restarts)
+    service.restarts += 1
+    log(f"{service.name} {reason}; restarting in {delay}s")
+    if service.process.poll() is None:
+        log(f"draining {service.name}...")
+        service.process.terminate()
+    service.kill_at = now + GRACEFUL_SHUTDOWN_SECONDS + 5
+    service.restart_at = now + delay
+    service.ready_by = None
+
+
+def supervise(service: Service, now: float, check_health: bool) -> None:
+    """
+    One monitor loop step for a service: advances a pending restart, waits
+    for a restarted service to be ready, or checks whether it crashed or stopped answering.
+    """
+    if service.restart_at is not None:
+        if service.process.poll() is None:
+            if now >= service.kill_at:
+                log(f"{service.name} did not stop in time, killing it")
+                service.process.kill()
+            return
+        if now >= service.restart_at:
+            service.restart_at = None
+            start(service)
+            service.ready_by = now + READINESS_TIMEOUT_SECONDS
+        return
+
+    exit_code = service.process.poll()
+    if exit_code is not None:
+        schedule_restart(service, f"exited with code {exit_code}", now)
+        return
+
+    if service.ready_by is not None:
+        if is_healthy(service):
+            log(f"{service.name} is ready on port {service.port}")
+            service.ready_by = None
+        elif now >= service.ready_by:
+            log(f"{service.name} did not become ready after restart")
+            service.ready_by = None
+        return
+
+    if not check_health:
+        return
+    if is_healthy(service):
+        service.health_failures = 0
+        return
+    service.health_failures += 1
+    if service.health_failures >= HEALTH_FAILURES_BEFORE_RESTART:
+        schedule_restart(service, f"failed {service.health_failures} health checks", now)
+
+
+def main() -> int:
+    by_name = {service.name: service for service in SERVICES}
+    stopping = False
+
+    def request_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    try:
+        for service in SERVICES:
+            for dependency in service.depends_on:
+                if not is_healthy(by_name[dependency]):
+                    raise RuntimeError(f"{service.name} depends on {dependency}, which is not healthy")
+            start(service)
+            if not wait_ready(service, stopped=lambda: stopping):
+                if stopping:
+                    return 0
+                raise RuntimeError(f"{service.name} did not become ready in {READINESS_TIMEOUT_SECONDS}s")
+        log("all services are ready")
+
+        last_health_check = time.monotonic()
+        while not stopping:
+            time.sleep(0.5)
+            now = time.monotonic()
+            check_health = now - last_health_check >= HEALTH_INTERVAL_SECONDS
+            if check_health:
+                last_health_check = now
+            for service in SERVICES:
+                if stopping:
+                    break
+                supervise(service, now, check_health)
+    except RuntimeError as e:
+        log(str(e))
+        return 1
+    finally:
+        # Dependents first, so nothing calls a service that is already gone.
+        for service in reversed(SERVICES):
+            stop(service)
+        log("all services have been stopped")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
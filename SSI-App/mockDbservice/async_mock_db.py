@@ -1,17 +1,62 @@
 import asyncio
+import time
+import uuid
+
+# Older DIDs returned along with an identity; the rest is paged through get_did_history.
+INLINE_HISTORY_LIMIT = 5
+MAX_HISTORY_PAGE_SIZE = 500
+
+def identity_view(current_did: str, current_since: float | None, history_count: int,
+                  recent_older_dids: list[str]) -> dict:
+    """
+    The identity returned by both backends: `older_dids` holds only the most
+    recent INLINE_HISTORY_LIMIT previous DIDs (oldest first), `older_dids_count` all of them.
+    """
+    return {"current_did": current_did,
+            "current_since": current_since,
+            "older_dids": recent_older_dids,
+            "older_dids_count": history_count}
+
+# Resources served with an ETag. Their version changes whenever their content may have.
+TRUSTED_ISSUERS = "trusted-issuers"
+CREDENTIAL_DEFINITION = "credential-definition"
+REVOKED_CREDENTIALS = "revoked-credentials"
+
+def identity_resource(name: str) -> str:
+    return f"identity:{name}"
+
+def history_page(name: str, total: int, offset: int, limit: int, items: list[dict]) -> dict:
+    return {"name": name, "total": total, "offset": offset, "limit": limit, "items": items}
 
 class AsyncMockDB:
     def __init__(self):
         self._lock = asyncio.Lock()
+        # name -> {"current_did", "current_since", "history": [(did, since, until), ...] oldest first}
         self._identities = {}
         self._trusted_issuers: list[str] = []  # Tree would have better perfomance
         self._credential_definition_guid = ("","") # tuple(credential_guid, connectionId) 
         self._verified_data = {}
+        # Thread ids (thid) of revoked credential offers, in revocation order.
+        self._revoked_credentials: dict[str, float] = {}
+        # resource -> version; the epoch tells versions of two runs of the service apart.
+        self._versions: dict[str, int] = {}
+        self._epoch = uuid.uuid4().hex[:12]
+
+    def _bump(self, resource: str) -> None:
+        self._versions[resource] = self._versions.get(resource, 0) + 1
+
+    async def get_version(self, resource: str) -> str:
+        """
+        Returns an opaque version of `resource`, different after every change to it.
+        """
+        async with self._lock:
+            return f"{self._epoch}.{self._versions.get(resource, 0)}"
 
     # No reason to create another connectionId in this PoC, even though in real life that is necessary
     async def update_credential_definition_guid(self, credential_definition_guid:str, connectionId:str) ->  None:
         async with self._lock:
             self._credential_definition_guid = (credential_definition_guid, connectionId)
+            self._bump(CREDENTIAL_DEFINITION)
     async def get_credential_definition_guid(self) ->  tuple[str,str]:
         async with self._lock:
             return self._credential_definition_guid
@@ -19,36 +64,64 @@ class AsyncMockDB:
     async def add_identity(self, name: str, currentdid: str) -> None:
         """
             If non existent, adds a record {$name": {"current_did": str,
-                                                     "older_dids: [], 
+                                                     "current_since": float,
+                                                     "history": [], 
                                                     }
                                             }.
 
-            Otherwise, just updates "current_did" and "older_dids".
+            Otherwise, moves the current DID to "history", as a tuple
+            (did, since, until), and updates "current_did".
         """
+        now = time.time()
         async with self._lock:
             if name in self._identities:
                 identity = self._identities[name]
-                identity["older_dids"].append(identity["current_did"])
+                identity["history"].append((identity["current_did"], identity["current_since"], now))
                 identity["current_did"] = currentdid
+                identity["current_since"] = now
             else:
                 self._identities[name] = {"current_did": currentdid,
-                                        "older_dids": []}
+                                          "current_since": now,
+                                          "history": []}
+            self._bump(identity_resource(name))
 
+    @staticmethod
+    def _view(identity: dict) -> dict:
+        history = identity["history"]
+        return identity_view(identity["current_did"], identity["current_since"], len(history),
+                             [did for did, _, _ in history[-INLINE_HISTORY_LIMIT:]])
 
     async def get_identity(self, name: str) -> dict | None:
         async with self._lock:
             try:
-                return self._identities[name]
+                return self._view(self._identities[name])
             except KeyError:
                 return None
 
+    async def get_did_history(self, name: str, offset: int = 0, limit: int = 50) -> dict | None:
+        """
+        Returns a page of the previous DIDs of `name`, newest first, each as
+        {"did", "since", "until"}, or None if the identity does not exist.
+        """
+        limit = max(1, min(limit, MAX_HISTORY_PAGE_SIZE))
+        offset = max(0, offset)
+        async with self._lock:
+            identity = self._identities.get(name)
+            if identity is None:
+                return None
+            history = identity["history"]
+            end = len(history) - offset
+            page = history[max(0, end - limit):max(0, end)]
+            items = [{"did": did, "since": since, "until": until} for did, since, until in reversed(page)]
+            return history_page(name, len(history), offset, limit, items)
+
     async def list_identities(self) -> list[dict[str, str|None]]:
         """
         Returns a list where each item is a dict containing the fields name,
-        current_did and older_dids.
+        current_did, current_since, older_dids (most recent only) and older_dids_count.
         """
         async with self._lock:
-            return [{"name": name, **identity_data} 
+            return [{"name": name, **self._view(identity_data)} 
                     for name, identity_data in self._identities.items()]
 
     async def get_trusted_issuers(self) -> list[str]:
@@ -59,6 +132,17 @@ class AsyncMockDB:
         async with self._lock:
             if issuer not in self._trusted_issuers:
                 self._trusted_issuers.append(issuer)
+                self._bump(TRUSTED_ISSUERS)
+
+    async def add_revoked_credential(self, thid: str) -> None:
+        async with self._lock:
+            if thid not in self._revoked_credentials:
+                self._revoked_credentials[thid] = time.time()
+                self._bump(REVOKED_CREDENTIALS)
+
+    async def get_revoked_credentials(self) -> list[str]:
+        async with self._lock:
+            return list(self._revoked_credentials)
 
     async def add_verified_data(self, identifier, verified_data):
         async with self._lock:
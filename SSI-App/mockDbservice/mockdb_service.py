@@ -1,10 +1,62 @@
-from fastapi import FastAPI, HTTPException
+import os
+import sys
+from typing import Awaitable, Callable
+from fastapi import FastAPI, HTTPException, Request, Response
 from pydantic import BaseModel
-from async_mock_db import AsyncMockDB  
+from async_mock_db import AsyncMockDB, TRUSTED_ISSUERS, CREDENTIAL_DEFINITION, REVOKED_CREDENTIALS, identity_resource
+from sqlite_mock_db import SQLiteMockDB
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "shared"))
+from fast_json import FastJSONResponse
+from http_compression import CompressionMiddleware
+from profiling import ProfilingMiddleware
+from tracing import TracingMiddleware
+
+# MOCKDB_BACKEND=memory keeps everything in this process (default, fine for a single
+# worker and for tests); MOCKDB_BACKEND=sqlite shares the state between uvicorn workers.
+MOCKDB_BACKEND = os.environ.get("MOCKDB_BACKEND", "memory")
+MOCKDB_SQLITE_PATH = os.environ.get("MOCKDB_SQLITE_PATH", "mockdb_data.db")
+
+def create_db() -> AsyncMockDB | SQLiteMockDB:
+    if MOCKDB_BACKEND == "memory":
+        return AsyncMockDB()
+    if MOCKDB_BACKEND == "sqlite":
+        return SQLiteMockDB(MOCKDB_SQLITE_PATH)
+    raise ValueError(f"Unknown MOCKDB_BACKEND '{MOCKDB_BACKEND}', expected 'memory' or 'sqlite'.")
 
 # --- FastAPI App & Mock DB Instance ---
-app = FastAPI(title="Async MockDB Service")
-db = AsyncMockDB()
+app = FastAPI(title="Async MockDB Service", default_response_class=FastJSONResponse)
+app.add_middleware(CompressionMiddleware)
+# Outermost, so profiles include compression. Opt-in: SSI_PROFILE=header|sample.
+app.add_middleware(ProfilingMiddleware, service="mockdb_service")
+# Opt-in: SSI_TRACING=1.
+app.add_middleware(TracingMiddleware, service="mockdb_service")
+db = create_db()
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tokens = {token.strip().removeprefix("W/") for token in if_none_match.split(",")}
+    return "*" in tokens or etag in tokens
+
+async def conditional_response(request: Request, resource: str, load: Callable[[], Awaitable[object]]) -> Response:
+    """
+    Answers 304 if the client's If-None-Match holds the current version of
+    `resource`, without loading or serializing it; otherwise the body from
+    `load()` with its ETag. The version is read before the body, so a
+    concurrent write can only make the client refetch, never keep stale data.
+    """
+    etag = f'"{await db.get_version(resource)}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(await load(), headers=headers)
 
 
 # --- Pydantic Models ---
@@ -40,19 +92,33 @@ async def list_identities():
     return identities
 
 @app.get("/identities/{name}")
-async def get_identity(name: str):
-    identity = await db.get_identity(name)
-    if not identity:
+async def get_identity(name: str, request: Request):
+    async def load():
+        identity = await db.get_identity(name)
+        if not identity:
+            raise HTTPException(status_code=404, detail="Identity not found")
+        return identity
+
+    return await conditional_response(request, identity_resource(name), load)
+
+@app.get("/identities/{name}/history")
+async def get_did_history(name: str, offset: int = 0, limit: int = 50):
+    """
+    Previous DIDs of an identity, newest first, `limit` at a time.
+    """
+    history = await db.get_did_history(name, offset, limit)
+    if history is None:
         raise HTTPException(status_code=404, detail="Identity not found")
 
-    return identity
+    return history
 
 
 @app.get("/trusted-issuers")
-async def get_trusted_issuers():
-    issuers = await db.get_trusted_issuers()
+async def get_trusted_issuers(request: Request):
+    async def load():
+        return {"trusted_issuers": await db.get_trusted_issuers()}
 
-    return {"trusted_issuers": issuers}
+    return await conditional_response(request, TRUSTED_ISSUERS, load)
 
 @app.post("/trusted-issuers/{issuer}")
 async def add_trusted_issuer(issuer: str):
@@ -74,19 +140,37 @@ async def set_credential_definition(payload: CredentialDefinitionPayload):
     return {"message": "Credential definition info updated successfully."}
 
 @app.get("/credential-definition")
-async def get_credential_definition():
+async def get_credential_definition(request: Request):
     """
     Retrieves the currently stored credential definition GUID and connection ID.
     """
-    guid, conn_id = await db.get_credential_definition_guid()
-    
-    if not guid or not conn_id:
-        raise HTTPException(
-            status_code=404, 
-            detail="Credential definition info has not been set yet."
-        )
-        
-    return {"credential_guid": guid, "connectionId": conn_id}
+    async def load():
+        guid, conn_id = await db.get_credential_definition_guid()
+
+        if not guid or not conn_id:
+            raise HTTPException(
+                status_code=404, 
+                detail="Credential definition info has not been set yet."
+            )
+
+        return {"credential_guid": guid, "connectionId": conn_id}
+
+    return await conditional_response(request, CREDENTIAL_DEFINITION, load)
+
+@app.get("/revoked-credentials")
+async def get_revoked_credentials(request: Request):
+    """
+    Thread ids (thid) of the revoked credentials, so holders stop presenting them.
+    """
+    async def load():
+        return {"revoked_credentials": await db.get_revoked_credentials()}
+
+    return await conditional_response(request, REVOKED_CREDENTIALS, load)
+
+@app.post("/revoked-credentials/{thid}")
+async def add_revoked_credential(thid: str):
+    await db.add_revoked_credential(thid)
+    return {"message": f"Credential of thread '{thid}' marked as revoked."}
 
 @app.get("/verified-data/{identifier}")
 async def get_verified_data(identifier: str):
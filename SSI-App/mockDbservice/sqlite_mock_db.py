@@ -0,0 +1,243 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+from async_mock_db import (INLINE_HISTORY_LIMIT, MAX_HISTORY_PAGE_SIZE, TRUSTED_ISSUERS, CREDENTIAL_DEFINITION,
+                           REVOKED_CREDENTIALS,
+                           identity_resource, identity_view, history_page)
+
+# Several uvicorn workers share the file; a writer waits this long for the lock.
+BUSY_TIMEOUT_SECONDS = 10
+
+class SQLiteMockDB:
+    """
+    Same interface as AsyncMockDB, but the state lives in a SQLite file in WAL
+    mode, so every uvicorn worker of mockdb_service sees the same data and
+    reads never wait for writes.
+
+    Each thread of the asyncio.to_thread pool keeps its own connection, so
+    reads run in parallel without reopening the file on every call.
+    """
+    def __init__(self, path: str):
+        self._path = path
+        self._local = threading.local()
+        self._init_db()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode: transactions are opened explicitly where needed.
+            conn = sqlite3.connect(self._path, timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self) -> None:
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+        CREATE TABLE IF NOT EXISTS identities (
+            name TEXT PRIMARY KEY,
+            current_did TEXT NOT NULL,
+            current_since REAL
+        );
+        CREATE TABLE IF NOT EXISTS older_dids (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            did TEXT NOT NULL,
+            since REAL,
+            until REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_older_dids_name ON older_dids (name, id);
+        CREATE TABLE IF NOT EXISTS trusted_issuers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            issuer TEXT NOT NULL UNIQUE
+        );
+        CREATE TABLE IF NOT EXISTS credential_definition (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            credential_guid TEXT NOT NULL,
+            connection_id TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS verified_data (
+            identifier TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS revoked_credentials (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            thid TEXT NOT NULL UNIQUE,
+            revoked_at REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS resource_versions (
+            resource TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS metadata (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        """)
+        # Set once per file, so every worker builds the same versions.
+        conn.execute("INSERT OR IGNORE INTO metadata (key, value) VALUES ('epoch', ?)", (uuid.uuid4().hex[:12],))
+        self._epoch = conn.execute("SELECT value FROM metadata WHERE key = 'epoch'").fetchone()[0]
+        # Files created before DIDs had timestamps.
+        for table, column in (("identities", "current_since"), ("older_dids", "since"), ("older_dids", "until")):
+            if column not in {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} REAL")
+
+    # --- Synchronous implementations, run in a worker thread ---
+
+    @staticmethod
+    def _bump_sync(conn: sqlite3.Connection, resource: str) -> None:
+        # Always after the write it accounts for: a reader may pair an old version
+        # with new content (and just refetch later), never the other way round.
+        conn.execute("INSERT INTO resource_versions (resource, version) VALUES (?, 1) "
+                     "ON CONFLICT(resource) DO UPDATE SET version = version + 1", (resource,))
+
+    def _get_version_sync(self, resource: str) -> str:
+        row = self._connection().execute(
+            "SELECT version FROM resource_versions WHERE resource = ?", (resource,)).fetchone()
+        return f"{self._epoch}.{row[0] if row else 0}"
+
+    def _update_credential_definition_guid_sync(self, credential_definition_guid: str, connectionId: str) -> None:
+        conn = self._connection()
+        conn.execute(
+            "REPLACE INTO credential_definition (id, credential_guid, connection_id) VALUES (1, ?, ?)",
+            (credential_definition_guid, connectionId))
+        self._bump_sync(conn, CREDENTIAL_DEFINITION)
+
+    def _get_credential_definition_guid_sync(self) -> tuple[str, str]:
+        row = self._connection().execute(
+            "SELECT credential_guid, connection_id FROM credential_definition WHERE id = 1").fetchone()
+        return row if row else ("", "")
+
+    def _add_identity_sync(self, name: str, currentdid: str) -> None:
+        now = time.time()
+        conn = self._connection()
+        # IMMEDIATE takes the write lock up front, so two workers cannot both read the old DID.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT current_did, current_since FROM identities WHERE name = ?", (name,)).fetchone()
+            if row:
+                conn.execute("INSERT INTO older_dids (name, did, since, until) VALUES (?, ?, ?, ?)",
+                             (name, row[0], row[1], now))
+            # An upsert keeps the rowid, so identities stay listed in creation order.
+            conn.execute("INSERT INTO identities (name, current_did, current_since) VALUES (?, ?, ?) "
+                         "ON CONFLICT(name) DO UPDATE SET current_did = excluded.current_did, "
+                         "current_since = excluded.current_since", (name, currentdid, now))
+            self._bump_sync(conn, identity_resource(name))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _get_identity_sync(self, name: str) -> dict | None:
+        conn = self._connection()
+        row = conn.execute("SELECT current_did, current_since FROM identities WHERE name = ?", (name,)).fetchone()
+        if not row:
+            return None
+        count = conn.execute("SELECT COUNT(*) FROM older_dids WHERE name = ?", (name,)).fetchone()[0]
+        recent = [did for (did,) in conn.execute(
+            "SELECT did FROM older_dids WHERE name = ? ORDER BY id DESC LIMIT ?", (name, INLINE_HISTORY_LIMIT))]
+        return identity_view(row[0], row[1], count, recent[::-1])
+
+    def _get_did_history_sync(self, name: str, offset: int, limit: int) -> dict | None:
+        limit = max(1, min(limit, MAX_HISTORY_PAGE_SIZE))
+        offset = max(0, offset)
+        conn = self._connection()
+        if not conn.execute("SELECT 1 FROM identities WHERE name = ?", (name,)).fetchone():
+            return None
+        total = conn.execute("SELECT COUNT(*) FROM older_dids WHERE name = ?", (name,)).fetchone()[0]
+        items = [{"did": did, "since": since, "until": until} for did, since, until in conn.execute(
+            "SELECT did, since, until FROM older_dids WHERE name = ? ORDER BY id DESC LIMIT ? OFFSET ?",
+            (name, limit, offset))]
+        return history_page(name, total, offset, limit, items)
+
+    def _list_identities_sync(self) -> list[dict[str, str | None]]:
+        conn = self._connection()
+        counts = dict(conn.execute("SELECT name, COUNT(*) FROM older_dids GROUP BY name"))
+        recent = {}
+        for name, did in conn.execute("""
+                SELECT name, did FROM (
+                    SELECT name, did, id, ROW_NUMBER() OVER (PARTITION BY name ORDER BY id DESC) AS position
+                    FROM older_dids)
+                WHERE position <= ? ORDER BY id""", (INLINE_HISTORY_LIMIT,)):
+            recent.setdefault(name, []).append(did)
+        return [{"name": name, **identity_view(current_did, current_since, counts.get(name, 0), recent.get(name, []))}
+                for name, current_did, current_since in conn.execute(
+                    "SELECT name, current_did, current_since FROM identities ORDER BY rowid")]
+
+    def _get_trusted_issuers_sync(self) -> list[str]:
+        return [row[0] for row in self._connection().execute("SELECT issuer FROM trusted_issuers ORDER BY id")]
+
+    def _add_trusted_issuer_sync(self, issuer: str) -> None:
+        conn = self._connection()
+        if conn.execute("INSERT OR IGNORE INTO trusted_issuers (issuer) VALUES (?)", (issuer,)).rowcount:
+            self._bump_sync(conn, TRUSTED_ISSUERS)
+
+    def _add_revoked_credential_sync(self, thid: str) -> None:
+        conn = self._connection()
+        if conn.execute("INSERT OR IGNORE INTO revoked_credentials (thid, revoked_at) VALUES (?, ?)",
+                        (thid, time.time())).rowcount:
+            self._bump_sync(conn, REVOKED_CREDENTIALS)
+
+    def _get_revoked_credentials_sync(self) -> list[str]:
+        return [row[0] for row in self._connection().execute("SELECT thid FROM revoked_credentials ORDER BY id")]
+
+    def _add_verified_data_sync(self, identifier, verified_data) -> None:
+        self._connection().execute("REPLACE INTO verified_data (identifier, data) VALUES (?, ?)",
+                                   (identifier, json.dumps(verified_data)))
+
+    def _get_verified_data_sync(self, identifier):
+        row = self._connection().execute(
+            "SELECT data FROM verified_data WHERE identifier = ?", (identifier,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _delete_verified_data_sync(self, identifier) -> None:
+        self._connection().execute("DELETE FROM verified_data WHERE identifier = ?", (identifier,))
+
+    # --- AsyncMockDB interface ---
+
+    async def get_version(self, resource: str) -> str:
+        return await asyncio.to_thread(self._get_version_sync, resource)
+
+    async def update_credential_definition_guid(self, credential_definition_guid: str, connectionId: str) -> None:
+        await asyncio.to_thread(self._update_credential_definition_guid_sync, credential_definition_guid, connectionId)
+
+    async def get_credential_definition_guid(self) -> tuple[str, str]:
+        return await asyncio.to_thread(self._get_credential_definition_guid_sync)
+
+    async def add_identity(self, name: str, currentdid: str) -> None:
+        await asyncio.to_thread(self._add_identity_sync, name, currentdid)
+
+    async def get_identity(self, name: str) -> dict | None:
+        return await asyncio.to_thread(self._get_identity_sync, name)
+
+    async def get_did_history(self, name: str, offset: int = 0, limit: int = 50) -> dict | None:
+        return await asyncio.to_thread(self._get_did_history_sync, name, offset, limit)
+
+    async def list_identities(self) -> list[dict[str, str | None]]:
+        return await asyncio.to_thread(self._list_identities_sync)
+
+    async def get_trusted_issuers(self) -> list[str]:
+        return await asyncio.to_thread(self._get_trusted_issuers_sync)
+
+    async def add_trusted_issuer(self, issuer: str):
+        await asyncio.to_thread(self._add_trusted_issuer_sync, issuer)
+
+    async def add_revoked_credential(self, thid: str) -> None:
+        await asyncio.to_thread(self._add_revoked_credential_sync, thid)
+
+    async def get_revoked_credentials(self) -> list[str]:
+        return await asyncio.to_thread(self._get_revoked_credentials_sync)
+
+    async def add_verified_data(self, identifier, verified_data):
+        await asyncio.to_thread(self._add_verified_data_sync, identifier, verified_data)
+
+    async def get_verified_data(self, identifier):
+        return await asyncio.to_thread(self._get_verified_data_sync, identifier)
+
+    async def delete_verified_data(self, identifier):
+        await asyncio.to_thread(self._delete_verified_data_sync, identifier)
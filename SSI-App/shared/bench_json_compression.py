@@ -0,0 +1,156 @@
+# Compares CPU time and bytes on the wire of the JSON backends and response
+# encodings used by the SSI-App services, on payloads shaped like the large
+# ones they serve: agent credential record lists, chain-of-custody responses
+# and identity listings.
+#
+#   python3 shared/bench_json_compression.py --sizes 10 100 1000 --repeat 50
+import argparse
+import base64
+import json
+import os
+import random
+import time
+import uuid
+
+from fast_json import orjson
+from http_compression import ZstdCompressor, compress, MINIMUM_SIZE, GZIP_LEVEL, ZSTD_LEVEL
+
+
+def _hex(n: int) -> str:
+    return os.urandom(n).hex()
+
+
+def agent_records(n: int) -> dict:
+    """
+    Like GET /issue-credentials/records of a Cloud Agent.
+    """
+    records = []
+    for _ in range(n):
+        credential = {
+            "schema_id": f"http://caddy-issuer:8080/cloud-agent/schema-registry/schemas/{uuid.uuid4()}/schema",
+            "cred_def_id": f"http://caddy-issuer:8080/cloud-agent/credential-definition-registry/definitions/{uuid.uuid4()}/definition",
+            "values": {
+                "expert_name": {"raw": "Maria da Silva", "encoded": str(random.getrandbits(128))},
+                "evidence_hash": {"raw": _hex(32), "encoded": str(random.getrandbits(256))},
+                "subject_did": {"raw": f"did:prism:{_hex(32)}", "encoded": str(random.getrandbits(256))},
+                "authorization_level": {"raw": "2", "encoded": "2"},
+            },
+            "signature": {"p_credential": {"m_2": str(random.getrandbits(256)), "a": str(random.getrandbits(2048)),
+                                           "e": str(random.getrandbits(512)), "v": str(random.getrandbits(2048))}},
+        }
+        records.append({
+            "recordId": str(uuid.uuid4()),
+            "thid": str(uuid.uuid4()),
+            "credentialFormat": "AnonCreds",
+            "role": "Holder",
+            "protocolState": "CredentialReceived",
+            "createdAt": "2025-05-12T13:45:10.123456Z",
+            "updatedAt": "2025-05-12T13:45:42.654321Z",
+            "metaRetries": 5,
+            "credential": base64.b64encode(json.dumps(credential).encode()).decode(),
+        })
+    return {"contents": records, "kind": "IssueCredentialRecordPage", "pageOf": "", "self": ""}
+
+
+def chain_of_custody(n: int) -> list:
+    """
+    Like POST /chain-of-custody of the gateway.
+    """
+    evidence_hash = _hex(32)
+    return [{
+        "credential_id": str(uuid.uuid4()),
+        "previous_credential_id": str(uuid.uuid4()) if i else None,
+        "evidence_hash": evidence_hash,
+        "owner_did": f"did:prism:{_hex(32)}",
+        "tx_id": _hex(32),
+        "timestamp": f"2025-05-{1 + i % 28:02d}T10:00:00Z",
+        "evidence_record": {
+            "what": "Smartphone Samsung Galaxy S21, IMEI 3567890123456789",
+            "who": "Perito criminal Maria da Silva",
+            "when": "2025-05-12T13:45:10Z",
+            "where": "Instituto de Criminalística, Laboratório 3",
+            "why": "Extração de dados para o inquérito 1234/2025",
+            "how": "Extração física com Cellebrite UFED 7.60, hash verificado",
+        },
+    } for i in range(n)]
+
+
+def identities(n: int) -> list:
+    """
+    Like GET /identities of mockdb_service.
+    """
+    return [{
+        "name": f"Perito {i}",
+        "current_did": f"did:prism:{_hex(32)}",
+        "current_since": 1715521510.123 + i,
+        "older_dids": [f"did:prism:{_hex(32)}" for _ in range(5)],
+        "older_dids_count": 5 + i % 40,
+    } for i in range(n)]
+
+
+PAYLOADS = {"agent records": agent_records, "chain of custody": chain_of_custody, "identities": identities}
+
+
+def serializers() -> dict:
+    result = {"json": lambda obj: json.dumps(obj, ensure_ascii=False, allow_nan=False,
+                                             separators=(",", ":")).encode("utf-8")}
+    if orjson is not None:
+        result["orjson"] = lambda obj: orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return result
+
+
+def encodings(gzip_level: int, zstd_level: int) -> dict:
+    result = {"identity": lambda data: data,
+              "gzip": lambda data: compress(data, "gzip", gzip_level=gzip_level)}
+    if ZstdCompressor is not None:
+        result["zstd"] = lambda data: compress(data, "zstd", zstd_level=zstd_level)
+    return result
+
+
+def cpu_ms(function, argument, repeat: int) -> float:
+    start = time.process_time()
+    for _ in range(repeat):
+        function(argument)
+    return (time.process_time() - start) * 1000 / repeat
+
+
+def run(sizes: list[int], repeat: int, gzip_level: int = GZIP_LEVEL, zstd_level: int = ZSTD_LEVEL) -> None:
+    print(f"{'payload':<18}{'items':>7}  {'serializer':<11}{'encoding':<10}{'bytes':>12}{'ratio':>8}"
+          f"{'serialize ms':>14}{'encode ms':>11}{'total ms':>10}")
+    for payload_name, build in PAYLOADS.items():
+        for size in sizes:
+            payload = build(size)
+            for serializer_name, serialize in serializers().items():
+                body = serialize(payload)
+                serialize_ms = cpu_ms(serialize, payload, repeat)
+                for encoding_name, encode in encodings(gzip_level, zstd_level).items():
+                    if encoding_name != "identity" and len(body) < MINIMUM_SIZE:
+                        continue  # The middleware leaves small bodies alone.
+                    encoded = encode(body)
+                    encode_ms = cpu_ms(encode, body, repeat)
+                    print(f"{payload_name:<18}{size:>7}  {serializer_name:<11}{encoding_name:<10}{len(encoded):>12}"
+                          f"{len(encoded) / len(body):>8.2f}{serialize_ms:>14.3f}{encode_ms:>11.3f}"
+                          f"{serialize_ms + encode_ms:>10.3f}")
+    if orjson is None:
+        print("orjson is not installed: only the standard library serializer was measured.")
+    if ZstdCompressor is None:
+        print("zstd is not available (Python 3.14 or backports.zstd): only gzip was measured.")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        prog='JSON and compression benchmark',
+        description='CPU time and response size of the JSON serializers and encodings of the SSI-App services.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000],
+                        help='Number of items (records, chain links, identities) per payload.')
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--gzip-level', type=int, default=GZIP_LEVEL)
+    parser.add_argument('--zstd-level', type=int, default=ZSTD_LEVEL)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    random.seed(args.seed)
+    run(args.sizes, args.repeat, args.gzip_level, args.zstd_level)
@@ -0,0 +1,147 @@
+import argparse
+import hashlib
+import mmap
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+# The digest stored as `evidence_hash` in credentials and in the chain of custody.
+EVIDENCE_HASH_ALGORITHM = "sha256"
+DEFAULT_ALGORITHMS = ("sha256", "sha512")
+# SHA-256 (files and Merkle roots) or SHA-512, in hex.
+EVIDENCE_HASH_PATTERN = re.compile(r"[0-9a-fA-F]{64}|[0-9a-fA-F]{128}")
+CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def _new_hashers(algorithms) -> dict:
+    unknown = [name for name in algorithms if name not in hashlib.algorithms_available]
+    if unknown:
+        raise ValueError(f"Unsupported hash algorithm(s): {', '.join(unknown)}")
+    return {name: hashlib.new(name) for name in algorithms}
+
+
+def hash_file(path: str, algorithms=DEFAULT_ALGORITHMS, chunk_size: int = CHUNK_SIZE,
+              use_mmap: bool = False, progress=None) -> dict[str, str]:
+    """
+    Hashes a file with every algorithm in `algorithms` in a single pass over it.
+
+    The file is read in fixed-size chunks (or memory-mapped with `use_mmap`),
+    so memory use does not depend on the file size. Reading the next chunk
+    overlaps with hashing the current one, and each algorithm runs in its own
+    thread (hashlib releases the GIL), so extra algorithms are almost free.
+    `progress(bytes_done, total_bytes)` is called after every chunk.
+
+    Returns a dict {algorithm: hex digest}.
+    """
+    hashers = _new_hashers(algorithms)
+    total = os.path.getsize(path)
+    done = 0
+
+    if total <= chunk_size and not use_mmap:
+        # Small files (e.g. most of a phone extraction) fit in one read; skip the buffers and threads.
+        with open(path, "rb") as f:
+            data = f.read()
+        for h in hashers.values():
+            h.update(data)
+        if progress:
+            progress(len(data), total)
+        return {name: h.hexdigest() for name, h in hashers.items()}
+
+    with open(path, "rb") as f, ThreadPoolExecutor(max_workers=len(hashers)) as pool:
+        if use_mmap and total > 0:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    for offset in range(0, total, chunk_size):
+                        chunk = view[offset:offset + chunk_size]
+                        for future in [pool.submit(h.update, chunk) for h in hashers.values()]:
+                            future.result()
+                        chunk.release()
+                        done = min(offset + chunk_size, total)
+                        if progress:
+                            progress(done, total)
+                finally:
+                    view.release()
+        else:
+            # Double buffering: one buffer is being hashed while the other is filled.
+            buffers = (bytearray(chunk_size), bytearray(chunk_size))
+            pending = []
+            index = 0
+            while True:
+                buffer = buffers[index % 2]
+                read = f.readinto(buffer)
+                for future in pending:
+                    future.result()
+                if not read:
+                    break
+                chunk = memoryview(buffer)[:read]
+                pending = [pool.submit(h.update, chunk) for h in hashers.values()]
+                index += 1
+                done += read
+                if progress:
+                    progress(done, total)
+
+    return {name: h.hexdigest() for name, h in hashers.items()}
+
+
+def print_progress(done: int, total: int) -> None:
+    """
+    Progress callback for interactive use, printing on a single terminal line.
+    """
+    percent = 100.0 * done / total if total else 100.0
+    end = "\n" if done >= total else ""
+    print(f"\rCalculando hash: {percent:5.1f}% ({done / 2**20:.0f} MiB)", end=end, flush=True)
+
+
+def resolve_evidence_hash(value: str, algorithms=DEFAULT_ALGORITHMS, create: bool = False) -> str:
+    """
+    Returns the evidence hash for what the user typed: if `value` is the path of
+    an existing file the file is hashed (printing every digest computed), if it
+    is a directory its Merkle root is used, otherwise `value` is taken as the
+    hash itself, and must look like one (EVIDENCE_HASH_PATTERN): a mistyped path
+    raises ValueError instead of becoming the evidence hash.
+    Only `create` (registering a new evidence) writes a directory's manifest;
+    lookups use the root of the existing one, so they never replace the reference.
+    """
+    value = value.strip()
+    if os.path.isdir(value):
+        # Imported here: evidence_merkle builds on this module.
+        from evidence_merkle import hash_evidence_directory, evidence_directory_root
+        return hash_evidence_directory(value) if create else evidence_directory_root(value)
+    if not os.path.isfile(value):
+        if not EVIDENCE_HASH_PATTERN.fullmatch(value):
+            raise ValueError(f"'{value}' não é um caminho existente nem um hash SHA-256/SHA-512 em hexadecimal.")
+        return value
+    digests = hash_file(value, algorithms=algorithms, progress=print_progress)
+    for name, digest in digests.items():
+        print(f"{name}: {digest}")
+    return digests[EVIDENCE_HASH_ALGORITHM]
+
+
+def ask_evidence_hash(question: str, create: bool = False) -> str:
+    """
+    Prompts with `question` until the answer resolves to an evidence hash (see resolve_evidence_hash).
+    """
+    while True:
+        try:
+            return resolve_evidence_hash(input(question), create=create)
+        except ValueError as e:
+            print(e)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Hash evidence files in constant memory.")
+    parser.add_argument("path")
+    parser.add_argument("-a", "--algorithm", action="append", dest="algorithms",
+                        help=f"May be repeated. Default: {', '.join(DEFAULT_ALGORITHMS)}")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--mmap", action="store_true", help="Memory-map the file instead of reading chunks.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    digests = hash_file(args.path, algorithms=args.algorithms or DEFAULT_ALGORITHMS,
+                        chunk_size=args.chunk_size, use_mmap=args.mmap, progress=print_progress)
+    for name, digest in digests.items():
+        print(f"{name}  {digest}")
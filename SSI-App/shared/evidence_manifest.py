@@ -0,0 +1,163 @@
+import argparse
+import json
+import os
+
+from evidence_hashing import hash_file, EVIDENCE_HASH_ALGORITHM
+from evidence_merkle import (list_evidence_files, hash_files, leaf_hash, merkle_root,
+                             default_manifest_path, load_manifest, save_manifest)
+
+FAST = "fast"
+PARANOID = "paranoid"
+
+
+def _stat_unchanged(entry: dict, stat: os.stat_result) -> bool:
+    return (entry.get("size") == stat.st_size
+            and entry.get("mtime_ns") == stat.st_mtime_ns
+            and entry.get("inode") == stat.st_ino)
+
+
+def verify_directory(directory: str, manifest_path: str | None = None,
+                     expected_hash: str | None = None, mode: str = FAST,
+                     workers: int | None = None) -> dict:
+    """
+    Re-verifies an evidence directory against the manifest saved when it was hashed.
+
+    In FAST mode only files whose size, mtime or inode differ from the manifest
+    are rehashed; the others keep their recorded digest. PARANOID mode rehashes
+    every file. The recomputed Merkle root is compared with the manifest root
+    and, if given, with `expected_hash` (the evidence_hash recorded in the
+    chain of custody).
+
+    Stat information of files whose content did not change is refreshed in the
+    manifest, so they are skipped by the next fast run. Digests are never
+    rewritten: the manifest remains the reference.
+
+    Returns a report with the files that were "modified", "missing" or "added".
+    """
+    manifest_path = manifest_path or default_manifest_path(directory)
+    manifest = load_manifest(manifest_path)
+    recorded = {entry["path"]: entry for entry in manifest["files"]}
+    current_paths = list_evidence_files(directory)
+    current_set = set(current_paths)
+
+    missing = sorted(path for path in recorded if path not in current_set)
+    added = sorted(path for path in current_paths if path not in recorded)
+
+    to_rehash = []
+    reused = 0
+    for path in current_paths:
+        entry = recorded.get(path)
+        if entry is None:
+            continue
+        if mode == FAST and _stat_unchanged(entry, os.stat(os.path.join(directory, path))):
+            reused += 1
+            continue
+        to_rehash.append(path)
+
+    modified = []
+    fresh_digests = {}
+    stats_refreshed = False
+    for fresh in hash_files(directory, to_rehash + added, workers):
+        fresh_digests[fresh["path"]] = fresh["digest"]
+        entry = recorded.get(fresh["path"])
+        if entry is None:
+            continue
+        if fresh["digest"] != entry["digest"]:
+            modified.append(fresh["path"])
+        elif any(entry.get(key) != fresh[key] for key in ("size", "mtime_ns", "inode")):
+            entry.update(size=fresh["size"], mtime_ns=fresh["mtime_ns"], inode=fresh["inode"])
+            stats_refreshed = True
+    modified.sort()
+
+    # The root of what is on disk now: recorded digests for files that were not
+    # rehashed, fresh digests otherwise. Added files are part of it.
+    diverged = bool(modified or missing or added)
+    if diverged:
+        leaves = [leaf_hash(path, fresh_digests.get(path) or recorded[path]["digest"]) for path in current_paths]
+        current_root = merkle_root(leaves) if leaves else None
+    else:
+        current_root = manifest["root"]
+
+    if stats_refreshed:
+        save_manifest(manifest, manifest_path)
+
+    return {
+        "evidence": directory,
+        "mode": mode,
+        "intact": not diverged and current_root == manifest["root"]
+                  and (expected_hash is None or expected_hash == manifest["root"]),
+        "recorded_root": manifest["root"],
+        "current_root": current_root,
+        "expected_hash": expected_hash,
+        "manifest_matches_expected": None if expected_hash is None else expected_hash == manifest["root"],
+        "modified": modified,
+        "missing": missing,
+        "added": added,
+        "files_rehashed": len(to_rehash),
+        "files_reused": reused
+    }
+
+
+def verify_file(path: str, expected_hash: str) -> dict:
+    """
+    Single-file evidence has no manifest: its SHA-256 is the evidence_hash itself.
+    """
+    digest = hash_file(path, algorithms=(EVIDENCE_HASH_ALGORITHM,))[EVIDENCE_HASH_ALGORITHM]
+    return {
+        "evidence": path,
+        "mode": PARANOID,
+        "intact": digest == expected_hash,
+        "recorded_root": expected_hash,
+        "current_root": digest,
+        "expected_hash": expected_hash,
+        "modified": [] if digest == expected_hash else [os.path.basename(path)],
+        "missing": [],
+        "added": []
+    }
+
+
+def verify_evidence(path: str, expected_hash: str | None = None, mode: str = FAST,
+                    manifest_path: str | None = None, workers: int | None = None) -> dict:
+    if os.path.isdir(path):
+        return verify_directory(path, manifest_path, expected_hash, mode, workers)
+    if expected_hash is None:
+        raise ValueError("Verifying a single file requires the expected evidence hash.")
+    return verify_file(path, expected_hash)
+
+
+def print_report(report: dict) -> None:
+    print(f"Evidência: {report['evidence']} (modo {report['mode']})")
+    if report.get("manifest_matches_expected") is False:
+        print("ATENÇÃO: o manifesto não corresponde ao hash registrado na cadeia de custódia!")
+    for label, key in (("Modificados", "modified"), ("Ausentes", "missing"), ("Adicionados", "added")):
+        for path in report[key]:
+            print(f"  [{label}] {path}")
+    if "files_rehashed" in report:
+        print(f"Arquivos recalculados: {report['files_rehashed']}, reaproveitados: {report['files_reused']}")
+    print("ÍNTEGRA" if report["intact"] else "DIVERGENTE da cadeia de custódia")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Re-verify evidence on disk against its recorded hash.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    verify = subparsers.add_parser("verify")
+    verify.add_argument("path", help="Evidence file or directory.")
+    verify.add_argument("--expected-hash", default=None,
+                        help="evidence_hash recorded in the chain of custody.")
+    verify.add_argument("--paranoid", action="store_true", help="Rehash every file, ignoring stat information.")
+    verify.add_argument("--manifest", default=None)
+    verify.add_argument("--workers", type=int, default=None)
+    verify.add_argument("--report", default=None, help="Also write the report as JSON to this file.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = verify_evidence(args.path, args.expected_hash, PARANOID if args.paranoid else FAST,
+                             args.manifest, args.workers)
+    print_report(report)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    raise SystemExit(0 if report["intact"] else 1)
@@ -0,0 +1,247 @@
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from evidence_hashing import hash_file, EVIDENCE_HASH_ALGORITHM
+
+MANIFEST_VERSION = 1
+# Domain separation prefixes, so a leaf can never be passed off as an inner node.
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def list_evidence_files(directory: str) -> list[str]:
+    """
+    Returns the paths of all regular files under `directory`, relative to it,
+    using '/' separators and sorted, so the same tree always yields the same order.
+    Symbolic links are not followed.
+    """
+    files = []
+    for root, dirs, names in os.walk(directory):
+        dirs.sort()
+        for name in names:
+            full_path = os.path.join(root, name)
+            if os.path.isfile(full_path) and not os.path.islink(full_path):
+                files.append(os.path.relpath(full_path, directory).replace(os.sep, "/"))
+    return sorted(files)
+
+
+def leaf_hash(relative_path: str, file_digest: str) -> str:
+    """
+    The Merkle leaf binds a file's digest to its path inside the evidence.
+    """
+    data = LEAF_PREFIX + relative_path.encode("utf-8") + b"\x00" + bytes.fromhex(file_digest)
+    return hashlib.sha256(data).hexdigest()
+
+
+def _node_hash(left: str, right: str) -> str:
+    return hashlib.sha256(NODE_PREFIX + bytes.fromhex(left) + bytes.fromhex(right)).hexdigest()
+
+
+def merkle_levels(leaves: list[str]) -> list[list[str]]:
+    """
+    Returns every level of the tree, from the leaves up to the root.
+    An odd node at the end of a level is promoted unchanged to the next one.
+    """
+    if not leaves:
+        raise ValueError("Cannot build a Merkle tree without leaves.")
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [_node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def merkle_root(leaves: list[str]) -> str:
+    return merkle_levels(leaves)[-1][0]
+
+
+def merkle_proof(leaves: list[str], index: int) -> list[dict]:
+    """
+    Returns the audit path of leaf `index`: the sibling hashes, bottom-up,
+    with the side they must be concatenated on.
+    """
+    proof = []
+    for level in merkle_levels(leaves)[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append({"side": "left" if sibling < index else "right", "hash": level[sibling]})
+        index //= 2
+    return proof
+
+
+def verify_merkle_proof(leaf: str, proof: list[dict], root: str) -> bool:
+    current = leaf
+    for step in proof:
+        if step["side"] == "left":
+            current = _node_hash(step["hash"], current)
+        else:
+            current = _node_hash(current, step["hash"])
+    return current == root
+
+
+def _hash_evidence_file(args: tuple[str, str]) -> dict:
+    directory, relative_path = args
+    full_path = os.path.join(directory, relative_path)
+    # Stat before reading: a file modified while being hashed then looks changed on the next run.
+    stat = os.stat(full_path)
+    digest = hash_file(full_path, algorithms=(EVIDENCE_HASH_ALGORITHM,))[EVIDENCE_HASH_ALGORITHM]
+    return {
+        "path": relative_path,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "inode": stat.st_ino,
+        "digest": digest
+    }
+
+
+def hash_files(directory: str, relative_paths: list[str], workers: int | None = None) -> list[dict]:
+    """
+    Hashes the given files in a process pool. Returns one entry per file, in
+    the same order, with its path, size, mtime_ns, inode and digest.
+    """
+    if not relative_paths:
+        return []
+    workers = workers or os.cpu_count() or 1
+    # Many small files: hand them to the workers in batches to amortize IPC.
+    chunksize = max(1, len(relative_paths) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_hash_evidence_file,
+                             [(directory, path) for path in relative_paths],
+                             chunksize=chunksize))
+
+
+def hash_directory(directory: str, workers: int | None = None) -> dict:
+    """
+    Hashes every file under `directory` in a process pool and combines the
+    results into a Merkle root.
+
+    Returns the manifest {"version", "algorithm", "root", "files"}, where
+    "files" keeps, in leaf order, each file's path, size, mtime_ns, inode,
+    digest and leaf hash, so a single file can later be proven part of the
+    evidence and unchanged files can be skipped when re-verifying.
+    """
+    relative_paths = list_evidence_files(directory)
+    if not relative_paths:
+        raise ValueError(f"No files found in {directory}.")
+
+    files = hash_files(directory, relative_paths, workers)
+    for entry in files:
+        entry["leaf"] = leaf_hash(entry["path"], entry["digest"])
+    return {
+        "version": MANIFEST_VERSION,
+        "algorithm": EVIDENCE_HASH_ALGORITHM,
+        "root": merkle_root([entry["leaf"] for entry in files]),
+        "files": files
+    }
+
+
+def default_manifest_path(directory: str) -> str:
+    """
+    The manifest is stored next to the evidence directory, never inside it,
+    so it does not become part of the evidence itself.
+    """
+    return os.path.normpath(os.path.abspath(directory)) + ".merkle.json"
+
+
+def save_manifest(manifest: dict, path: str) -> None:
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(tmp_path, path)
+
+
+def load_manifest(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def prove_file(manifest: dict, relative_path: str) -> dict:
+    """
+    Builds the inclusion proof of one file from a saved manifest, without rehashing anything.
+    Raises KeyError if the file is not part of the evidence.
+    """
+    leaves = [entry["leaf"] for entry in manifest["files"]]
+    for index, entry in enumerate(manifest["files"]):
+        if entry["path"] == relative_path:
+            return {
+                "path": relative_path,
+                "digest": entry["digest"],
+                "root": manifest["root"],
+                "proof": merkle_proof(leaves, index)
+            }
+    raise KeyError(f"{relative_path} is not part of this evidence.")
+
+
+def check_file(file_path: str, proof: dict) -> bool:
+    """
+    Rehashes only `file_path` and checks it against an inclusion proof.
+    """
+    digest = hash_file(file_path, algorithms=(EVIDENCE_HASH_ALGORITHM,))[EVIDENCE_HASH_ALGORITHM]
+    return verify_merkle_proof(leaf_hash(proof["path"], digest), proof["proof"], proof["root"])
+
+
+def hash_evidence_directory(directory: str, manifest_path: str | None = None,
+                            workers: int | None = None) -> str:
+    """
+    Hashes a directory, saves its manifest and returns the Merkle root to be used as evidence_hash.
+    """
+    manifest = hash_directory(directory, workers)
+    manifest_path = manifest_path or default_manifest_path(directory)
+    save_manifest(manifest, manifest_path)
+    print(f"{len(manifest['files'])} arquivos. Manifesto salvo em {manifest_path}")
+    return manifest["root"]
+
+
+def evidence_directory_root(directory: str, manifest_path: str | None = None,
+                            workers: int | None = None) -> str:
+    """
+    Returns the Merkle root identifying an already registered evidence directory,
+    without writing its manifest: the root saved when the evidence was created, or
+    the root hashed now if there is no manifest. Whether the files still match is
+    checked by evidence_manifest.verify_evidence, never by rewriting the manifest.
+    """
+    manifest_path = manifest_path or default_manifest_path(directory)
+    if os.path.isfile(manifest_path):
+        print(f"Raiz lida do manifesto {manifest_path}")
+        return load_manifest(manifest_path)["root"]
+    manifest = hash_directory(directory, workers)
+    print(f"{len(manifest['files'])} arquivos. Nenhum manifesto salvo para esta evidência.")
+    return manifest["root"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Merkle-root hashing of evidence directories.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Hash a directory and save its manifest.")
+    build.add_argument("directory")
+    build.add_argument("--manifest", default=None)
+    build.add_argument("--workers", type=int, default=None)
+
+    prove = subparsers.add_parser("prove", help="Print the inclusion proof of one file.")
+    prove.add_argument("manifest")
+    prove.add_argument("path", help="Path of the file relative to the evidence directory.")
+
+    check = subparsers.add_parser("check", help="Check one file against an inclusion proof.")
+    check.add_argument("file")
+    check.add_argument("proof", help="JSON file written by 'prove'.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.command == "build":
+        print(hash_evidence_directory(args.directory, args.manifest, args.workers))
+    elif args.command == "prove":
+        print(json.dumps(prove_file(load_manifest(args.manifest), args.path), indent=2))
+    elif args.command == "check":
+        with open(args.proof, "r", encoding="utf-8") as f:
+            valid = check_file(args.file, json.load(f))
+        print("OK: o arquivo pertence à evidência." if valid else "FALHA: o arquivo não corresponde à evidência.")
+        raise SystemExit(0 if valid else 1)
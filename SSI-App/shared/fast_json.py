@@ -0,0 +1,63 @@
+import json
+import os
+
+import aiohttp
+from starlette.responses import JSONResponse
+
+from profiling import profiled, http_trace_config
+from tracing import tracing_client_middleware
+
+try:
+    import orjson
+except ImportError:  # Optional: `pip install orjson` for faster (de)serialization.
+    orjson = None
+
+# auto: orjson when installed, otherwise the standard library. json forces the standard library.
+JSON_BACKEND = os.environ.get("SSI_JSON_BACKEND", "auto")
+if JSON_BACKEND not in ("auto", "orjson", "json"):
+    raise ValueError(f"Unknown SSI_JSON_BACKEND '{JSON_BACKEND}', expected 'auto', 'orjson' or 'json'.")
+if JSON_BACKEND == "orjson" and orjson is None:
+    raise ImportError("SSI_JSON_BACKEND=orjson but orjson is not installed.")
+USE_ORJSON = orjson is not None and JSON_BACKEND != "json"
+
+
+@profiled("json")
+def dumps(obj) -> bytes:
+    """
+    Compact UTF-8 JSON, as Starlette's JSONResponse renders it.
+    """
+    if USE_ORJSON:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def dumps_str(obj) -> str:
+    return dumps(obj).decode("utf-8")
+
+
+@profiled("json")
+def loads(data: bytes | str):
+    if USE_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with `dumps`; the default response class of the SSI-App services.
+    """
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def client_session(**kwargs) -> aiohttp.ClientSession:
+    """
+    aiohttp session serializing request bodies with `dumps`, timing its
+    requests for profiled endpoints and propagating the trace context. aiohttp already asks for gzip/deflate (and
+    zstd when backports.zstd is installed) and decompresses responses; read
+    large bodies with `response.json(loads=loads)`.
+    """
+    kwargs.setdefault("json_serialize", dumps_str)
+    kwargs["trace_configs"] = [*kwargs.get("trace_configs", ()), http_trace_config()]
+    kwargs["middlewares"] = (*kwargs.get("middlewares", ()), tracing_client_middleware)
+    return aiohttp.ClientSession(**kwargs)
@@ -0,0 +1,72 @@
+from collections import OrderedDict
+
+import aiohttp
+
+from fast_json import client_session
+
+
+class ConditionalGetCache:
+    """
+    Client-side cache of JSON GET responses that carry an ETag, keyed by URL.
+
+    A cached URL is requested again with If-None-Match, so an unchanged
+    resource comes back as an empty 304 and the cached body is reused.
+    Least recently used URLs are evicted beyond `max_entries`.
+    """
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[str, object]] = OrderedDict()
+
+    def get(self, url: str) -> tuple[str, object] | None:
+        entry = self._entries.get(url)
+        if entry is not None:
+            self._entries.move_to_end(url)
+        return entry
+
+    def put(self, url: str, etag: str, body: object) -> None:
+        self._entries[url] = (etag, body)
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, url: str) -> None:
+        self._entries.pop(url, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+# Shared by every call made from this process.
+http_cache = ConditionalGetCache()
+
+
+async def get_json(url: str, session: aiohttp.ClientSession | None = None,
+                   cache: ConditionalGetCache = http_cache) -> tuple[int, object]:
+    """
+    GETs `url` revalidating any cached response. Returns (status, body), where
+    a 304 is reported as 200 with the cached body; error bodies are returned
+    as text and drop the cached entry.
+    """
+    cached = cache.get(url)
+    headers = {"Accept": "application/json"}
+    if cached:
+        headers["If-None-Match"] = cached[0]
+
+    own_session = session is None
+    if own_session:
+        session = client_session()
+    try:
+        async with session.get(url, headers=headers) as response:
+            if response.status == 304 and cached:
+                return 200, cached[1]
+            if response.status != 200:
+                cache.invalidate(url)
+                return response.status, await response.text()
+            body = await response.json()
+            etag = response.headers.get("ETag")
+            if etag:
+                cache.put(url, etag, body)
+            return 200, body
+    finally:
+        if own_session:
+            await session.close()
@@ -0,0 +1,145 @@
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    from compression.zstd import ZstdCompressor  # Python 3.14+
+except ImportError:
+    try:
+        from backports.zstd import ZstdCompressor  # Same module aiohttp uses to decode zstd.
+    except ImportError:
+        ZstdCompressor = None
+
+# Smaller bodies cost more to compress than they save on the wire.
+MINIMUM_SIZE = 1024
+# Low levels: most of the size reduction for a fraction of the CPU time
+# (see bench_json_compression.py); the services mostly talk over localhost.
+GZIP_LEVEL = 1
+ZSTD_LEVEL = 3
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+
+def available_encodings() -> tuple[str, ...]:
+    """
+    Encodings this process can produce, preferred first.
+    """
+    return ("zstd", "gzip") if ZstdCompressor is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: str, encodings: tuple[str, ...] | None = None) -> str | None:
+    """
+    Picks the preferred of `encodings` the client accepts (q > 0) per its Accept-Encoding header, or None.
+    """
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    for encoding in encodings or available_encodings():
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, zstd_level: int):
+        if encoding == "zstd":
+            self._compressor = ZstdCompressor(level=zstd_level)
+        else:
+            # wbits 31: gzip container.
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+
+def compress(data: bytes, encoding: str, gzip_level: int = GZIP_LEVEL, zstd_level: int = ZSTD_LEVEL) -> bytes:
+    compressor = _Compressor(encoding, gzip_level, zstd_level)
+    return compressor.compress(data) + compressor.flush()
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing JSON and text responses of at least
+    `minimum_size` bytes with zstd or gzip, whichever the client prefers among
+    the available ones. Streamed responses are compressed chunk by chunk.
+    Responses that already carry a Content-Encoding pass through untouched.
+    """
+    def __init__(self, app, minimum_size: int = MINIMUM_SIZE,
+                 gzip_level: int = GZIP_LEVEL, zstd_level: int = ZSTD_LEVEL):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.zstd_level = zstd_level
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, _CompressingSend(send, encoding, self))
+
+
+class _CompressingSend:
+    def __init__(self, send, encoding: str, middleware: CompressionMiddleware):
+        self._send = send
+        self._encoding = encoding
+        self._middleware = middleware
+        self._start = None
+        self._compressor = None
+        self._passthrough = False
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            # Held back until the first body chunk shows whether to compress.
+            self._start = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+        if self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self._compressor is None:
+            headers = MutableHeaders(raw=self._start["headers"])
+            content_type = headers.get("content-type", "")
+            if ("content-encoding" in headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                    or (not more_body and len(body) < self._middleware.minimum_size)):
+                self._passthrough = True
+                await self._send(self._start)
+                await self._send(message)
+                return
+            self._compressor = _Compressor(self._encoding, self._middleware.gzip_level, self._middleware.zstd_level)
+            headers["Content-Encoding"] = self._encoding
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                del headers["content-length"]
+            else:
+                body = self._compressor.compress(body) + self._compressor.flush()
+                headers["Content-Length"] = str(len(body))
+                await self._send(self._start)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+            await self._send(self._start)
+
+        body = self._compressor.compress(body)
+        if not more_body:
+            body += self._compressor.flush()
+        await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
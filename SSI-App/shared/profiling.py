@@ -0,0 +1,206 @@
+import cProfile
+import functools
+import json
+import os
+import random
+import re
+import time
+from contextvars import ContextVar
+from types import SimpleNamespace
+
+import aiohttp
+
+# off: never profile (default). header: only requests sent with "X-Profile: 1".
+# sample: also a random SSI_PROFILE_SAMPLE_RATE fraction of all requests.
+PROFILE_MODE = os.environ.get("SSI_PROFILE", "off")
+PROFILE_SAMPLE_RATE = float(os.environ.get("SSI_PROFILE_SAMPLE_RATE", "0.01"))
+PROFILE_DIR = os.environ.get("SSI_PROFILE_DIR", "profiles")
+PROFILE_HEADER = "x-profile"
+if PROFILE_MODE not in ("off", "header", "sample"):
+    raise ValueError(f"Unknown SSI_PROFILE '{PROFILE_MODE}', expected 'off', 'header' or 'sample'.")
+
+# Breakdown of the request being profiled in this task, if any.
+_breakdown: ContextVar["Breakdown | None"] = ContextVar("profiling_breakdown", default=None)
+
+
+class Breakdown:
+    """
+    Wall time a profiled request spent per category (e.g. "http localhost:8083", "json").
+    """
+    def __init__(self):
+        self.seconds: dict[str, float] = {}
+        self.counts: dict[str, int] = {}
+
+    def add(self, category: str, seconds: float) -> None:
+        self.seconds[category] = self.seconds.get(category, 0.0) + seconds
+        self.counts[category] = self.counts.get(category, 0) + 1
+
+
+def record(category: str, seconds: float) -> None:
+    """
+    Adds `seconds` to `category` if the current request is being profiled.
+    """
+    breakdown = _breakdown.get()
+    if breakdown is not None:
+        breakdown.add(category, seconds)
+
+
+def profiled(category: str):
+    """
+    Decorator timing every call of a (synchronous) function into the current request's breakdown.
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _breakdown.get() is None:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(category, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def http_trace_config() -> aiohttp.TraceConfig:
+    """
+    aiohttp TraceConfig adding the time of every outbound request to the breakdown, per host.
+    """
+    async def on_request_start(session, context, params):
+        context.start = time.perf_counter()
+
+    async def on_request_end(session, context, params):
+        record(f"http {params.url.host}:{params.url.port}", time.perf_counter() - context.start)
+
+    trace_config = aiohttp.TraceConfig(trace_config_ctx_factory=SimpleNamespace)
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_end)
+    return trace_config
+
+
+def _safe_name(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", text).strip("_") or "root"
+
+
+class ProfilingMiddleware:
+    """
+    Opt-in ASGI profiling. A profiled request gets:
+    - a cProfile dump (pstats format: `python -m pstats`, snakeviz) in
+      PROFILE_DIR, unless another request of this process is already being
+      CPU-profiled: cProfile allows one profiler per thread, and it also
+      counts whatever else the event loop ran in the meantime;
+    - a line in PROFILE_DIR/summary.jsonl with wall and CPU time and the
+      wall time spent in outbound HTTP (per host) and JSON handling; the
+      rest is time in the handler itself, blocking calls included.
+    Unprofiled requests only pay a header lookup (and a random draw when sampling).
+    """
+    def __init__(self, app, service: str, mode: str = PROFILE_MODE,
+                 sample_rate: float = PROFILE_SAMPLE_RATE, output_dir: str = PROFILE_DIR):
+        self.app = app
+        self.service = service
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.output_dir = output_dir
+        self._cpu_profile_busy = False
+
+    def _wanted(self, scope) -> bool:
+        if self.mode == "off" or scope["type"] != "http":
+            return False
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER.encode() and value.strip() in (b"1", b"true"):
+                return True
+        return self.mode == "sample" and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if not self._wanted(scope):
+            await self.app(scope, receive, send)
+            return
+
+        status = None
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        profiler = None
+        if not self._cpu_profile_busy:
+            self._cpu_profile_busy = True
+            profiler = cProfile.Profile()
+        breakdown = Breakdown()
+        token = _breakdown.set(breakdown)
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
+        try:
+            if profiler:
+                profiler.enable()
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if profiler:
+                profiler.disable()
+                self._cpu_profile_busy = False
+            wall = time.perf_counter() - wall_start
+            cpu = time.thread_time() - cpu_start
+            _breakdown.reset(token)
+            self._write(scope, status, wall, cpu, breakdown, profiler)
+
+    def _write(self, scope, status, wall: float, cpu: float, breakdown: Breakdown, profiler) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        route = scope.get("route")
+        path = getattr(route, "path", scope["path"])
+        now = time.time()
+        profile_path = None
+        if profiler:
+            profile_path = os.path.join(
+                self.output_dir,
+                f"{self.service}-{scope['method']}-{_safe_name(path)}-{int(now * 1000)}-{os.getpid()}.prof")
+            profiler.dump_stats(profile_path)
+        accounted = sum(breakdown.seconds.values())
+        summary = {
+            "at": now,
+            "service": self.service,
+            "pid": os.getpid(),
+            "method": scope["method"],
+            "route": path,
+            "status": status,
+            "wall_ms": round(wall * 1000, 3),
+            # Event loop thread: includes other requests interleaved with this one.
+            "cpu_ms": round(cpu * 1000, 3),
+            "breakdown_ms": {category: round(seconds * 1000, 3) for category, seconds in breakdown.seconds.items()},
+            "calls": breakdown.counts,
+            "handler_ms": round(max(0.0, wall - accounted) * 1000, 3),
+            "profile": profile_path,
+        }
+        with open(os.path.join(self.output_dir, "summary.jsonl"), "a") as f:
+            f.write(json.dumps(summary) + "\n")
+
+
+def summarize(summary_path: str) -> None:
+    """
+    Prints, per service and route, the number of profiled requests, median and
+    p95 wall time, and the mean share of each breakdown category.
+    """
+    by_route: dict[tuple[str, str], list[dict]] = {}
+    with open(summary_path) as f:
+        for line in f:
+            entry = json.loads(line)
+            by_route.setdefault((entry["service"], f'{entry["method"]} {entry["route"]}'), []).append(entry)
+    for (service, route), entries in sorted(by_route.items()):
+        walls = sorted(entry["wall_ms"] for entry in entries)
+        p50 = walls[len(walls) // 2]
+        p95 = walls[min(len(walls) - 1, int(len(walls) * 0.95))]
+        totals: dict[str, float] = {"handler": sum(entry["handler_ms"] for entry in entries)}
+        for entry in entries:
+            for category, ms in entry["breakdown_ms"].items():
+                totals[category] = totals.get(category, 0.0) + ms
+        wall_total = sum(walls) or 1.0
+        shares = ", ".join(f"{category} {100 * ms / wall_total:.0f}%"
+                           for category, ms in sorted(totals.items(), key=lambda item: -item[1]))
+        print(f"{service} {route}: {len(entries)} request(s), p50 {p50:.1f} ms, p95 {p95:.1f} ms ({shares})")
+
+
+if __name__ == "__main__":
+    import sys
+    summarize(sys.argv[1] if len(sys.argv) > 1 else os.path.join(PROFILE_DIR, "summary.jsonl"))
@@ -0,0 +1,185 @@
+# Reads the spans recorded with SSI_TRACING=1 and prints, for one trace, its
+# span tree and its critical path: the chain of spans that determined the end-to-end
+# latency, with the time each hop contributed. With --summary, the contributions are
+# added up over every trace, to see which hop dominates in general.
+#
+#   python3 shared/trace_critical_path.py traces/spans.jsonl              # slowest trace
+#   python3 shared/trace_critical_path.py traces/spans.jsonl --trace-id <id>
+#   python3 shared/trace_critical_path.py traces/spans.jsonl --summary
+import argparse
+import json
+
+from tracing import TRACE_FILE
+
+# Ports of the services and agents of a local deployment.
+PEER_NAMES = {
+    "8080": "issuer/verifier agent",
+    "8083": "holder agent",
+    "5000": "webhook_handler",
+    "5001": "holder_api",
+    "5017": "verifier_api",
+    "49152": "mockdb_service",
+    "3000": "gateway",
+}
+
+
+def load_traces(path: str) -> dict[str, list[dict]]:
+    traces: dict[str, list[dict]] = {}
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                span = json.loads(line)
+                traces.setdefault(span["trace_id"], []).append(span)
+    return traces
+
+
+def hop(span: dict) -> str:
+    """
+    Who the time of a span is spent in: its service, or for the self time of a
+    client span, the peer (an agent, or a service whose own span is missing).
+    """
+    if span["kind"] == "client":
+        peer = span["attributes"].get("peer", "")
+        return PEER_NAMES.get(peer.rsplit(":", 1)[-1], peer)
+    return span["service"]
+
+
+class TraceTree:
+    def __init__(self, spans: list[dict]):
+        self.spans = {span["span_id"]: span for span in spans}
+        self.children: dict[str | None, list[dict]] = {}
+        for span in spans:
+            parent = span["parent_id"] if span["parent_id"] in self.spans else None
+            self.children.setdefault(parent, []).append(span)
+        for children in self.children.values():
+            children.sort(key=lambda span: span["start"])
+        self._effective_end: dict[str, float] = {}
+
+    @property
+    def roots(self) -> list[dict]:
+        return self.children.get(None, [])
+
+    def effective_end(self, span: dict) -> float:
+        """
+        End of the span or of its latest descendant: work it started (e.g. after
+        an agent webhook) may finish after it returned.
+        """
+        span_id = span["span_id"]
+        if span_id not in self._effective_end:
+            self._effective_end[span_id] = max([span["end"]] + [self.effective_end(child)
+                                                                 for child in self.children.get(span_id, [])])
+        return self._effective_end[span_id]
+
+    def start(self) -> float:
+        return min(span["start"] for span in self.roots)
+
+    def end(self) -> float:
+        return max(self.effective_end(span) for span in self.roots)
+
+    def critical_path(self) -> list[tuple[dict, float, float]]:
+        """
+        Returns (span, from, to) segments, in time order, during which `span`
+        itself (not a child) was what the trace was waiting for.
+        """
+        segments: list[tuple[dict, float, float]] = []
+        cursor = self.end()
+        # Several roots (e.g. a trace continued by an untraced caller): walk them like siblings.
+        for root in sorted(self.roots, key=self.effective_end, reverse=True):
+            if root["start"] >= cursor:
+                continue
+            self._walk(root, min(cursor, self.effective_end(root)), segments)
+            cursor = root["start"]
+        segments.reverse()
+        return segments
+
+    def _walk(self, span: dict, cursor: float, segments: list) -> None:
+        # Backwards from the end: the child finishing last is what the span waited for,
+        # then whatever finished last before that child started, and so on.
+        children = sorted(self.children.get(span["span_id"], []), key=self.effective_end, reverse=True)
+        for child in children:
+            child_end = min(self.effective_end(child), cursor)
+            if child["start"] >= cursor or child_end <= span["start"]:
+                continue
+            if child_end < cursor:
+                segments.append((span, child_end, cursor))
+            self._walk(child, child_end, segments)
+            cursor = child["start"]
+        if cursor > span["start"]:
+            segments.append((span, span["start"], cursor))
+
+
+def print_tree(tree: TraceTree, critical: set[str]) -> None:
+    origin = tree.start()
+
+    def visit(span: dict, depth: int) -> None:
+        marker = "*" if span["span_id"] in critical else " "
+        status = span["attributes"].get("status", "")
+        print(f"{marker} {'  ' * depth}{span['name']} [{hop(span) if span['kind'] == 'client' else span['service']}] "
+              f"+{(span['start'] - origin) * 1000:.1f} ms, {span['duration_ms']:.1f} ms {status}")
+        for child in tree.children.get(span["span_id"], []):
+            visit(child, depth + 1)
+
+    for root in tree.roots:
+        visit(root, 0)
+
+
+def hop_totals(segments: list[tuple[dict, float, float]]) -> dict[str, float]:
+    totals: dict[str, float] = {}
+    for span, start, end in segments:
+        totals[hop(span)] = totals.get(hop(span), 0.0) + (end - start) * 1000
+    return totals
+
+
+def print_trace(trace_id: str, spans: list[dict]) -> None:
+    tree = TraceTree(spans)
+    segments = tree.critical_path()
+    total_ms = (tree.end() - tree.start()) * 1000
+    print(f"trace {trace_id}: {len(spans)} spans, {total_ms:.1f} ms end to end (* = on the critical path)")
+    print_tree(tree, {span["span_id"] for span, _, _ in segments})
+    print("\ncritical path:")
+    origin = tree.start()
+    for span, start, end in segments:
+        print(f"  +{(start - origin) * 1000:9.1f} ms  {(end - start) * 1000:9.1f} ms  {hop(span):<24} {span['name']}")
+    print("\ntime on the critical path per hop:")
+    for name, ms in sorted(hop_totals(segments).items(), key=lambda item: -item[1]):
+        print(f"  {name:<24} {ms:9.1f} ms  {100 * ms / (total_ms or 1):5.1f}%")
+
+
+def print_summary(traces: dict[str, list[dict]]) -> None:
+    totals: dict[str, float] = {}
+    overall = 0.0
+    for spans in traces.values():
+        tree = TraceTree(spans)
+        overall += (tree.end() - tree.start()) * 1000
+        for name, ms in hop_totals(tree.critical_path()).items():
+            totals[name] = totals.get(name, 0.0) + ms
+    print(f"{len(traces)} traces, {overall:.1f} ms end to end in total; critical path time per hop:")
+    for name, ms in sorted(totals.items(), key=lambda item: -item[1]):
+        print(f"  {name:<24} {ms:11.1f} ms  {100 * ms / (overall or 1):5.1f}%")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        prog='Trace critical path',
+        description='Prints the critical path of traces recorded by the SSI-App services.')
+    parser.add_argument('spans_path', type=str, nargs='?', default=TRACE_FILE)
+    parser.add_argument('--trace-id', type=str, help='Trace to show (default: the slowest one).')
+    parser.add_argument('--summary', action='store_true', help='Critical path time per hop over all traces.')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    traces = load_traces(args.spans_path)
+    if not traces:
+        raise SystemExit(f'No spans in {args.spans_path}.')
+    if args.summary:
+        print_summary(traces)
+    elif args.trace_id:
+        if args.trace_id not in traces:
+            raise SystemExit(f'Trace {args.trace_id} not found.')
+        print_trace(args.trace_id, traces[args.trace_id])
+    else:
+        slowest = max(traces, key=lambda trace_id: TraceTree(traces[trace_id]).end() - TraceTree(traces[trace_id]).start())
+        print_trace(slowest, traces[slowest])
@@ -0,0 +1,171 @@
+import json
+import os
+import re
+import secrets
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+import aiohttp
+
+# Off by default. SSI_TRACING=1 records spans of every SSI-App process into SSI_TRACE_FILE.
+TRACING_ENABLED = os.environ.get("SSI_TRACING", "0") == "1"
+TRACE_FILE = os.environ.get("SSI_TRACE_FILE", os.path.join("traces", "spans.jsonl"))
+TRACEPARENT_HEADER = "traceparent"
+# W3C Trace Context: version-trace_id-parent_id-flags.
+TRACEPARENT_PATTERN = re.compile(r"00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})")
+
+
+@dataclass
+class Span:
+    name: str
+    service: str
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    kind: str
+    start: float
+    end: float | None = None
+    attributes: dict = field(default_factory=dict)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+
+# Span of the current task, parent of the spans it starts and of the requests it sends.
+_current_span: ContextVar[Span | None] = ContextVar("tracing_current_span", default=None)
+# Services set it from their middleware; scripts (interfaces, CLIs) are named after their file.
+_service_name = os.path.splitext(os.path.basename(sys.argv[0]))[0] or "ssi-app"
+
+
+def set_service_name(name: str) -> None:
+    global _service_name
+    _service_name = name
+
+
+def parse_traceparent(header: str | None) -> tuple[str, str] | None:
+    """
+    Returns (trace_id, parent span_id) from a traceparent header, or None if absent or malformed.
+    """
+    match = TRACEPARENT_PATTERN.fullmatch(header.strip().lower()) if header else None
+    if not match or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2)
+
+
+def current_traceparent() -> str | None:
+    span = _current_span.get()
+    return span.traceparent if span else None
+
+
+class JsonlExporter:
+    """
+    Appends finished spans, one JSON object per line, to a file shared by
+    every process: each line goes out in a single O_APPEND write, so lines of
+    concurrent writers do not interleave.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = None
+
+    def export(self, span: Span) -> None:
+        if self._fd is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        record = {
+            "trace_id": span.trace_id,
+            "span_id": span.span_id,
+            "parent_id": span.parent_id,
+            "name": span.name,
+            "service": span.service,
+            "kind": span.kind,
+            "pid": os.getpid(),
+            "start": span.start,
+            "end": span.end,
+            "duration_ms": round((span.end - span.start) * 1000, 3),
+            "attributes": span.attributes,
+        }
+        os.write(self._fd, (json.dumps(record) + "\n").encode("utf-8"))
+
+
+exporter = JsonlExporter(TRACE_FILE)
+
+
+@contextmanager
+def span(name: str, kind: str = "internal", parent: str | None = None, **attributes):
+    """
+    Records a span around the block, child of `parent` (a traceparent header)
+    if given, else of the current span; a new trace starts when there is neither.
+    Yields the Span (None when tracing is disabled), whose attributes may be extended.
+    """
+    if not TRACING_ENABLED:
+        yield None
+        return
+    parent_context = parse_traceparent(parent)
+    if parent_context is None:
+        current = _current_span.get()
+        parent_context = (current.trace_id, current.span_id) if current else None
+    trace_id, parent_id = parent_context if parent_context else (secrets.token_hex(16), None)
+    new_span = Span(name, _service_name, trace_id, secrets.token_hex(8), parent_id, kind, time.time(), attributes=attributes)
+    token = _current_span.set(new_span)
+    try:
+        yield new_span
+    except BaseException as e:
+        new_span.attributes["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        new_span.end = time.time()
+        exporter.export(new_span)
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware continuing the caller's trace (traceparent header) with a
+    server span per request, named after the route template.
+    """
+    def __init__(self, app, service: str):
+        self.app = app
+        self.service = service
+        set_service_name(service)
+
+    async def __call__(self, scope, receive, send):
+        if not TRACING_ENABLED or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        traceparent = None
+        for name, value in scope["headers"]:
+            if name == TRACEPARENT_HEADER.encode():
+                traceparent = value.decode("latin-1")
+                break
+
+        with span(f"{scope['method']} {scope['path']}", kind="server", parent=traceparent) as server_span:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    server_span.attributes["status"] = message["status"]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                if route is not None:
+                    server_span.name = f"{scope['method']} {route.path}"
+
+
+async def tracing_client_middleware(request: aiohttp.ClientRequest, handler) -> aiohttp.ClientResponse:
+    """
+    aiohttp client middleware: a client span per outbound request (until the
+    response headers arrive), propagated to the peer in the traceparent header.
+    """
+    if not TRACING_ENABLED:
+        return await handler(request)
+    with span(f"{request.method} {request.url.path}", kind="client",
+              peer=f"{request.url.host}:{request.url.port}") as client_span:
+        request.headers[TRACEPARENT_HEADER] = client_span.traceparent
+        response = await handler(request)
+        client_span.attributes["status"] = response.status
+        return response
@@ -1,10 +1,20 @@
 #!/bin/bash
 
-echo "Starting all services in the background..."
+# Usage: ./start_services.sh        (production: launcher.py, no reload, several workers)
+#        ./start_services.sh dev    (development: each service with auto-reload)
 
-python3 mockDbservice/mockdb_service.py &
-python3 holder/holder_api.py &
-python3 issuer/verifier_api.py &
-python3 issuer/webhook_handler.py &
+if [ "$1" == "dev" ]; then
+    echo "Starting all services in the background (development mode)..."
 
-echo "All services have been started."
\ No newline at end of file
+    python3 mockDbservice/mockdb_service.py &
+    python3 holder/holder_api.py &
+    python3 issuer/verifier_api.py &
+    python3 issuer/webhook_handler.py &
+else
+    echo "Starting the launcher in the background..."
+
+    python3 launcher.py &
+    echo $! > launcher.pid
+fi
+
+echo "All services have been started."
@@ -2,9 +2,15 @@
 
 echo "Stopping all services..."
 
+# The launcher drains its services in reverse dependency order on SIGTERM.
+if [ -f launcher.pid ]; then
+    kill -TERM "$(cat launcher.pid)" 2>/dev/null
+    rm -f launcher.pid
+fi
+
 pkill -f mockDbservice/mockdb_service.py
 pkill -f issuer/webhook_handler.py
 pkill -f holder/holder_api.py
 pkill -f issuer/verifier_api.py &
 
-echo "All services have been stopped."
\ No newline at end of file
+echo "All services have been stopped."